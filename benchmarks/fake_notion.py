@@ -0,0 +1,369 @@
+"""Local stand-in for the Notion API, for load testing.
+
+Usage:
+    python benchmarks/fake_notion.py [--port 8181] [--latency-ms 150]
+        [--latency-distribution lognormal] [--rate-limit-probability 0.01]
+
+Implements the endpoints the integration uses: databases.retrieve and
+databases.query, pages.create, pages.retrieve and pages.update, and
+users.list, with cursor pagination. Data lives in memory and is seeded with
+``--users`` users and ``--issues`` issue pages whose ids are derived from
+their position (see ``user_id`` and ``issue_id``), so a load generator can
+reference them without listing them first.
+
+Every response is delayed according to the latency options. Requests are
+rejected with a Notion style ``429`` either at random, with
+``--rate-limit-probability``, or when they exceed ``--requests-per-second``.
+"""
+
+import argparse
+import asyncio
+import itertools
+import math
+import random
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from uuid import UUID, uuid4, uuid5
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+DATABASE_ID = "00000000-0000-4000-8000-000000000001"
+ID_PREFIX = "ISSUE"
+
+# Property name to property id, as in a database set up for the integration
+SCHEMA = {
+    "Name": ("title", "title"),
+    "ID": ("uid", "unique_id"),
+    "Assignee": ("asgn", "people"),
+    "Sentry link": ("surl", "url"),
+    "Description": ("desc", "rich_text"),
+}
+
+_NAMESPACE = UUID("6f1c2a4e-3b1d-4c59-9d2a-7f1e0c9b5a11")
+_FIRST_NAMES = ["Ada", "Grace", "Alan", "Linus", "Barbara", "Ken", "Margaret"]
+_LAST_NAMES = ["Lovelace", "Hopper", "Turing", "Torvalds", "Liskov", "Thompson"]
+_WORDS = ["login", "payment", "timeout", "crash", "billing", "search", "upload"]
+
+
+def user_id(index: int) -> UUID:
+    return uuid5(_NAMESPACE, f"user-{index}")
+
+
+def issue_id(index: int) -> UUID:
+    return uuid5(_NAMESPACE, f"issue-{index}")
+
+
+def user_name(index: int) -> str:
+    first = _FIRST_NAMES[index % len(_FIRST_NAMES)]
+    last = _LAST_NAMES[(index // len(_FIRST_NAMES)) % len(_LAST_NAMES)]
+    return f"{first} {last} {index}"
+
+
+def issue_title(index: int) -> str:
+    return f"{_WORDS[index % len(_WORDS)].capitalize()} issue {index}"
+
+
+class Latency:
+    """Samples response delays from the configured distribution."""
+
+    def __init__(self, mean_ms: float, distribution: str, jitter: float) -> None:
+        self.mean = mean_ms / 1000
+        self.distribution = distribution
+        self.jitter = jitter
+
+    def sample(self) -> float:
+        if self.mean <= 0:
+            return 0.0
+        if self.distribution == "uniform":
+            spread = self.mean * self.jitter
+            return random.uniform(self.mean - spread, self.mean + spread)
+        if self.distribution == "exponential":
+            return random.expovariate(1 / self.mean)
+        if self.distribution == "lognormal":
+            # Long right tail, with the configured mean
+            sigma = self.jitter
+            mu = math.log(self.mean) - sigma**2 / 2
+            return random.lognormvariate(mu, sigma)
+        return self.mean
+
+
+class RateLimit:
+    """Rejects requests at random and above a requests per second limit."""
+
+    def __init__(
+        self, probability: float, requests_per_second: float, retry_after: float
+    ) -> None:
+        self.probability = probability
+        self.requests_per_second = requests_per_second
+        self.retry_after = retry_after
+        self._tokens = requests_per_second
+        self._updated_at = time.monotonic()
+
+    def should_reject(self) -> bool:
+        if self.probability and random.random() < self.probability:
+            return True
+        if self.requests_per_second <= 0:
+            return False
+
+        now = time.monotonic()
+        self._tokens = min(
+            self.requests_per_second,
+            self._tokens + (now - self._updated_at) * self.requests_per_second,
+        )
+        self._updated_at = now
+        if self._tokens < 1:
+            return True
+        self._tokens -= 1
+        return False
+
+
+class FakeNotion:
+    """In-memory Notion workspace with a single issues database."""
+
+    def __init__(self, users: int, issues: int) -> None:
+        self._numbers = itertools.count(1)
+        self.users = [
+            {"object": "user", "id": str(user_id(index)), "name": user_name(index)}
+            for index in range(users)
+        ]
+        self.pages: Dict[str, Dict[str, Any]] = {}
+        for index in range(issues):
+            self._add_page(
+                str(issue_id(index)),
+                {"Name": {"title": [{"text": {"content": issue_title(index)}}]}},
+            )
+
+    def database(self) -> Dict[str, Any]:
+        return {
+            "object": "database",
+            "id": DATABASE_ID,
+            "properties": {
+                name: {"id": property_id, "name": name, "type": property_type}
+                for name, (property_id, property_type) in SCHEMA.items()
+            },
+        }
+
+    def create_page(self, properties: Dict[str, Any]) -> Dict[str, Any]:
+        return self._add_page(str(uuid4()), properties)
+
+    def update_page(
+        self, page_id: str, properties: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        page = self.pages.get(page_id)
+        if page is None:
+            return None
+        page["properties"].update(_property_values(properties))
+        page["last_edited_time"] = _now()
+        return page
+
+    def query(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        pages = list(self.pages.values())
+
+        condition = body.get("filter") or {}
+        if "title" in condition:
+            needle = condition["title"].get("contains", "").casefold()
+            pages = [page for page in pages if needle in _title(page).casefold()]
+        if "last_edited_time" in condition:
+            since = condition["last_edited_time"].get("on_or_after")
+            if since:
+                pages = [
+                    page
+                    for page in pages
+                    if _parse_time(page["last_edited_time"]) >= _parse_time(since)
+                ]
+
+        for sort in body.get("sorts") or []:
+            if sort.get("timestamp") == "last_edited_time":
+                pages.sort(
+                    key=lambda page: page["last_edited_time"],
+                    reverse=sort.get("direction") == "descending",
+                )
+        return paginate(pages, body.get("start_cursor"), body.get("page_size"))
+
+    def _add_page(self, page_id: str, properties: Dict[str, Any]) -> Dict[str, Any]:
+        number = next(self._numbers)
+        values = _property_values(properties)
+        values["ID"] = {
+            "id": "uid",
+            "type": "unique_id",
+            "unique_id": {"number": number, "prefix": ID_PREFIX},
+        }
+        now = _now()
+        page = {
+            "object": "page",
+            "id": page_id,
+            "url": f"https://www.notion.so/{page_id.replace('-', '')}",
+            "created_time": now,
+            "last_edited_time": now,
+            "properties": values,
+        }
+        self.pages[page_id] = page
+        return page
+
+
+def paginate(
+    items: List[Dict[str, Any]], start_cursor: Optional[str], page_size: Optional[int]
+) -> Dict[str, Any]:
+    start = int(start_cursor) if start_cursor else 0
+    size = min(int(page_size or 100), 100)
+    end = start + size
+    return {
+        "object": "list",
+        "results": items[start:end],
+        "next_cursor": str(end) if end < len(items) else None,
+        "has_more": end < len(items),
+    }
+
+
+def _now() -> str:
+    return (
+        datetime.now(timezone.utc)
+        .isoformat(timespec="milliseconds")
+        .replace("+00:00", "Z")
+    )
+
+
+def _parse_time(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _title(page: Dict[str, Any]) -> str:
+    for value in page["properties"].values():
+        if value.get("type") == "title":
+            return "".join(part["plain_text"] for part in value["title"])
+    return ""
+
+
+def _property_values(properties: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    # Properties may be given by name or id; echo them back by name, in the
+    # shape Notion returns them
+    names = {property_id: name for name, (property_id, _) in SCHEMA.items()}
+    values = {}
+    for key, value in properties.items():
+        name = names.get(key, key)
+        property_id, value_type = SCHEMA.get(name, (key, next(iter(value))))
+        content = value.get(value_type)
+        if value_type in ("title", "rich_text"):
+            content = [
+                {
+                    "type": "text",
+                    "text": part["text"],
+                    "plain_text": part["text"]["content"],
+                }
+                for part in content or []
+            ]
+        values[name] = {"id": property_id, "type": value_type, value_type: content}
+    return values
+
+
+def _error(status: int, code: str, message: str, **headers: str) -> JSONResponse:
+    return JSONResponse(
+        status_code=status,
+        content={"object": "error", "status": status, "code": code, "message": message},
+        headers=headers,
+    )
+
+
+def create_app(notion: FakeNotion, latency: Latency, rate_limit: RateLimit) -> FastAPI:
+    app = FastAPI(title="Fake Notion API")
+
+    @app.middleware("http")
+    async def simulate_network(request: Request, call_next):
+        if rate_limit.should_reject():
+            return _error(
+                429,
+                "rate_limited",
+                "You have been rate limited. Please try again in a few minutes.",
+                **{"Retry-After": str(rate_limit.retry_after)},
+            )
+        await asyncio.sleep(latency.sample())
+        return await call_next(request)
+
+    @app.get("/v1/databases/{database_id}")
+    async def retrieve_database(database_id: str):
+        return notion.database()
+
+    @app.post("/v1/databases/{database_id}/query")
+    async def query_database(database_id: str, request: Request):
+        return notion.query(await request.json())
+
+    @app.post("/v1/pages")
+    async def create_page(request: Request):
+        body = await request.json()
+        return notion.create_page(body.get("properties", {}))
+
+    @app.get("/v1/pages/{page_id}")
+    async def retrieve_page(page_id: UUID):
+        page = notion.pages.get(str(page_id))
+        if page is None:
+            return _error(404, "object_not_found", f"Could not find page {page_id}")
+        return page
+
+    @app.patch("/v1/pages/{page_id}")
+    async def update_page(page_id: UUID, request: Request):
+        body = await request.json()
+        page = notion.update_page(str(page_id), body.get("properties", {}))
+        if page is None:
+            return _error(404, "object_not_found", f"Could not find page {page_id}")
+        return page
+
+    @app.get("/v1/users")
+    async def list_users(start_cursor: Optional[str] = None, page_size: int = 100):
+        return paginate(notion.users, start_cursor, page_size)
+
+    return app
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--issues", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=float, default=150)
+    parser.add_argument(
+        "--latency-distribution",
+        choices=["fixed", "uniform", "exponential", "lognormal"],
+        default="lognormal",
+    )
+    parser.add_argument(
+        "--latency-jitter",
+        type=float,
+        default=0.5,
+        help="Spread of uniform latency as a fraction of the mean, or sigma of "
+        "lognormal latency",
+    )
+    parser.add_argument("--rate-limit-probability", type=float, default=0.0)
+    parser.add_argument(
+        "--requests-per-second",
+        type=float,
+        default=0.0,
+        help="Reject requests above this rate with a 429, 0 to disable",
+    )
+    parser.add_argument("--retry-after", type=float, default=1.0)
+
+
+def app_from_arguments(args: argparse.Namespace) -> FastAPI:
+    return create_app(
+        FakeNotion(users=args.users, issues=args.issues),
+        Latency(args.latency_ms, args.latency_distribution, args.latency_jitter),
+        RateLimit(
+            args.rate_limit_probability, args.requests_per_second, args.retry_after
+        ),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8181)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    uvicorn.run(
+        app_from_arguments(args), host=args.host, port=args.port, log_level="warning"
+    )
+
+
+if __name__ == "__main__":
+    main()
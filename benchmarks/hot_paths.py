@@ -0,0 +1,344 @@
+"""Microbenchmarks for the request hot paths.
+
+Usage:
+    python benchmarks/hot_paths.py [--output results.json]
+    python benchmarks/hot_paths.py --baseline previous.json [--max-regression 0.25]
+
+Runs offline: Redis is replaced by an in-memory mock and Notion is never
+called. Results are printed as a table and, with ``--output``, written as
+JSON. With ``--baseline`` every benchmark is compared against an earlier
+JSON result by median time, and the script exits with status 1 if any is
+slower by more than ``--max-regression`` (a fraction, 0.25 is 25%).
+"""
+
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from unittest.mock import AsyncMock, patch
+from uuid import uuid4
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+os.environ.setdefault(
+    "NOTION_CONFIG", '{"database_id": "benchmark", "column_names": {}}'
+)
+
+from starlette.requests import Request  # noqa: E402
+
+from main import search_notion_issues  # noqa: E402
+from notion.client import NotionClient  # noqa: E402
+from notion.codec import encode_users  # noqa: E402
+from notion.mirror import IssueMirror  # noqa: E402
+from notion.types import (  # noqa: E402
+    NotionIssueSummary,
+    NotionProperty,
+    NotionUserResponse,
+)
+from notion.utils import initialize_empty_properties  # noqa: E402
+from sentry.utils import SentrySignatureMiddleware  # noqa: E402
+from settings import settings  # noqa: E402
+
+SECRET = "benchmark-secret"
+
+# Target duration of one timed round, and number of rounds per benchmark
+ROUND_SECONDS = 0.05
+ROUNDS = 7
+
+PROPERTY_TYPES = [
+    "title",
+    "rich_text",
+    "number",
+    "select",
+    "multi_select",
+    "date",
+    "people",
+    "files",
+    "checkbox",
+    "url",
+    "email",
+    "phone_number",
+    "relation",
+    "status",
+    "formula",
+]
+
+
+class Suite:
+    """Collects timings for each benchmark and its parameters."""
+
+    def __init__(self, only: Optional[str] = None) -> None:
+        self.only = only
+        self.results: List[Dict[str, Any]] = []
+        self.loop = asyncio.new_event_loop()
+
+    def run(self, name: str, params: Dict[str, Any], func: Callable[[], Any]) -> None:
+        self.run_async(name, params, _as_coroutine(func))
+
+    def run_async(
+        self,
+        name: str,
+        params: Dict[str, Any],
+        func: Callable[[], Awaitable[Any]],
+    ) -> None:
+        if self.only and self.only not in name:
+            return
+        timings = self.loop.run_until_complete(_measure(func))
+        result = {
+            "name": name,
+            "params": params,
+            "iterations": timings["iterations"],
+            "median_us": statistics.median(timings["per_call"]) * 1e6,
+            "min_us": min(timings["per_call"]) * 1e6,
+            "stdev_us": statistics.stdev(timings["per_call"]) * 1e6,
+        }
+        self.results.append(result)
+        print(
+            f"{name:<24} {_format_params(params):<24} "
+            f"{result['median_us']:>12.2f} {result['min_us']:>12.2f}"
+        )
+
+
+def _as_coroutine(func: Callable[[], Any]) -> Callable[[], Awaitable[Any]]:
+    async def call() -> Any:
+        return func()
+
+    return call
+
+
+async def _measure(func: Callable[[], Awaitable[Any]]) -> Dict[str, Any]:
+    # Calibrate the number of calls per round to roughly ROUND_SECONDS
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            await func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= ROUND_SECONDS / 5 or number >= 1_000_000:
+            break
+        number *= 2
+    number = max(1, int(number * ROUND_SECONDS / max(elapsed, 1e-9)))
+
+    per_call = []
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        for _ in range(number):
+            await func()
+        per_call.append((time.perf_counter() - started) / number)
+    return {"iterations": number * ROUNDS, "per_call": per_call}
+
+
+def _format_params(params: Dict[str, Any]) -> str:
+    return " ".join(f"{key}={value}" for key, value in params.items())
+
+
+def _key(result: Dict[str, Any]) -> str:
+    return f"{result['name']} {_format_params(result['params'])}"
+
+
+def make_users(count: int) -> List[NotionUserResponse]:
+    return [
+        NotionUserResponse(id=uuid4(), name=f"User {index} Example-Name")
+        for index in range(count)
+    ]
+
+
+def bench_signature(suite: Suite) -> None:
+    async def app(scope: Any, receive: Any, send: Any) -> None:
+        await receive()
+
+    async def send(message: Any) -> None:
+        pass
+
+    middleware = SentrySignatureMiddleware(app, secret=SECRET)
+
+    for size in (512, 4096, 65536):
+        body = os.urandom(size)
+        signature = hmac.new(SECRET.encode(), body, hashlib.sha256).hexdigest()
+        scope = {
+            "type": "http",
+            "path": "/create",
+            "headers": [(b"sentry-hook-signature", signature.encode())],
+        }
+        # Bodies arrive in chunks of up to 64 KiB
+        messages = [
+            {
+                "type": "http.request",
+                "body": body[start : start + 65536],
+                "more_body": start + 65536 < size,
+            }
+            for start in range(0, size, 65536)
+        ]
+
+        async def verify(messages: List[Dict[str, Any]] = messages) -> None:
+            pending = iter(messages)
+
+            async def receive() -> Dict[str, Any]:
+                return next(pending)
+
+            await middleware(scope, receive, send)
+
+        suite.run_async("signature", {"body_bytes": size}, verify)
+
+
+def bench_initialize_empty_properties(suite: Suite) -> None:
+    for width in (20, 200):
+        schema = {
+            f"Property {index}": NotionProperty(
+                id=f"prop{index}", type=PROPERTY_TYPES[index % len(PROPERTY_TYPES)]
+            )
+            for index in range(width)
+        }
+        suite.run(
+            "initialize_properties",
+            {"properties": width},
+            lambda schema=schema: initialize_empty_properties(schema),
+        )
+
+
+def bench_user_cache_decode(suite: Suite) -> None:
+    for count in (100, 1000, 10000):
+        cached = encode_users(
+            make_users(count),
+            settings.cache_soft_timeout,
+            compress=settings.user_cache_compression,
+        )
+        redis = AsyncMock()
+        redis.get.return_value = cached
+
+        async def load() -> None:
+            # Cold process: L1 empty, directory read and indexed from Redis
+            NotionClient._local_cache.invalidate()
+            await NotionClient._get_and_cache_users()
+
+        with patch.object(NotionClient, "_redis", redis):
+            suite.run_async("user_cache_decode", {"users": count}, load)
+
+
+def bench_get_users(suite: Suite) -> None:
+    redis = AsyncMock()
+    redis.get.return_value = encode_users(
+        make_users(10000), settings.cache_soft_timeout
+    )
+    with patch.object(NotionClient, "_redis", redis):
+        NotionClient._local_cache.invalidate()
+        for query in ("", "us", "user 42", "example-name"):
+
+            async def search(query: str = query) -> None:
+                await NotionClient.get_users(query)
+
+            suite.run_async("get_users", {"users": 10000, "query": query}, search)
+
+
+def bench_search_response(suite: Suite) -> None:
+    now = datetime.now(timezone.utc)
+    mirror = IssueMirror(sync_interval=3600, full_sync_interval=3600)
+    mirror.replace(
+        NotionIssueSummary(
+            id=uuid4(),
+            title=f"Issue {index} in the payment service",
+            url=f"https://www.notion.so/Issue-{index}",
+            identifier=f"ISSUE-{index}",
+            last_edited_time=now - timedelta(minutes=index),
+        )
+        for index in range(5000)
+    )
+    request = Request({"type": "http", "method": "GET", "headers": []})
+
+    mirrors = {settings.notion_config.databases[0].database_id: mirror}
+    with patch.object(NotionClient, "_issue_mirrors", mirrors):
+        for cached in (False, True):
+            # Without a cache generation every response is built and encoded
+            generation = mirror.generation if cached else None
+
+            async def search() -> None:
+                await search_notion_issues(request, query="payment")
+
+            with patch.object(
+                NotionClient, "get_issues_generation", return_value=generation
+            ):
+                suite.run_async("search_response", {"cached": cached}, search)
+
+
+def compare(
+    results: List[Dict[str, Any]], baseline_path: str, max_regression: float
+) -> bool:
+    with open(baseline_path) as baseline_file:
+        baseline = {
+            _key(result): result for result in json.load(baseline_file)["results"]
+        }
+
+    print(f"\n{'benchmark':<50} {'baseline':>10} {'current':>10} {'change':>8}")
+    passed = True
+    for result in results:
+        previous = baseline.get(_key(result))
+        if previous is None:
+            continue
+        change = result["median_us"] / previous["median_us"] - 1
+        regressed = change > max_regression
+        passed = passed and not regressed
+        print(
+            f"{_key(result):<50} {previous['median_us']:>10.2f} "
+            f"{result['median_us']:>10.2f} {change:>+7.0%}"
+            f"{'  REGRESSED' if regressed else ''}"
+        )
+    return passed
+
+
+def metadata() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare against this JSON result")
+    parser.add_argument("--max-regression", type=float, default=0.25)
+    parser.add_argument("--only", help="Only run benchmarks containing this name")
+    args = parser.parse_args()
+
+    suite = Suite(only=args.only)
+    print(f"{'benchmark':<24} {'params':<24} {'median (us)':>12} {'min (us)':>12}")
+    bench_signature(suite)
+    bench_initialize_empty_properties(suite)
+    bench_user_cache_decode(suite)
+    bench_get_users(suite)
+    bench_search_response(suite)
+    suite.loop.close()
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(
+                {"metadata": metadata(), "results": suite.results},
+                output_file,
+                indent=2,
+            )
+
+    if args.baseline and not compare(suite.results, args.baseline, args.max_regression):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
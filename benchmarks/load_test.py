@@ -0,0 +1,319 @@
+"""End-to-end load test of the integration against a fake Notion API.
+
+Usage:
+    python benchmarks/load_test.py [--duration 30] [--concurrency 20]
+        [--mix users=4,search=4,create=1,link=1] [--output results.json]
+    python benchmarks/load_test.py --app-url http://127.0.0.1:8000
+
+Starts ``benchmarks/fake_notion.py`` and the real app (``serve_app.py``,
+with fakeredis unless ``--redis local`` is given) as subprocesses, then
+sends correctly signed Sentry requests to ``/users``, ``/search``,
+``/create`` and ``/link`` from ``--concurrency`` workers for ``--duration``
+seconds. Throughput, latency percentiles and status codes are reported per
+endpoint. Options of the fake Notion server, such as ``--latency-ms`` and
+``--rate-limit-probability``, are accepted too.
+
+With ``--app-url`` requests go to an app that is already running instead; it
+must share ``--secret`` and serve a fake Notion started with the same
+``--users`` and ``--issues``. Other app settings, such as
+``NOTION_REQUESTS_PER_SECOND``, are taken from the environment.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import hmac
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+from typing import Any, Dict, List, Tuple
+
+import httpx
+from fake_notion import (
+    DATABASE_ID,
+    add_arguments,
+    issue_id,
+    user_id,
+    user_name,
+)
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+ENDPOINTS = ("users", "search", "create", "link")
+SEARCH_TERMS = ["", "login", "payment", "timeout", "issue 1", "crash"]
+
+
+class Recorder:
+    """Collects the latency and status of every request by endpoint."""
+
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+
+    def record(self, endpoint: str, status: str, latency: float) -> None:
+        self.latencies[endpoint].append(latency)
+        self.statuses[endpoint][status] += 1
+
+    def report(self, duration: float) -> Dict[str, Dict[str, Any]]:
+        report = {}
+        for endpoint in sorted(self.latencies):
+            latencies = sorted(self.latencies[endpoint])
+            report[endpoint] = {
+                "requests": len(latencies),
+                "throughput_rps": len(latencies) / duration,
+                "p50_ms": percentile(latencies, 50) * 1000,
+                "p95_ms": percentile(latencies, 95) * 1000,
+                "p99_ms": percentile(latencies, 99) * 1000,
+                "statuses": dict(self.statuses[endpoint]),
+            }
+        return report
+
+
+def percentile(ordered: List[float], percent: float) -> float:
+    # Nearest rank on already sorted values
+    if not ordered:
+        return 0.0
+    rank = max(1, round(percent / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class SentryRequests:
+    """Builds signed requests as Sentry sends them to the integration."""
+
+    def __init__(self, secret: str, users: int, issues: int) -> None:
+        self.secret = secret.encode("utf-8")
+        self.users = users
+        self.issues = issues
+        # Unique per run, so every create is a new Sentry issue
+        self._issue_ids = itertools.count(int(time.time() * 1000))
+
+    def build(self, endpoint: str) -> Tuple[str, str, Dict[str, Any], bytes]:
+        if endpoint == "users":
+            query = user_name(random.randrange(self.users)).split()[0][:3]
+            return "GET", "/users", {"query": query}, b""
+        if endpoint == "search":
+            return "GET", "/search", {"query": random.choice(SEARCH_TERMS)}, b""
+
+        issue = next(self._issue_ids)
+        payload: Dict[str, Any] = {
+            "installationId": "load-test",
+            "issueId": issue,
+            "webUrl": f"https://sentry.io/organizations/load-test/issues/{issue}/",
+            "project": {"slug": "load-test", "id": 1},
+            "actor": {"name": "Load Test", "id": 1},
+        }
+        if endpoint == "create":
+            payload["fields"] = {
+                "title": f"Load test issue {issue}",
+                "description": "Created by the load test",
+                "owner_id": str(user_id(random.randrange(self.users))),
+            }
+        else:
+            payload["fields"] = {
+                "page_id": str(issue_id(random.randrange(self.issues)))
+            }
+        return "POST", f"/{endpoint}", {}, json.dumps(payload).encode("utf-8")
+
+    def sign(self, body: bytes) -> str:
+        return hmac.new(self.secret, body, hashlib.sha256).hexdigest()
+
+
+async def worker(
+    client: httpx.AsyncClient,
+    requests: SentryRequests,
+    mix: Dict[str, int],
+    deadline: float,
+    recorder: Recorder,
+) -> None:
+    endpoints = list(mix)
+    weights = list(mix.values())
+    while time.monotonic() < deadline:
+        endpoint = random.choices(endpoints, weights)[0]
+        method, path, params, body = requests.build(endpoint)
+        headers = {
+            "Content-Type": "application/json",
+            "Sentry-Hook-Signature": requests.sign(body),
+        }
+
+        started = time.perf_counter()
+        try:
+            response = await client.request(
+                method, path, params=params, content=body, headers=headers
+            )
+            status = str(response.status_code)
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        recorder.record(endpoint, status, time.perf_counter() - started)
+
+
+async def run_load(
+    app_url: str,
+    requests: SentryRequests,
+    mix: Dict[str, int],
+    duration: float,
+    concurrency: int,
+    timeout: float,
+) -> Tuple[Recorder, float]:
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(
+        base_url=app_url, limits=limits, timeout=timeout
+    ) as client:
+        started = time.monotonic()
+        await asyncio.gather(
+            *(
+                worker(client, requests, mix, started + duration, recorder)
+                for _ in range(concurrency)
+            )
+        )
+        elapsed = time.monotonic() - started
+    return recorder, elapsed
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    mix = {}
+    for part in value.split(","):
+        endpoint, _, weight = part.partition("=")
+        if endpoint not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"Unknown endpoint {endpoint!r}")
+        mix[endpoint] = int(weight or 1)
+    return mix
+
+
+def start_server(args: List[str], env: Dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, *args], env=env)
+
+
+def wait_until_up(url: str, process: subprocess.Popen, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            sys.exit(f"Server for {url} exited with status {process.returncode}")
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    sys.exit(f"Server for {url} did not start within {timeout} seconds")
+
+
+def start_servers(args: argparse.Namespace, stack: ExitStack) -> str:
+    """Start the fake Notion server and the app, returning the app URL."""
+
+    def stop(process: subprocess.Popen) -> None:
+        process.terminate()
+        process.wait()
+
+    notion_url = f"http://127.0.0.1:{args.notion_port}"
+    notion = start_server(
+        [
+            os.path.join(BENCHMARKS_DIR, "fake_notion.py"),
+            f"--port={args.notion_port}",
+            f"--users={args.users}",
+            f"--issues={args.issues}",
+            f"--latency-ms={args.latency_ms}",
+            f"--latency-distribution={args.latency_distribution}",
+            f"--latency-jitter={args.latency_jitter}",
+            f"--rate-limit-probability={args.rate_limit_probability}",
+            f"--requests-per-second={args.requests_per_second}",
+            f"--retry-after={args.retry_after}",
+        ],
+        dict(os.environ),
+    )
+    stack.callback(stop, notion)
+    wait_until_up(f"{notion_url}/v1/databases/{DATABASE_ID}", notion)
+
+    env = dict(os.environ)
+    env.update(
+        NOTION_BASE_URL=notion_url,
+        NOTION_TOKEN="load-test",
+        NOTION_CONFIG=json.dumps({"database_id": DATABASE_ID, "column_names": {}}),
+        SENTRY_NOTION_INTEGRATION_CLIENT_SECRET=args.secret,
+    )
+    app_url = f"http://127.0.0.1:{args.app_port}"
+    app_args = [os.path.join(BENCHMARKS_DIR, "serve_app.py"), f"--port={args.app_port}"]
+    if args.redis == "fake":
+        app_args.append("--fakeredis")
+    app = start_server(app_args, env)
+    stack.callback(stop, app)
+    wait_until_up(f"{app_url}/openapi.json", app)
+    return app_url
+
+
+def print_report(report: Dict[str, Dict[str, Any]]) -> None:
+    print(
+        f"{'endpoint':<10} {'requests':>9} {'req/s':>8} {'p50 ms':>8} "
+        f"{'p95 ms':>8} {'p99 ms':>8}  statuses"
+    )
+    for endpoint, result in report.items():
+        statuses = " ".join(
+            f"{status}={count}" for status, count in sorted(result["statuses"].items())
+        )
+        print(
+            f"{endpoint:<10} {result['requests']:>9} "
+            f"{result['throughput_rps']:>8.1f} {result['p50_ms']:>8.1f} "
+            f"{result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f}  {statuses}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default="users=4,search=4,create=1,link=1",
+        help="Relative weight of each endpoint",
+    )
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument(
+        "--secret",
+        default=os.environ.get(
+            "SENTRY_NOTION_INTEGRATION_CLIENT_SECRET", "load-test-secret"
+        ),
+    )
+    parser.add_argument("--app-url", help="Load test an already running app")
+    parser.add_argument("--app-port", type=int, default=8180)
+    parser.add_argument("--notion-port", type=int, default=8181)
+    parser.add_argument("--redis", choices=["fake", "local"], default="fake")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    requests = SentryRequests(args.secret, users=args.users, issues=args.issues)
+    with ExitStack() as stack:
+        app_url = args.app_url or start_servers(args, stack)
+        recorder, elapsed = asyncio.run(
+            run_load(
+                app_url,
+                requests,
+                args.mix,
+                args.duration,
+                args.concurrency,
+                args.timeout,
+            )
+        )
+
+    report = recorder.report(elapsed)
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(
+                {
+                    "duration": elapsed,
+                    "concurrency": args.concurrency,
+                    "endpoints": report,
+                },
+                output_file,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Measure the CPU saved per request by FAST_SERIALIZATION.
+
+Usage:
+    python benchmarks/serialization.py [--pages 10] [--properties 15]
+
+Compares the default and fast paths for the two costs fast mode targets:
+validating a Notion database query response (as done for every live issue
+search and mirror sync page) and rendering a JSON response body.
+"""
+
+import argparse
+import os
+import sys
+import timeit
+from typing import Any, Callable, Dict
+from unittest.mock import patch
+from uuid import uuid4
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+os.environ.setdefault(
+    "NOTION_CONFIG", '{"database_id": "benchmark", "column_names": {}}'
+)
+
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from notion.types import NotionFilterDatabaseResponse  # noqa: E402
+from notion.utils import validate_notion_response  # noqa: E402
+from sentry.responses import OrjsonResponse  # noqa: E402
+from sentry.types import SentryIssueResponse  # noqa: E402
+from settings import settings  # noqa: E402
+
+
+def make_property(index: int) -> Dict[str, Any]:
+    return {
+        "id": f"prop{index}",
+        "type": "rich_text",
+        "rich_text": [
+            {
+                "type": "text",
+                "text": {"content": "Lorem ipsum dolor sit amet", "link": None},
+                "annotations": {
+                    "bold": False,
+                    "italic": False,
+                    "strikethrough": False,
+                    "underline": False,
+                    "code": False,
+                    "color": "default",
+                },
+                "plain_text": "Lorem ipsum dolor sit amet",
+                "href": None,
+            }
+        ],
+    }
+
+
+def make_query_response(pages: int, properties: int) -> Dict[str, Any]:
+    return {
+        "object": "list",
+        "results": [
+            {
+                "object": "page",
+                "id": str(uuid4()),
+                "url": "https://www.notion.so/Benchmark-page",
+                "last_edited_time": "2025-01-01T00:00:00.000Z",
+                "properties": {
+                    f"Property {index}": make_property(index)
+                    for index in range(properties)
+                },
+            }
+            for _ in range(pages)
+        ],
+        "next_cursor": None,
+        "has_more": False,
+    }
+
+
+def measure(func: Callable[[], Any], number: int = 2000) -> float:
+    """Best per-call time in microseconds."""
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def report(name: str, default: float, fast: float) -> None:
+    print(
+        f"{name:<28} {default:>10.1f} {fast:>10.1f} "
+        f"{default - fast:>10.1f} {default / fast:>7.1f}x"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--properties", type=int, default=15)
+    args = parser.parse_args()
+
+    print(f"{'per call (us)':<28} {'default':>10} {'fast':>10} {'saved':>10} {'':>8}")
+
+    response = make_query_response(args.pages, args.properties)
+
+    def parse() -> None:
+        validate_notion_response(NotionFilterDatabaseResponse, response)
+
+    default = measure(parse)
+    with patch.object(settings, "fast_serialization", True):
+        fast = measure(parse)
+    report(f"query response ({args.pages} pages)", default, fast)
+
+    body = SentryIssueResponse(
+        webUrl="https://www.notion.so/Benchmark-page", project="", identifier="ISSUE-1"
+    ).model_dump(mode="json")
+    report(
+        "issue response render",
+        measure(lambda: JSONResponse(body)),
+        measure(lambda: OrjsonResponse(body)),
+    )
+
+    options = [
+        {"label": f"Option {index}", "value": str(uuid4()), "default": False}
+        for index in range(10)
+    ]
+    report(
+        "option list render",
+        measure(lambda: JSONResponse(options)),
+        measure(lambda: OrjsonResponse(options)),
+    )
+
+
+if __name__ == "__main__":
+    main()
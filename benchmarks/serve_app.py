@@ -0,0 +1,45 @@
+"""Serve the integration for load testing.
+
+Usage:
+    python benchmarks/serve_app.py [--port 8000] [--fakeredis]
+
+Runs the real FastAPI app with uvicorn, configured from the environment as
+in production. Point ``NOTION_BASE_URL`` at ``benchmarks/fake_notion.py`` to
+keep load off the real Notion API. With ``--fakeredis`` the Redis client is
+replaced by an in-process fake, so no Redis server is needed.
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import uvicorn  # noqa: E402
+
+from main import app  # noqa: E402
+from notion.client import NotionClient  # noqa: E402
+
+
+def use_fakeredis() -> None:
+    from fakeredis import FakeAsyncRedis
+
+    NotionClient.configure(redis=FakeAsyncRedis())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--fakeredis", action="store_true", help="Use an in-process fake Redis"
+    )
+    args = parser.parse_args()
+
+    if args.fakeredis:
+        use_fakeredis()
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Cold start benchmark: import time and time to first response.
+
+Usage:
+    python benchmarks/startup.py [--runs 5] [--output startup.json]
+    python benchmarks/startup.py --max-import-ms 1500 --max-first-response-ms 3000
+
+Each run starts a fresh interpreter. Import time is the cumulative time
+``python -X importtime`` reports for ``import main``, and the heaviest
+modules imported along the way are listed. Time to first response is
+measured from starting ``benchmarks/serve_app.py`` (with an in-process fake
+Redis and warm-up disabled) to the first response from ``/ready``. The
+script exits with status 1 if a median exceeds its ``--max-*`` budget.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BENCHMARKS_DIR, "..", "src")
+
+
+def app_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [SRC_DIR, env.get("PYTHONPATH")]))
+    env.setdefault("NOTION_CONFIG", '{"database_id": "benchmark", "column_names": {}}')
+    env["WARM_UP_ENABLED"] = "false"
+    return env
+
+
+def parse_importtime(output: str) -> Tuple[float, Dict[str, float]]:
+    """Return the total ``import main`` time and the cumulative time per module.
+
+    Times are in milliseconds.
+    """
+    cumulative: Dict[str, float] = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, total_us, name = line[len("import time:") :].split("|")
+        module = name.strip()
+        cumulative[module] = max(cumulative.get(module, 0.0), int(total_us) / 1000)
+    return cumulative["main"], cumulative
+
+
+def measure_import() -> Tuple[float, Dict[str, float]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        env=app_env(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(result.stderr)
+
+
+def measure_first_response(port: int, timeout: float = 30) -> float:
+    url = f"http://127.0.0.1:{port}/ready"
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(BENCHMARKS_DIR, "serve_app.py"), f"--port={port}"]
+        + ["--fakeredis"],
+        env=app_env(),
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if process.poll() is not None:
+                sys.exit(f"App exited with status {process.returncode}")
+            try:
+                httpx.get(url, timeout=1)
+                return (time.perf_counter() - start) * 1000
+            except httpx.HTTPError:
+                time.sleep(0.005)
+        sys.exit(f"App did not respond within {timeout} seconds")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def check_budget(name: str, value: float, budget: Optional[float]) -> bool:
+    if budget is None or value <= budget:
+        return True
+    print(f"{name} of {value:.0f} ms is over the {budget:.0f} ms budget")
+    return False
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8182)
+    parser.add_argument("--top", type=int, default=10, help="Heaviest imports shown")
+    parser.add_argument("--max-import-ms", type=float)
+    parser.add_argument("--max-first-response-ms", type=float)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    import_times: List[float] = []
+    modules: Dict[str, float] = {}
+    for _ in range(args.runs):
+        total, modules = measure_import()
+        import_times.append(total)
+    first_responses = [measure_first_response(args.port) for _ in range(args.runs)]
+
+    import_ms = statistics.median(import_times)
+    first_response_ms = statistics.median(first_responses)
+    print(f"import main:          {import_ms:8.1f} ms (median of {args.runs})")
+    print(
+        f"time to first response: {first_response_ms:6.1f} ms (median of {args.runs})"
+    )
+    print("\nheaviest imports (cumulative ms, last run):")
+    heaviest = sorted(
+        ((ms, module) for module, ms in modules.items() if module != "main"),
+        reverse=True,
+    )[: args.top]
+    for ms, module in heaviest:
+        print(f"  {ms:8.1f}  {module}")
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(
+                {
+                    "import_ms": import_times,
+                    "first_response_ms": first_responses,
+                    "heaviest_imports": {module: ms for ms, module in heaviest},
+                },
+                output_file,
+                indent=2,
+            )
+
+    passed = check_budget("import main", import_ms, args.max_import_ms)
+    passed = (
+        check_budget(
+            "Time to first response", first_response_ms, args.max_first_response_ms
+        )
+        and passed
+    )
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
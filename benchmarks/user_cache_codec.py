@@ -0,0 +1,78 @@
+"""Compare the JSON and binary user cache formats.
+
+Usage:
+    python benchmarks/user_cache_codec.py [--sizes 100 1000 10000]
+
+For each directory size this reports the encoded size and the time to decode
+a cached entry, which is the work done on every cold read of the user list.
+Binary entries build each ``NotionUserResponse`` when it is first read, so
+they are also timed with every user built ("all built").
+"""
+
+import argparse
+import os
+import sys
+import timeit
+from uuid import uuid4
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from notion.cache import decode_cache_entry, encode_cache_entry  # noqa: E402
+from notion.codec import decode_users, encode_users  # noqa: E402
+from notion.types import NotionUserResponse  # noqa: E402
+
+
+def make_users(count: int) -> list[NotionUserResponse]:
+    return [
+        NotionUserResponse(id=uuid4(), name=f"User {i} Example-Name")
+        for i in range(count)
+    ]
+
+
+def decode_json(raw: bytes) -> list[NotionUserResponse]:
+    data, _ = decode_cache_entry(raw)
+    return [NotionUserResponse.model_validate(item) for item in data]
+
+
+def measure(func, number: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    args = parser.parse_args()
+
+    print(
+        f"{'users':>7} {'format':<18} {'bytes':>9} {'decode (ms)':>12} {'speedup':>8}"
+    )
+    for size in args.sizes:
+        users = make_users(size)
+        number = max(1, 20000 // size)
+
+        json_raw = encode_cache_entry(
+            [user.model_dump(mode="json") for user in users], soft_ttl=3600
+        ).encode("utf-8")
+        baseline = measure(lambda json_raw=json_raw: decode_json(json_raw), number)
+        print(
+            f"{size:>7} {'json':<18} {len(json_raw):>9} "
+            f"{baseline * 1000:>12.3f} {1.0:>7.1f}x"
+        )
+
+        for compress in (False, True):
+            raw = encode_users(users, soft_ttl=3600, compress=compress)
+            assert list(decode_users(raw)[0]) == users
+            label = "binary+zlib" if compress else "binary"
+            for suffix, decode in (
+                ("", lambda raw=raw: decode_users(raw)),
+                (" all built", lambda raw=raw: list(decode_users(raw)[0])),
+            ):
+                elapsed = measure(decode, number)
+                print(
+                    f"{size:>7} {label + suffix:<18} {len(raw):>9} "
+                    f"{elapsed * 1000:>12.3f} {baseline / elapsed:>7.1f}x"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,49 @@
-from typing import List, Optional
+import asyncio
+import hmac
+import importlib.util
+import logging
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import (
+    AsyncContextManager,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Type,
+)
 
-from fastapi import Depends, FastAPI
+from fastapi import (
+    APIRouter,
+    Depends,
+    FastAPI,
+    Header,
+    HTTPException,
+    Request,
+    Response,
+)
+from fastapi.responses import JSONResponse, PlainTextResponse
 
+from metrics import MetricsMiddleware, metrics_response
+from notion.cache import LocalCache
 from notion.client import NotionClient
+from notion.scheduler import DeadlineExceeded
+from notion.tenants import tenant_key
+from profiling import (
+    Profiler,
+    ProfilingConfig,
+    ProfilingMiddleware,
+    ProfilingStatus,
+    SlowRequestProfile,
+)
+from sentry.responses import (
+    EncodedResponse,
+    OrjsonResponse,
+    encode_field_responses,
+    field_response,
+)
 from sentry.types import (
     CreateNotionIssueParams,
     GetNotionUsersParams,
@@ -11,21 +52,187 @@ from sentry.types import (
     SentryAsyncFieldResponse,
     SentryIssueResponse,
 )
-from sentry.utils import verify_sentry_signature
+from sentry.utils import SentrySignatureMiddleware
+from settings import settings
+from tracing import (
+    TracingMiddleware,
+    close_tracing,
+    configure_logging,
+    configure_tracing,
+    span,
+)
 
-app = FastAPI(title="Sentry Notion Integration")
+logger = logging.getLogger(__name__)
 
 
-@app.post("/create", response_model=SentryIssueResponse)
-def create_notion_issue(
-    params: CreateNotionIssueParams, _=Depends(verify_sentry_signature)
-):
-    notion_response = NotionClient.create_issue(
-        title=params.fields.title,
-        sentry_issue_url=params.webUrl,
-        description=params.fields.description,
-        owner_id=params.fields.owner_id,
+def default_response_class() -> Type[JSONResponse]:
+    """Render JSON responses with orjson when fast serialization is enabled."""
+    if not settings.fast_serialization:
+        return JSONResponse
+    if importlib.util.find_spec("orjson") is None:
+        logger.warning(
+            "FAST_SERIALIZATION is enabled but orjson is not installed, "
+            "install the 'fast' extra to use it"
+        )
+        return JSONResponse
+    return OrjsonResponse
+
+
+async def warm_up(app: FastAPI) -> None:
+    """Preload Notion data, then mark the app as ready for traffic."""
+    try:
+        await asyncio.wait_for(NotionClient.warm_up(), settings.warm_up_timeout)
+    except asyncio.TimeoutError:
+        # A cold pod still works, it is just slower for its first requests
+        logger.warning(
+            f"Notion warm-up did not finish within {settings.warm_up_timeout}s"
+        )
+    finally:
+        app.state.ready = True
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # Tag application logs with the id of the request they were logged for
+    configure_logging()
+    # Set up on startup, so importing the app opens no files
+    configure_tracing(settings.tracing_exporter, settings.tracing_file)
+    app.state.ready = not settings.warm_up_enabled
+    warm_up_task = (
+        asyncio.create_task(warm_up(app)) if settings.warm_up_enabled else None
+    )
+    yield
+    if warm_up_task is not None:
+        warm_up_task.cancel()
+    # Writes out the spans the exporter still holds
+    await asyncio.to_thread(close_tracing)
+
+
+app = FastAPI(
+    title="Sentry Notion Integration",
+    default_response_class=default_response_class(),
+    lifespan=lifespan,
+)
+
+# Client secrets of the tenants' own Sentry integrations, by tenant name
+tenant_secrets: Dict[str, str] = {
+    tenant.name: tenant.sentry_client_secret for tenant in settings.notion_tenants
+}
+
+# Every request must be signed by Sentry; docs are left open, and metrics
+# and admin routes check their own token
+app.add_middleware(
+    SentrySignatureMiddleware,
+    secret=settings.sentry_notion_integration_client_secret,
+    tenant_secrets=tenant_secrets,
+    replay_cache=LocalCache(
+        max_entries=settings.sentry_replay_cache_max_entries,
+        ttl=settings.sentry_replay_cache_timeout,
     )
+    if settings.sentry_replay_cache_timeout > 0
+    else None,
+    exempt_paths={
+        "/docs",
+        "/docs/oauth2-redirect",
+        "/redoc",
+        "/openapi.json",
+        "/metrics",
+        "/ready",
+    },
+    exempt_prefixes=("/admin/",),
+)
+
+# Slow request capture, off until enabled by settings or the admin endpoint
+profiler = Profiler(
+    enabled=settings.profiling_enabled,
+    sample_rate=settings.profiling_sample_rate,
+    slow_request_threshold=settings.profiling_slow_request_threshold,
+    max_profiles=settings.profiling_max_profiles,
+    interval=settings.profiling_interval,
+)
+app.add_middleware(
+    ProfilingMiddleware,
+    profiler=profiler,
+    paths={"/create", "/search", "/link", "/users"},
+)
+
+
+def check_bearer_token(authorization: Optional[str], token: str, name: str) -> None:
+    """Let through requests carrying ``token`` as a bearer token.
+
+    Routes guarded by a token are hidden while it is not configured.
+    """
+    if not token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, value = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(
+        value.encode("utf-8"), token.encode("utf-8")
+    ):
+        raise HTTPException(
+            status_code=401,
+            detail=f"Invalid {name} token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+def require_metrics_token(authorization: Optional[str] = Header(None)) -> None:
+    check_bearer_token(authorization, settings.metrics_token, "metrics")
+
+
+if settings.metrics_enabled:
+    # Wraps the signature middleware so signature checks are timed too
+    app.add_middleware(MetricsMiddleware)
+
+    # Metrics expose routes, operations and load, and the Sentry signature is
+    # the same for every GET request, so scrapers need their own token
+    @app.get(
+        "/metrics",
+        include_in_schema=False,
+        dependencies=[Depends(require_metrics_token)],
+    )
+    async def metrics() -> Response:
+        return metrics_response()
+
+
+# Outermost, so every other step is recorded under the request's span
+app.add_middleware(TracingMiddleware)
+
+# Encoded /users and /search responses keyed by query and cache generation
+response_cache = LocalCache(
+    max_entries=settings.local_cache_max_entries, ttl=settings.local_cache_timeout
+)
+
+
+@app.exception_handler(DeadlineExceeded)
+async def notion_deadline_exceeded_handler(request: Request, exc: DeadlineExceeded):
+    # Notion is saturated; ask Sentry to retry rather than reporting a failure
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Notion is busy, try again shortly"},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.get("/ready", include_in_schema=False)
+async def ready(request: Request):
+    # Keeps load balancers away until the Notion data is warm
+    if not getattr(request.app.state, "ready", False):
+        return JSONResponse(status_code=503, content={"status": "warming up"})
+    return {"status": "ready"}
+
+
+@app.post("/create", response_model=SentryIssueResponse)
+async def create_notion_issue(request: Request, params: CreateNotionIssueParams):
+    async with installation_workspace(request, params.installationId):
+        notion_response = await NotionClient.create_issue(
+            title=params.fields.title,
+            sentry_issue_url=params.webUrl,
+            description=params.fields.description,
+            owner_id=params.fields.owner_id,
+            project_slug=params.project.slug,
+            # Sentry retries timed out requests, only create one page per issue
+            idempotency_key=f"{params.installationId}:{params.issueId}",
+        )
     return SentryIssueResponse(
         webUrl=notion_response.url,
         project="",  # Intentionally blank as identifier is sufficient
@@ -34,35 +241,40 @@ def create_notion_issue(
 
 
 @app.get("/search", response_model=List[SentryAsyncFieldResponse])
-def search_notion_issues(
-    query: Optional[str] = None, _=Depends(verify_sentry_signature)
+async def search_notion_issues(
+    request: Request,
+    query: Optional[str] = None,
+    projectSlug: Optional[str] = None,
+    installationId: Optional[str] = None,
 ):
-    params = SearchNotionIssuesParams(query=query)
-    issues = NotionClient.search_issues(params.query)
+    params = SearchNotionIssuesParams(
+        query=query, projectSlug=projectSlug, installationId=installationId
+    )
 
-    responses: List[SentryAsyncFieldResponse] = []
-    for issue in issues:
-        for prop in issue.properties.values():
-            if prop["type"] == "title":
-                title_plain_text = (
-                    prop["title"][0]["plain_text"] if prop["title"] else ""
-                )
-                responses.append(
-                    SentryAsyncFieldResponse(
-                        label=title_plain_text, value=str(issue.id)
-                    )
-                )
+    async def load() -> List[SentryAsyncFieldResponse]:
+        issues = await NotionClient.search_issues(
+            params.query, project_slug=params.projectSlug
+        )
+        return [
+            SentryAsyncFieldResponse(label=issue.title, value=str(issue.id))
+            for issue in issues
+        ]
 
-    return responses
+    async with installation_workspace(request, params.installationId):
+        return await cached_field_response(
+            request,
+            f"search:{params.projectSlug or ''}:{params.query or ''}",
+            partial(NotionClient.get_issues_generation, params.projectSlug),
+            load,
+        )
 
 
 @app.post("/link", response_model=SentryIssueResponse)
-def link_notion_issue(
-    params: LinkNotionIssueParams, _=Depends(verify_sentry_signature)
-):
-    NotionClient.add_sentry_link_to_page(params.fields.page_id, params.webUrl)
-
-    page_data = NotionClient.get_page_data(params.fields.page_id)
+async def link_notion_issue(request: Request, params: LinkNotionIssueParams):
+    async with installation_workspace(request, params.installationId):
+        page_data = await NotionClient.add_sentry_link_to_page(
+            params.fields.page_id, params.webUrl
+        )
 
     return SentryIssueResponse(
         webUrl=page_data.url,
@@ -72,9 +284,136 @@ def link_notion_issue(
 
 
 @app.get("/users", response_model=List[SentryAsyncFieldResponse])
-def get_notion_users(query: Optional[str] = None, _=Depends(verify_sentry_signature)):
-    params = GetNotionUsersParams(query=query)
-    users = NotionClient.get_users(params.query)
-    return [
-        SentryAsyncFieldResponse(label=user.name, value=str(user.id)) for user in users
-    ]
+async def get_notion_users(
+    request: Request, query: Optional[str] = None, installationId: Optional[str] = None
+):
+    params = GetNotionUsersParams(query=query, installationId=installationId)
+
+    async def load() -> List[SentryAsyncFieldResponse]:
+        users = await NotionClient.get_users(params.query)
+        return [
+            SentryAsyncFieldResponse(label=user.name, value=str(user.id))
+            for user in users
+        ]
+
+    async with installation_workspace(request, params.installationId):
+        return await cached_field_response(
+            request,
+            f"users:{params.query or ''}",
+            NotionClient.get_users_generation,
+            load,
+        )
+
+
+async def cached_field_response(
+    request: Request,
+    key: str,
+    get_generation: Callable[[], Optional[int]],
+    load: Callable[[], Awaitable[List[SentryAsyncFieldResponse]]],
+) -> Response:
+    """Serve select field options, reusing the encoded body while data is unchanged.
+
+    Options only depend on the query and the cached data they were built
+    from, so the encoded body is kept until the cache generation changes.
+    Options built from uncached data (no generation) are encoded every time.
+    Keys are namespaced by the tenant being served.
+    """
+    key = tenant_key(key)
+    generation = get_generation()
+    encoded: Optional[EncodedResponse] = None
+    if generation is not None:
+        encoded = response_cache.get(f"{key}@{generation}")
+
+    if encoded is None:
+        options = await load()
+        with span("response.encode", options=len(options)):
+            encoded = encode_field_responses(options)
+        # Loading may have filled or replaced the cache, tag with what was used
+        generation = get_generation()
+        if generation is not None:
+            response_cache.set(f"{key}@{generation}", encoded)
+
+    return field_response(encoded, request.headers.get("if-none-match"))
+
+
+def installation_workspace(
+    request: Request, installation_id: Optional[str]
+) -> AsyncContextManager[None]:
+    """Serve a request from its installation's workspace.
+
+    Sentry signs GET requests over their empty body, so only the secret that
+    signed a request ties it to an installation. Installations of a tenant
+    are only served to requests signed with the tenant's own client secret,
+    and other installations to requests signed with the default one.
+    """
+    signed_by = getattr(request.state, "sentry_tenant", None)
+    if NotionClient.tenant_name(installation_id) != signed_by:
+        logger.warning(
+            f"Unauthorized: Installation {installation_id} signed by another secret."
+        )
+        raise HTTPException(status_code=401, detail="Invalid Sentry Signature")
+    return NotionClient.for_installation(installation_id)
+
+
+def require_admin_token(authorization: Optional[str] = Header(None)) -> None:
+    """Let through requests carrying the admin token as a bearer token.
+
+    Admin routes are hidden when no token is configured.
+    """
+    check_bearer_token(authorization, settings.profiling_admin_token, "admin")
+
+
+# Profiles hold stack frames and request paths, so they need more than the
+# Sentry signature, which is the same for every GET request
+admin = APIRouter(
+    prefix="/admin",
+    dependencies=[Depends(require_admin_token)],
+    include_in_schema=False,
+)
+
+PROFILE_EXCLUDE = {"profiles": {"__all__": {"stacks"}}}
+
+
+@admin.get(
+    "/profiling",
+    response_model=ProfilingStatus,
+    response_model_exclude=PROFILE_EXCLUDE,
+)
+async def get_profiling_status():
+    return profiler.status()
+
+
+@admin.post(
+    "/profiling",
+    response_model=ProfilingStatus,
+    response_model_exclude=PROFILE_EXCLUDE,
+)
+async def configure_profiling(config: ProfilingConfig):
+    profiler.configure(config)
+    return profiler.status()
+
+
+@admin.get("/profiling/{profile_id}", response_model=SlowRequestProfile)
+async def get_slow_request_profile(profile_id: int):
+    return _get_profile(profile_id)
+
+
+@admin.get("/profiling/{profile_id}/folded")
+async def download_slow_request_profile(profile_id: int):
+    profile = _get_profile(profile_id)
+    return PlainTextResponse(
+        profile.folded_stacks(),
+        headers={
+            "Content-Disposition": f'attachment; filename="profile-{profile_id}.txt"'
+        },
+    )
+
+
+def _get_profile(profile_id: int) -> SlowRequestProfile:
+    profile = profiler.get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile
+
+
+app.include_router(admin)
@@ -0,0 +1,208 @@
+import asyncio
+import logging
+import math
+import time
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import anyio.to_thread
+from notion_client.errors import HTTPResponseError
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Seconds between event loop lag measurements
+LOOP_LAG_INTERVAL: float = 1.0
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time taken to handle a request, including sending the response",
+    ["method", "route", "status"],
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "Requests currently being handled"
+)
+
+# NotionClient operation the Notion API calls of the current task are made for
+notion_operation: ContextVar[Optional[str]] = ContextVar(
+    "notion_operation", default=None
+)
+
+NOTION_REQUEST_DURATION = Histogram(
+    "notion_request_duration_seconds",
+    "Time taken by a single Notion API call, excluding time queued for its turn",
+    ["operation", "endpoint"],
+)
+NOTION_REQUEST_ERRORS = Counter(
+    "notion_request_errors_total",
+    "Notion API calls that failed, by reason (rate_limited, http_error or other)",
+    ["operation", "endpoint", "reason"],
+)
+NOTION_DEADLINE_EXCEEDED = Counter(
+    "notion_deadline_exceeded_total",
+    "Notion API calls dropped because they could not get their turn in time",
+    ["operation", "endpoint"],
+)
+NOTION_QUEUE_DEPTH = Gauge(
+    "notion_queue_depth", "Notion API calls waiting for the rate limit"
+)
+NOTION_RATE_LIMIT_WAITS = Histogram(
+    "notion_rate_limit_wait_seconds",
+    "Time the shared Notion rate limit asked a call to wait before trying again",
+    ["key"],
+)
+NOTION_RATE_LIMIT_REJECTIONS = Counter(
+    "notion_rate_limit_rejections_total",
+    "Notion calls dropped because the shared rate limit would make them too late",
+    ["key"],
+)
+NOTION_RATE_LIMIT_ERRORS = Counter(
+    "notion_rate_limit_errors_total",
+    "Shared rate limit checks that failed open because Redis was unavailable",
+    ["key"],
+)
+
+CACHE_LOOKUPS = Counter(
+    "notion_cache_lookups_total",
+    "Cache lookups by result (local_hit, redis_hit, stale_hit or miss)",
+    ["key", "result"],
+)
+CACHE_DECODE_FAILURES = Counter(
+    "notion_cache_decode_failures_total",
+    "Cache entries found in Redis that could not be decoded",
+    ["key"],
+)
+
+EVENT_LOOP_LAG = Gauge(
+    "event_loop_lag_seconds",
+    "How late the event loop last woke up a task that was due to run",
+)
+THREADPOOL_BUSY = Gauge(
+    "threadpool_busy_threads", "Worker threads running sync code for the event loop"
+)
+THREADPOOL_SIZE = Gauge(
+    "threadpool_max_threads", "Worker threads available to the event loop"
+)
+
+
+def notion_endpoint_name(method: Callable[..., Awaitable[T]]) -> str:
+    """Name a Notion client method for metric labels, e.g. ``pages.create``."""
+    endpoint = getattr(method, "__self__", None)
+    name = getattr(method, "__name__", None)
+    if endpoint is None or name is None:
+        return "unknown"
+    return f"{type(endpoint).__name__.removesuffix('Endpoint').lower()}.{name}"
+
+
+def current_notion_operation() -> str:
+    """Name the NotionClient operation being run, for metric labels."""
+    return notion_operation.get() or "unknown"
+
+
+async def observe_notion_call(
+    operation: str, endpoint: str, call: Callable[[], Awaitable[T]]
+) -> T:
+    """Run a single Notion API call, recording its latency and any failure."""
+    start = time.perf_counter()
+    try:
+        return await call()
+    except HTTPResponseError as e:
+        reason = "rate_limited" if e.status == 429 else "http_error"
+        NOTION_REQUEST_ERRORS.labels(operation, endpoint, reason).inc()
+        raise
+    except Exception:
+        NOTION_REQUEST_ERRORS.labels(operation, endpoint, "other").inc()
+        raise
+    finally:
+        NOTION_REQUEST_DURATION.labels(operation, endpoint).observe(
+            time.perf_counter() - start
+        )
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording the latency of every HTTP request.
+
+    Requests are labelled with the path template of the route that handled
+    them, so path parameters do not create new series. Requests that never
+    reached a route, such as those rejected for a bad signature, are
+    labelled ``unmatched``.
+
+    The first request also starts a task measuring event loop lag.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self._loop_monitor: Optional[asyncio.Task] = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        self._ensure_loop_monitor()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        HTTP_REQUESTS_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUESTS_IN_PROGRESS.dec()
+            # The router stores the matched route in the shared scope
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.labels(
+                scope["method"], getattr(route, "path", "unmatched"), str(status)
+            ).observe(time.perf_counter() - start)
+
+    def _ensure_loop_monitor(self) -> None:
+        loop = asyncio.get_running_loop()
+        monitor = self._loop_monitor
+        if monitor and not monitor.done() and monitor.get_loop() is loop:
+            return
+        self._loop_monitor = loop.create_task(_monitor_event_loop_lag())
+
+
+async def _monitor_event_loop_lag() -> None:
+    # A busy loop wakes the sleep up late; the delay is the lag
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(LOOP_LAG_INTERVAL)
+        EVENT_LOOP_LAG.set(max(time.perf_counter() - start - LOOP_LAG_INTERVAL, 0.0))
+
+
+def _threadpool_stat(stat: Callable[[anyio.CapacityLimiter], float]) -> float:
+    # The limiter belongs to the running event loop, which only exists while
+    # metrics are collected from within a request
+    try:
+        return stat(anyio.to_thread.current_default_thread_limiter())
+    except Exception:
+        return math.nan
+
+
+THREADPOOL_BUSY.set_function(
+    lambda: _threadpool_stat(lambda limiter: limiter.borrowed_tokens)
+)
+THREADPOOL_SIZE.set_function(
+    lambda: _threadpool_stat(lambda limiter: limiter.total_tokens)
+)
+
+
+def metrics_response() -> Response:
+    """Render every metric in the Prometheus text format."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,120 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class LocalCache:
+    """Bounded in-process cache with per-entry TTL and LRU eviction.
+
+    Sits in front of Redis and holds already-validated objects, so a hit
+    skips both the network round trip and the deserialization work.
+    Values are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries: int, ttl: float) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, Tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+
+        # Evict the least recently used entries once over capacity
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """Drop a single entry, or every entry when no key is given."""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def encode_cache_entry(data: Any, soft_ttl: float) -> str:
+    """Wrap cached data with the time after which it should be refreshed.
+
+    Args:
+        data: The JSON-serializable data to cache
+        soft_ttl: Seconds until the data is considered stale
+
+    Returns:
+        The serialized cache entry
+
+    """
+    return json.dumps({"refresh_at": time.time() + soft_ttl, "data": data})
+
+
+def decode_cache_entry(raw: bytes) -> Tuple[Any, bool]:
+    """Unwrap a cache entry written by ``encode_cache_entry``.
+
+    Entries written before soft expiry existed hold the bare data and are
+    reported as stale so they get rewritten in the current format.
+
+    Args:
+        raw: The serialized cache entry
+
+    Returns:
+        The cached data and whether it is past its soft expiry
+
+    """
+    payload = json.loads(raw.decode("utf-8"))
+    if isinstance(payload, dict) and "refresh_at" in payload:
+        return payload["data"], payload["refresh_at"] <= time.time()
+    return payload, True
+
+
+class SingleFlight:
+    """Coalesces concurrent loads of the same key into a single call.
+
+    The first caller for a key starts the load; callers arriving while it is
+    still in flight wait on the same task and share its result or exception.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, load: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(load())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+
+        # Shield the shared task so one cancelled caller does not cancel
+        # the load for everyone else waiting on it
+        return await asyncio.shield(task)
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._calls
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
@@ -1,60 +1,767 @@
-import json
+import asyncio
+import contextvars
 import logging
-from typing import Any, List, Optional
+import time
+from contextlib import asynccontextmanager
+from functools import partial, wraps
+from itertools import chain
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Coroutine,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+    cast,
+)
 from uuid import UUID
 
-from notion_client import Client
-from redis import Redis
+from notion_client import AsyncClient
+from notion_client.errors import HTTPResponseError
+from pydantic import ValidationError
 
+from metrics import (
+    CACHE_DECODE_FAILURES,
+    CACHE_LOOKUPS,
+    NOTION_DEADLINE_EXCEEDED,
+    NOTION_QUEUE_DEPTH,
+    current_notion_operation,
+    notion_endpoint_name,
+    notion_operation,
+    observe_notion_call,
+)
+from notion.cache import (
+    LocalCache,
+    SingleFlight,
+    decode_cache_entry,
+    encode_cache_entry,
+)
+from notion.codec import (
+    decode_users,
+    encode_users,
+    is_binary_user_cache,
+    user_cache_digest,
+)
+from notion.idempotency import IdempotentCalls
+from notion.mirror import IssueMirror, rank_issues
+from notion.rate_limit import RedisTokenBucket
+from notion.scheduler import DeadlineExceeded, NotionScheduler, Priority
+from notion.tenants import (
+    NotionTenant,
+    NotionTenantPool,
+    current_tenant,
+    tenant_key,
+    tenant_key_prefix,
+)
 from notion.types import (
     CreateNotionIssueResponse,
     GetPageDataResponse,
     NotionCreatePageResponse,
     NotionFilterDatabaseResponse,
+    NotionIssueSummary,
     NotionListUsersResponse,
     NotionRetrieveDatabaseResponse,
     NotionRetrievePageResponse,
     NotionUniqueIdPageProperty,
     NotionUserResponse,
 )
-from notion.utils import initialize_empty_properties
-from settings import settings
+from notion.user_index import UserIndex
+from notion.utils import (
+    initialize_empty_properties,
+    summarize_issue_page,
+    validate_notion_response,
+)
+from profiling import record_notion_call
+from settings import (
+    NotionConfig,
+    NotionTasksDatabaseConfig,
+    NotionTenantConfig,
+    settings,
+)
+from tracing import span
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+
+class _LazyClassAttribute:
+    """Class attribute built by ``factory`` the first time it is read.
+
+    The built value replaces the descriptor on the class, so later reads are
+    plain attribute lookups.
+    """
+
+    def __init__(self, factory: Callable[[Any], Any]) -> None:
+        self.factory = factory
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+
+    def __get__(self, instance: Any, owner: type) -> Any:
+        value = self.factory(owner)
+        setattr(owner, self.name, value)
+        return value
+
+
+def lazy_class_attribute(factory: Callable[[Any], T]) -> T:
+    """Defer building a class attribute until it is first used."""
+    return cast(T, _LazyClassAttribute(factory))
+
+
+def labelled_operation(method: F) -> F:
+    """Label the Notion calls made by a public method with its name.
+
+    Calls made for another operation it runs keep the outermost label, so
+    a link is measured as one ``add_sentry_link_to_page`` operation.
+    """
+
+    @wraps(method)
+    async def run(*args: Any, **kwargs: Any) -> Any:
+        if notion_operation.get() is not None:
+            return await method(*args, **kwargs)
+        token = notion_operation.set(method.__name__)
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            notion_operation.reset(token)
+
+    return cast(F, run)
+
 
 class NotionClient:
     """Client for interacting with the Notion API.
 
     This class provides methods for creating issues, retrieving users,
-    and other Notion-related operations with caching support.
+    and other Notion-related operations with caching support. All methods
+    are coroutines backed by the async Notion and Redis clients, so a single
+    worker can keep many Notion requests in flight at once.
+
+    Calls go to the default workspace from settings, or to the workspace of
+    the tenant selected with ``for_installation``.
     """
 
     # Cache keys
     USER_CACHE_KEY: str = "notion:users:all"
     DATABASE_CACHE_KEY: str = "notion:database"
+    PAGE_CACHE_KEY_PREFIX: str = "notion:page"
+    RATE_LIMIT_KEY: str = "notion:rate_limit"
+    CREATE_ISSUE_KEY_PREFIX: str = "notion:create_issue"
+
+    # Clients are built on first use rather than at import, which keeps cold
+    # starts fast; configure() replaces them
 
     # Notion API client
-    notion = Client(auth=settings.notion_token)
+    notion: AsyncClient = lazy_class_attribute(
+        lambda cls: AsyncClient(
+            auth=settings.notion_token, base_url=settings.notion_base_url
+        )
+    )
 
     # Redis client for caching
-    _redis = Redis(host=settings.redis_host, port=settings.redis_port, db=0)
+    _redis: "Redis" = lazy_class_attribute(lambda cls: cls._create_redis())
+
+    # Notion quota shared with every other replica
+    _rate_limiter: RedisTokenBucket = lazy_class_attribute(
+        lambda cls: cls._create_rate_limiter()
+    )
+
+    # Results of issue creations, so retried requests don't create duplicates
+    _idempotent_creates: IdempotentCalls = lazy_class_attribute(
+        lambda cls: cls._create_idempotent_creates()
+    )
+
+    # Paces every Notion call to stay within the integration rate limit
+    _scheduler: NotionScheduler = lazy_class_attribute(
+        lambda cls: NotionScheduler(
+            rate=settings.notion_requests_per_second,
+            burst=settings.notion_burst,
+            max_retries=settings.notion_max_retries,
+            limiter=cls._rate_limiter
+            if settings.notion_distributed_rate_limit
+            else None,
+        )
+    )
+
+    # In-process cache of validated objects, checked before Redis
+    _local_cache = LocalCache(
+        max_entries=settings.local_cache_max_entries,
+        ttl=settings.local_cache_timeout,
+    )
+
+    # Page identifiers never change once created, so these never expire
+    _page_cache = LocalCache(
+        max_entries=settings.page_cache_max_entries, ttl=float("inf")
+    )
+
+    # Coalesces concurrent cache misses for the same key
+    _single_flight = SingleFlight()
+
+    # Last user index built for each workspace, with a digest of the users it
+    # was built from, so it outlives local cache expiry while they don't change
+    _user_indexes: Dict[str, Tuple[bytes, UserIndex]] = {}
+
+    # Local copies of the issues databases used to answer searches, and the
+    # syncs in flight for them, by database ID
+    _issue_mirrors: Dict[str, IssueMirror] = {}
+    _issue_mirror_syncs: Dict[str, asyncio.Task] = {}
+
+    # Workspaces of the tenants serving other Sentry installations
+    _tenants: NotionTenantPool = lazy_class_attribute(
+        lambda cls: NotionTenantPool(
+            settings.notion_tenants,
+            max_tenants=settings.notion_tenant_pool_size,
+            build=cls._create_tenant,
+            evict=cls._close_tenant,
+        )
+    )
+
+    # Strong references to fire-and-forget tasks so they are not collected
+    _background_tasks: Set[asyncio.Task] = set()
 
     ###############################
     # Public API methods
     ###############################
 
     @classmethod
-    def create_issue(
+    def configure(
+        cls, *, notion: Optional[AsyncClient] = None, redis: Optional["Redis"] = None
+    ) -> None:
+        """Use the given clients instead of building them from settings.
+
+        Anything built on the previous Redis client is rebuilt on the new one.
+
+        Args:
+            notion: The Notion API client to use
+            redis: The Redis client to use for caching and rate limiting
+
+        """
+        if notion is not None:
+            cls.notion = notion
+        if redis is not None:
+            cls._redis = redis
+            cls._rate_limiter = cls._create_rate_limiter()
+            cls._idempotent_creates = cls._create_idempotent_creates()
+            if cls._scheduler.limiter is not None:
+                cls._scheduler.limiter = cls._rate_limiter
+            for tenant in cls._tenants:
+                if tenant.scheduler.limiter is not None:
+                    tenant.scheduler.limiter = cls._create_tenant_rate_limiter(
+                        tenant.config
+                    )
+
+    @classmethod
+    def tenant_name(cls, installation_id: Optional[str]) -> Optional[str]:
+        """The name of the tenant serving an installation, None for the default."""
+        config = cls._tenants.config_for(installation_id)
+        return None if config is None else config.name
+
+    @classmethod
+    @asynccontextmanager
+    async def for_installation(
+        cls, installation_id: Optional[str]
+    ) -> AsyncIterator[None]:
+        """Send the Notion calls made in the block to an installation's workspace.
+
+        Installations that belong to no tenant use the default workspace.
+
+        Args:
+            installation_id: The Sentry installation the request came from
+
+        """
+        config = cls._tenants.config_for(installation_id)
+        if config is None:
+            yield
+            return
+
+        tenant = cls._tenants.acquire(config)
+        token = current_tenant.set(tenant)
+        try:
+            yield
+        finally:
+            current_tenant.reset(token)
+            cls._tenants.release(tenant)
+
+    @classmethod
+    @labelled_operation
+    async def create_issue(
         cls,
         *,
         title: str,
         sentry_issue_url: str,
         description: Optional[str] = None,
         owner_id: Optional[str] = None,
+        project_slug: Optional[str] = None,
+        idempotency_key: Optional[str] = None,
     ) -> CreateNotionIssueResponse:
-        database = cls._retrieve_database()
-        property_schema = database.properties
+        """Create an issue page in the Notion database of a Sentry project.
+
+        Args:
+            title: The issue title
+            sentry_issue_url: Link to the Sentry issue
+            description: Text for the page body
+            owner_id: Notion user to assign the issue to
+            project_slug: The Sentry project the issue belongs to, which
+                picks the database the page is created in
+            idempotency_key: Identifies the request; repeated requests with
+                the same key get the first result instead of a new page
+
+        Returns:
+            The URL and identifier of the created issue
+
+        """
+        create = partial(
+            cls._create_issue,
+            database=cls._notion_config().database_for_project(project_slug),
+            title=title,
+            sentry_issue_url=sentry_issue_url,
+            description=description,
+            owner_id=owner_id,
+        )
+        if idempotency_key is None:
+            return await create()
+        return await cls._idempotent_creates.run(
+            idempotency_key, create, CreateNotionIssueResponse
+        )
+
+    @classmethod
+    @labelled_operation
+    async def get_users(
+        cls, query: Optional[str] = None, limit: int = 10
+    ) -> List[NotionUserResponse]:
+        # Get the indexed users from cache or API
+        user_index = await cls._get_user_index()
+
+        # Filter users by query (case and accent insensitive) and limit results
+        return user_index.search(query, limit)
+
+    @classmethod
+    def get_users_generation(cls) -> Optional[int]:
+        """Identify the user directory loaded in this process.
+
+        Returns:
+            A value that changes whenever the directory is reloaded, or None
+            if no directory is loaded
+
+        """
+        user_index = cls._local_cache.get(tenant_key(cls.USER_CACHE_KEY))
+        return user_index.generation if user_index is not None else None
+
+    @classmethod
+    @labelled_operation
+    async def search_issues(
+        cls,
+        query: Optional[str] = None,
+        limit: int = 10,
+        project_slug: Optional[str] = None,
+    ) -> List[NotionIssueSummary]:
+        """Search the issues databases of a Sentry project by title.
+
+        The databases are searched concurrently for their most relevant
+        matches, which are merged by relevance. Databases that have not
+        answered by the interactive timeout are left out, unless none of
+        them answered.
+
+        Args:
+            query: Text the issue titles contain, or None for recent issues
+            limit: The maximum number of issues returned
+            project_slug: The Sentry project searched from, or None to
+                search every database
+
+        Returns:
+            The matching issues, most relevant first
+
+        """
+        databases = cls._notion_config().databases_for_project(project_slug)
+        if settings.issue_mirror_enabled:
+            cls._keep_issue_mirrors_fresh(databases)
+        if len(databases) == 1:
+            return await cls._search_database(databases[0], query, limit)
+
+        if settings.issue_mirror_enabled:
+            mirrors = [cls._get_issue_mirror(database) for database in databases]
+            if all(mirror.is_ready for mirror in mirrors):
+                # Mirrors answer at once, so there is nothing to wait for
+                return rank_issues(
+                    chain.from_iterable(
+                        mirror.search(query, limit) for mirror in mirrors
+                    ),
+                    query,
+                    limit,
+                )
+
+        searches = [
+            asyncio.create_task(cls._search_database(database, query, limit))
+            for database in databases
+        ]
+        try:
+            _, pending = await asyncio.wait(
+                searches, timeout=settings.notion_interactive_timeout
+            )
+        finally:
+            # Also stops the searches if the caller is cancelled
+            for search in searches:
+                search.cancel()
+
+        results: List[List[NotionIssueSummary]] = []
+        errors: List[BaseException] = []
+        for search in searches:
+            if search in pending:
+                continue
+            error = search.exception()
+            if error is not None:
+                errors.append(error)
+            else:
+                results.append(search.result())
+
+        if not results:
+            if errors:
+                raise errors[0]
+            raise DeadlineExceeded("No Notion database answered the search in time")
+        if len(results) < len(databases):
+            logger.warning(
+                f"Searched {len(results)} of {len(databases)} Notion databases"
+            )
+        return rank_issues(chain.from_iterable(results), query, limit)
+
+    @classmethod
+    def get_issues_generation(cls, project_slug: Optional[str] = None) -> Optional[int]:
+        """Identify the issue mirror contents searches are answered from.
+
+        Args:
+            project_slug: The Sentry project searched from, or None for
+                every database
+
+        Returns:
+            A value that changes whenever a sync changes one of the searched
+            mirrors, or None if searches go to Notion directly
+
+        """
+        if not settings.issue_mirror_enabled:
+            return None
+
+        databases = cls._notion_config().databases_for_project(project_slug)
+        mirrors = [cls._get_issue_mirror(database) for database in databases]
+        if not all(mirror.is_ready for mirror in mirrors):
+            return None
+
+        # Callers may skip search_issues, so keep the mirrors syncing here too
+        cls._keep_issue_mirrors_fresh(databases)
+        # Generations only grow, so their sum changes whenever one of them does
+        return sum(mirror.generation for mirror in mirrors)
+
+    @classmethod
+    @labelled_operation
+    async def sync_issue_mirror(
+        cls, database: Optional[NotionTasksDatabaseConfig] = None
+    ) -> None:
+        """Bring the local issue mirrors up to date with the Notion databases.
+
+        Only pages edited since the last sync are fetched, except when a
+        periodic full sync is due.
+
+        Args:
+            database: The database whose mirror is synced, or None to sync
+                every database concurrently
+
+        """
+        if database is None:
+            await asyncio.gather(
+                *(
+                    cls.sync_issue_mirror(database)
+                    for database in cls._notion_config().databases
+                )
+            )
+            return
+
+        mirror = cls._get_issue_mirror(database)
+        full_sync = mirror.needs_full_sync()
+
+        params: dict[str, Any] = {
+            "page_size": 100,
+            "sorts": [{"timestamp": "last_edited_time", "direction": "ascending"}],
+        }
+        if not full_sync and mirror.high_water_mark:
+            # Notion timestamps are truncated to the minute, so re-fetching
+            # pages edited at the high-water mark itself is intentional
+            params["filter"] = {
+                "timestamp": "last_edited_time",
+                "last_edited_time": {"on_or_after": mirror.high_water_mark.isoformat()},
+            }
+
+        issues: List[NotionIssueSummary] = []
+        start_cursor: Optional[str] = None
+        has_more: bool = True
+
+        # Use cursor pagination to fetch every matching page
+        while has_more:
+            if start_cursor:
+                params["start_cursor"] = start_cursor
+
+            response = validate_notion_response(
+                NotionFilterDatabaseResponse,
+                await cls._call(
+                    Priority.BACKGROUND,
+                    cls._notion().databases.query,
+                    database_id=database.database_id,
+                    **params,
+                ),
+            )
+            issues.extend(
+                summarize_issue_page(page, database.column_names)
+                for page in response.results
+            )
+
+            # Check if there are more pages
+            if response.next_cursor:
+                start_cursor = response.next_cursor
+            else:
+                has_more = False
+
+        if full_sync:
+            changed = mirror.replace(issues)
+        else:
+            changed = mirror.upsert(issues)
+        # Pages the mirror already had unchanged were cached when it got them
+        cls._remember_issues(changed)
+
+    @classmethod
+    @labelled_operation
+    async def get_page_data(cls, page_id: UUID) -> GetPageDataResponse:
+        # Identifiers never change, so any page seen before is served from cache
+        cached_page = await cls._get_cached_page_data(page_id)
+        if cached_page is not None:
+            return cached_page
+
+        try:
+            raw_response = await cls._call(
+                Priority.WRITE, cls._notion().pages.retrieve, page_id=str(page_id)
+            )
+        except Exception as e:
+            logger.error(f"Failed to get Notion page data: {e}")
+            raise
+
+        retrieve_response = validate_notion_response(
+            NotionRetrievePageResponse, raw_response
+        )
+
+        id_columns = cls._id_columns()
+        page_response = cls._parse_page_data(
+            retrieve_response.url, retrieve_response.properties, id_columns
+        )
+        if page_response is None:
+            columns = " or ".join(f"'{column}'" for column in id_columns)
+            raise ValueError(
+                f"Notion page {page_id} has no unique ID in the {columns} column"
+            )
+
+        cls._remember_pages({page_id: page_response})
+        return page_response
+
+    @classmethod
+    @labelled_operation
+    async def add_sentry_link_to_page(
+        cls, page_id: UUID, url: str
+    ) -> GetPageDataResponse:
+        sentry_url_column = await cls._sentry_url_column(page_id)
+        try:
+            raw_response = await cls._call(
+                Priority.WRITE,
+                cls._notion().pages.update,
+                page_id=str(page_id),
+                properties={sentry_url_column: {"url": url}},
+            )
+        except Exception as e:
+            logger.error(f"Failed to add Sentry link to Notion page: {e}")
+            raise
+
+        # The update response holds the full updated page, so only retrieve
+        # the page if the identifier is missing from it
+        update_response = validate_notion_response(
+            NotionRetrievePageResponse, raw_response
+        )
+        page_data = cls._parse_page_data(
+            update_response.url, update_response.properties, cls._id_columns()
+        )
+        if page_data is None:
+            page_data = await cls.get_page_data(page_id)
+        else:
+            cls._remember_pages({page_id: page_data})
+        return page_data
+
+    @classmethod
+    async def invalidate_cache(cls, key: Optional[str] = None) -> None:
+        """Drop cached entries from both the in-process cache and Redis.
+
+        Args:
+            key: The cache key to invalidate, or None to invalidate every key
+        """
+        keys = (
+            [tenant_key(key)]
+            if key
+            else [tenant_key(cls.USER_CACHE_KEY)]
+            + [
+                cls._database_cache_key(database.database_id)
+                for database in cls._notion_config().databases
+            ]
+        )
+        for cache_key in keys:
+            cls._local_cache.invalidate(cache_key)
+            cls._user_indexes.pop(cache_key, None)
+        await cls._redis.delete(*keys)
+
+    @classmethod
+    @labelled_operation
+    async def warm_up(cls) -> None:
+        """Load the database schemas, user directory and recent issues.
+
+        The loads run concurrently. A failed load is logged and left to be
+        retried by the first request that needs it.
+        """
+        databases = cls._notion_config().databases
+        loads: List[Awaitable[Any]] = [cls._get_user_index()]
+        names = ["user directory"]
+        for database in databases:
+            loads.append(cls._retrieve_database(database.database_id))
+            names.append(f"database schema of {database.database_id}")
+
+        if settings.issue_mirror_enabled:
+            for database in databases:
+                # Shares the sync with any search arriving in the meantime
+                sync = cls._schedule_issue_mirror_sync(database)
+                loads.append(asyncio.shield(sync))
+                names.append(f"issues of {database.database_id}")
+        else:
+            # Searches go to Notion, but recent issues can fill the page cache
+            loads.append(cls.search_issues())
+            names.append("recent issues")
+
+        results = await asyncio.gather(*loads, return_exceptions=True)
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to warm up Notion {name}: {result}")
+
+    ###############################
+    # Private helper methods
+    ###############################
+
+    @classmethod
+    def _notion(cls) -> AsyncClient:
+        tenant = current_tenant.get()
+        return cls.notion if tenant is None else tenant.notion
+
+    @staticmethod
+    def _notion_config() -> NotionConfig:
+        tenant = current_tenant.get()
+        return settings.notion_config if tenant is None else tenant.config.notion_config
+
+    @classmethod
+    def _current_scheduler(cls) -> NotionScheduler:
+        tenant = current_tenant.get()
+        return cls._scheduler if tenant is None else tenant.scheduler
+
+    @classmethod
+    def _mirrors(cls) -> Dict[str, IssueMirror]:
+        tenant = current_tenant.get()
+        return cls._issue_mirrors if tenant is None else tenant.issue_mirrors
+
+    @classmethod
+    def _mirror_syncs(cls) -> Dict[str, asyncio.Task]:
+        tenant = current_tenant.get()
+        return cls._issue_mirror_syncs if tenant is None else tenant.issue_mirror_syncs
+
+    @classmethod
+    def _create_tenant(cls, config: NotionTenantConfig) -> NotionTenant:
+        # Each tenant has its own Notion integration and so its own quota
+        return NotionTenant(
+            config,
+            notion=AsyncClient(
+                auth=config.notion_token, base_url=settings.notion_base_url
+            ),
+            scheduler=NotionScheduler(
+                rate=config.requests_per_second or settings.notion_requests_per_second,
+                burst=config.burst or settings.notion_burst,
+                max_retries=settings.notion_max_retries,
+                limiter=cls._create_tenant_rate_limiter(config)
+                if settings.notion_distributed_rate_limit
+                else None,
+            ),
+        )
+
+    @classmethod
+    def _create_tenant_rate_limiter(
+        cls, config: NotionTenantConfig
+    ) -> RedisTokenBucket:
+        return RedisTokenBucket(
+            cls._redis,
+            key=f"{tenant_key_prefix(config.name)}{cls.RATE_LIMIT_KEY}",
+            rate=config.requests_per_second or settings.notion_requests_per_second,
+            burst=config.burst or settings.notion_burst,
+        )
+
+    @classmethod
+    def _close_tenant(cls, tenant: NotionTenant) -> None:
+        cls._user_indexes.pop(f"{tenant.key_prefix}{cls.USER_CACHE_KEY}", None)
+        cls._run_in_background(cls._close_tenant_client(tenant))
+
+    @staticmethod
+    async def _close_tenant_client(tenant: NotionTenant) -> None:
+        try:
+            await tenant.aclose()
+        except Exception as e:
+            logger.warning(f"Failed to close Notion client of {tenant.name}: {e}")
+
+    @staticmethod
+    def _create_redis() -> "Redis":
+        # Imported here, the client library is slow to import
+        from redis.asyncio import Redis
+
+        return Redis(host=settings.redis_host, port=settings.redis_port, db=0)
+
+    @classmethod
+    def _create_rate_limiter(cls) -> RedisTokenBucket:
+        return RedisTokenBucket(
+            cls._redis,
+            key=cls.RATE_LIMIT_KEY,
+            rate=settings.notion_requests_per_second,
+            burst=settings.notion_burst,
+        )
+
+    @classmethod
+    def _create_idempotent_creates(cls) -> IdempotentCalls:
+        # A creation may queue for the database schema and the page create
+        return IdempotentCalls(
+            cls._redis,
+            prefix=cls.CREATE_ISSUE_KEY_PREFIX,
+            ttl=settings.create_issue_idempotency_ttl,
+            pending_timeout=3 * settings.notion_write_timeout,
+        )
+
+    @classmethod
+    async def _create_issue(
+        cls,
+        *,
+        database: NotionTasksDatabaseConfig,
+        title: str,
+        sentry_issue_url: str,
+        description: Optional[str] = None,
+        owner_id: Optional[str] = None,
+    ) -> CreateNotionIssueResponse:
+        schema = await cls._retrieve_database(database.database_id)
+
+        property_schema = schema.properties
 
         # Initialize properties with empty values
         properties_object = initialize_empty_properties(property_schema)
@@ -63,22 +770,22 @@ class NotionClient:
         properties_object["title"] = {
             "title": [{"type": "text", "text": {"content": title}}]
         }
-        properties_object[settings.notion_config.column_names.sentry_url] = {
-            "url": sentry_issue_url
-        }
+        properties_object[database.column_names.sentry_url] = {"url": sentry_issue_url}
 
         # Set the assignee property if owner_id is provided
         if owner_id:
-            properties_object[settings.notion_config.column_names.assignee] = {
+            properties_object[database.column_names.assignee] = {
                 "people": [{"id": owner_id}]
             }
 
         # Create the page in Notion
         try:
-            raw_response = cls.notion.pages.create(
+            raw_response = await cls._call(
+                Priority.WRITE,
+                cls._notion().pages.create,
                 parent={
                     "type": "database_id",
-                    "database_id": settings.notion_config.database_id,
+                    "database_id": database.database_id,
                 },
                 properties=properties_object,
                 children=[
@@ -101,34 +808,249 @@ class NotionClient:
             logger.error(f"Failed to create Notion issue: {e}")
             raise
 
-        response = NotionCreatePageResponse.model_validate(raw_response)
-        page_data = cls.get_page_data(response.id)
+        response = validate_notion_response(NotionCreatePageResponse, raw_response)
+
+        # The create response already holds the page properties, so only
+        # retrieve the page if the identifier is missing from it
+        page_data = cls._parse_page_data(
+            response.url, response.properties, [database.column_names.id]
+        )
+        if page_data is None:
+            page_data = await cls.get_page_data(response.id)
+        else:
+            cls._remember_pages({response.id: page_data})
+
+        if settings.issue_mirror_enabled:
+            # Searches find the new issue without waiting for the next sync
+            page = NotionRetrievePageResponse(
+                id=response.id,
+                url=response.url,
+                properties=response.properties,
+                last_edited_time=response.last_edited_time,
+            )
+            issue = summarize_issue_page(page, database.column_names)
+            cls._get_issue_mirror(database).add(
+                [issue.model_copy(update={"identifier": page_data.identifier})]
+            )
 
         return CreateNotionIssueResponse(
             url=page_data.url,
             issue_id=page_data.identifier,
         )
 
+    @staticmethod
+    def _parse_page_data(
+        url: str, properties: dict[str, dict[str, Any]], id_columns: Iterable[str]
+    ) -> Optional[GetPageDataResponse]:
+        # The first of the given columns holding a unique ID identifies the page
+        for id_column in id_columns:
+            id_property = properties.get(id_column)
+            if id_property is None:
+                continue
+
+            try:
+                unique_property = NotionUniqueIdPageProperty.model_validate(id_property)
+            except ValidationError:
+                continue
+
+            unique_id = unique_property.unique_id
+            return GetPageDataResponse(
+                identifier=f"{unique_id.prefix}-{unique_id.number}", url=url
+            )
+        return None
+
     @classmethod
-    def get_users(
-        cls, query: Optional[str] = None, limit: int = 10
-    ) -> List[NotionUserResponse]:
-        # Get all users from cache or API
-        all_users = cls._get_and_cache_users()
+    def _id_columns(cls) -> List[str]:
+        # Databases usually share their column names, so this is often one
+        return list(
+            dict.fromkeys(
+                database.column_names.id for database in cls._notion_config().databases
+            )
+        )
+
+    @classmethod
+    async def _sentry_url_column(cls, page_id: UUID) -> str:
+        databases = cls._notion_config().databases
+        columns = {database.column_names.sentry_url for database in databases}
+        if len(columns) == 1:
+            return databases[0].column_names.sentry_url
 
-        # If no query, return limited number of users
-        if not query:
-            return all_users[:limit]
+        # The databases name the column differently, so find the page's one
+        for database in databases:
+            mirror = cls._mirrors().get(database.database_id)
+            if mirror is not None and page_id in mirror:
+                return database.column_names.sentry_url
 
-        # Filter users by query (case-insensitive) and limit results
-        query = query.lower()
-        filtered_users = [user for user in all_users if query in user.name.lower()]
-        return filtered_users[:limit]
+        try:
+            raw_response = await cls._call(
+                Priority.WRITE, cls._notion().pages.retrieve, page_id=str(page_id)
+            )
+        except Exception as e:
+            logger.error(f"Failed to get Notion page data: {e}")
+            raise
+
+        page = validate_notion_response(NotionRetrievePageResponse, raw_response)
+        parent_id = page.parent.database_id if page.parent else None
+        for database in databases:
+            if parent_id and _same_notion_id(database.database_id, parent_id):
+                return database.column_names.sentry_url
+        raise ValueError(f"Notion page {page_id} is not in a configured database")
 
     @classmethod
-    def search_issues(
-        cls, query: Optional[str] = None, limit: int = 10
-    ) -> list[NotionRetrievePageResponse]:
+    async def _call(
+        cls, priority: Priority, method: Callable[..., Awaitable[Any]], **kwargs: Any
+    ) -> Any:
+        # Every Notion request goes through the scheduler
+        timeouts = {
+            Priority.INTERACTIVE: settings.notion_interactive_timeout,
+            Priority.WRITE: settings.notion_write_timeout,
+            Priority.BACKGROUND: settings.notion_background_timeout,
+        }
+        operation = current_notion_operation()
+        endpoint = notion_endpoint_name(method)
+        with span(
+            f"notion.{endpoint}", operation=operation, priority=priority.name.lower()
+        ):
+            try:
+                return await cls._current_scheduler().submit(
+                    partial(cls._send, operation, endpoint, partial(method, **kwargs)),
+                    priority=priority,
+                    timeout=timeouts[priority],
+                )
+            except DeadlineExceeded:
+                NOTION_DEADLINE_EXCEEDED.labels(operation, endpoint).inc()
+                raise
+
+    @staticmethod
+    async def _send(
+        operation: str, endpoint: str, call: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        # One attempt at a Notion request, the scheduler may retry it
+        with span("notion.request", endpoint=endpoint) as request_span:
+            status: Optional[int] = None
+            start = time.perf_counter()
+            try:
+                response = await observe_notion_call(operation, endpoint, call)
+                status = 200
+                return response
+            except HTTPResponseError as e:
+                status = e.status
+                raise
+            finally:
+                request_span.set_attribute("http.status_code", status)
+                record_notion_call(endpoint, status, time.perf_counter() - start)
+
+    @classmethod
+    def _page_cache_key(cls, page_id: UUID) -> str:
+        # Namespaced by the ID columns so changing one invalidates every entry
+        id_columns = ",".join(cls._id_columns())
+        return tenant_key(f"{cls.PAGE_CACHE_KEY_PREFIX}:{id_columns}:{page_id}")
+
+    @classmethod
+    async def _get_cached_page_data(
+        cls, page_id: UUID
+    ) -> Optional[GetPageDataResponse]:
+        key = cls._page_cache_key(page_id)
+        local_page = cls._page_cache.get(key)
+        if local_page is not None:
+            return local_page
+
+        try:
+            with span("cache.get", key=cls.PAGE_CACHE_KEY_PREFIX):
+                cached_data = await cls._redis.get(key)
+            if not cached_data:
+                return None
+            with span("cache.decode", key=cls.PAGE_CACHE_KEY_PREFIX):
+                page_data = GetPageDataResponse.model_validate_json(cached_data)
+        except Exception as e:
+            # The page cache is an optimization, so fall back to Notion
+            logger.warning(f"Failed to read cached Notion page data: {e}")
+            return None
+
+        cls._page_cache.set(key, page_data)
+        return page_data
+
+    @classmethod
+    def _remember_issues(cls, issues: Iterable[NotionIssueSummary]) -> None:
+        cls._remember_pages(
+            {
+                issue.id: GetPageDataResponse(
+                    identifier=issue.identifier, url=issue.url
+                )
+                for issue in issues
+                if issue.identifier
+            }
+        )
+
+    @classmethod
+    def _remember_pages(cls, pages: Dict[UUID, GetPageDataResponse]) -> None:
+        if not pages:
+            return
+
+        mapping: Dict[str, str] = {}
+        for page_id, page_data in pages.items():
+            key = cls._page_cache_key(page_id)
+            cls._page_cache.set(key, page_data)
+            mapping[key] = page_data.model_dump_json()
+
+        # Write through to Redis without holding up the caller
+        cls._run_in_background(cls._store_pages(mapping))
+
+    @classmethod
+    async def _store_pages(cls, mapping: Dict[str, str]) -> None:
+        # Expire entries so keys left behind by a renamed ID column go away
+        try:
+            pipe = cls._redis.pipeline(transaction=False)
+            for key, value in mapping.items():
+                pipe.set(key, value, ex=settings.cache_timeout)
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to cache Notion page data: {e}")
+
+    @classmethod
+    def _run_in_background(
+        cls, coroutine: Coroutine[Any, Any, Any], operation: Optional[str] = None
+    ) -> asyncio.Task:
+        # Labelled on its own rather than by the operation that started it
+        context = contextvars.copy_context()
+        context.run(notion_operation.set, operation)
+        task = asyncio.create_task(coroutine, context=context)
+        cls._background_tasks.add(task)
+        task.add_done_callback(cls._background_tasks.discard)
+
+        tenant = current_tenant.get()
+        if tenant is not None:
+            # Keeps the tenant's connections open until the task is done
+            tenant.in_use += 1
+            task.add_done_callback(lambda _: cls._tenants.release(tenant))
+        return task
+
+    @classmethod
+    def _schedule_refresh(cls, key: str, fetch: Callable[[], Awaitable[Any]]) -> None:
+        refresh_key = f"refresh:{key}"
+        if cls._single_flight.in_flight(refresh_key):
+            return
+        cls._run_in_background(cls._refresh(refresh_key, fetch), "refresh_cache")
+
+    @classmethod
+    async def _refresh(
+        cls, refresh_key: str, fetch: Callable[[], Awaitable[Any]]
+    ) -> None:
+        try:
+            await cls._single_flight.do(refresh_key, fetch)
+        except Exception as e:
+            logger.error(f"Failed to refresh {refresh_key}: {e}")
+
+    @classmethod
+    async def _search_database(
+        cls, database: NotionTasksDatabaseConfig, query: Optional[str], limit: int
+    ) -> List[NotionIssueSummary]:
+        if settings.issue_mirror_enabled:
+            mirror = cls._get_issue_mirror(database)
+            if mirror.is_ready:
+                return mirror.search(query, limit)
+
+        # Fall back to querying Notion until the mirror is ready
         params: dict[str, Any] = {"page_size": limit}
         if query:
             params["filter"] = {
@@ -137,95 +1059,194 @@ class NotionClient:
             }
 
         try:
-            raw_response = cls.notion.databases.query(
-                database_id=settings.notion_config.database_id,
+            raw_response = await cls._call(
+                Priority.INTERACTIVE,
+                cls._notion().databases.query,
+                database_id=database.database_id,
                 **params,
             )
         except Exception as e:
             logger.error(f"Failed to search Notion issues: {e}")
             raise
 
-        response = NotionFilterDatabaseResponse.model_validate(raw_response)
-        return [
-            NotionRetrievePageResponse.model_validate(page) for page in response.results
+        response = validate_notion_response(NotionFilterDatabaseResponse, raw_response)
+        issues = [
+            summarize_issue_page(page, database.column_names)
+            for page in response.results
         ]
+        cls._remember_issues(issues)
+        # Notion returns the matches it finds first, so rank them like a mirror
+        return rank_issues(issues, query, limit)
 
     @classmethod
-    def get_page_data(cls, page_id: UUID) -> GetPageDataResponse:
-        try:
-            raw_response = cls.notion.pages.retrieve(page_id=str(page_id))
-        except Exception as e:
-            logger.error(f"Failed to get Notion page data: {e}")
-            raise
+    def _get_issue_mirror(cls, database: NotionTasksDatabaseConfig) -> IssueMirror:
+        mirror = cls._mirrors().get(database.database_id)
+        if mirror is None:
+            mirror = IssueMirror(
+                sync_interval=settings.issue_mirror_sync_interval,
+                full_sync_interval=settings.issue_mirror_full_sync_interval,
+            )
+            cls._mirrors()[database.database_id] = mirror
+        return mirror
 
-        retrieve_response = NotionRetrievePageResponse.model_validate(raw_response)
+    @classmethod
+    def _keep_issue_mirrors_fresh(
+        cls, databases: Iterable[NotionTasksDatabaseConfig]
+    ) -> None:
+        # Sync in the background so the request never waits on it
+        for database in databases:
+            if cls._get_issue_mirror(database).is_stale():
+                cls._schedule_issue_mirror_sync(database)
 
-        page_response = GetPageDataResponse(identifier="", url=retrieve_response.url)
-        id_property = retrieve_response.properties[
-            settings.notion_config.column_names.id
-        ]
-        unique_property = NotionUniqueIdPageProperty.model_validate(id_property)
-        page_response.identifier = (
-            f"{unique_property.unique_id.prefix}-{unique_property.unique_id.number}"
-        )
-        return page_response
+    @classmethod
+    def _schedule_issue_mirror_sync(
+        cls, database: NotionTasksDatabaseConfig
+    ) -> asyncio.Task:
+        # Only one sync per database may be in flight at a time
+        syncs = cls._mirror_syncs()
+        sync = syncs.get(database.database_id)
+        if sync is None or sync.done():
+            sync = cls._run_in_background(cls._sync_issue_mirror(database))
+            syncs[database.database_id] = sync
+        return sync
 
     @classmethod
-    def add_sentry_link_to_page(cls, page_id: UUID, url: str) -> None:
+    async def _sync_issue_mirror(cls, database: NotionTasksDatabaseConfig) -> None:
         try:
-            cls.notion.pages.update(
-                page_id=str(page_id),
-                properties={
-                    settings.notion_config.column_names.sentry_url: {"url": url}
-                },
-            )
+            await cls.sync_issue_mirror(database)
         except Exception as e:
-            logger.error(f"Failed to add Sentry link to Notion page: {e}")
-            raise
+            logger.error(
+                f"Failed to sync Notion issue mirror of {database.database_id}: {e}"
+            )
 
-    ###############################
-    # Private helper methods
-    ###############################
+    @classmethod
+    def _database_cache_key(cls, database_id: str) -> str:
+        return tenant_key(f"{cls.DATABASE_CACHE_KEY}:{database_id}")
+
+    @classmethod
+    async def _retrieve_database(
+        cls, database_id: str
+    ) -> NotionRetrieveDatabaseResponse:
+        # Try the in-process cache first
+        key = cls._database_cache_key(database_id)
+        local_database = cls._local_cache.get(key)
+        if local_database is not None:
+            CACHE_LOOKUPS.labels(cls.DATABASE_CACHE_KEY, "local_hit").inc()
+            return local_database
+
+        # Concurrent misses share a single load
+        return await cls._single_flight.do(
+            key, partial(cls._load_database, database_id)
+        )
 
     @classmethod
-    def _retrieve_database(cls) -> NotionRetrieveDatabaseResponse:
-        # Try to get from cache first
-        cached_data = cls._redis.get(cls.DATABASE_CACHE_KEY)
+    async def _load_database(cls, database_id: str) -> NotionRetrieveDatabaseResponse:
+        # Try Redis before going to the API
+        key = cls._database_cache_key(database_id)
+        with span("cache.get", key=cls.DATABASE_CACHE_KEY):
+            # The client doesn't decode responses, so values are bytes
+            cached_data = cast(Optional[bytes], await cls._redis.get(key))
         if cached_data:
             try:
-                data = json.loads(cached_data.decode("utf-8"))
-                return NotionRetrieveDatabaseResponse.model_validate(data)
+                with span("cache.decode", key=cls.DATABASE_CACHE_KEY):
+                    data, is_stale = decode_cache_entry(cached_data)
+                    database = NotionRetrieveDatabaseResponse.model_validate(data)
+                cls._local_cache.set(key, database)
+                CACHE_LOOKUPS.labels(
+                    cls.DATABASE_CACHE_KEY, "stale_hit" if is_stale else "redis_hit"
+                ).inc()
+                if is_stale:
+                    # Serve the stale schema while a fresh copy is fetched
+                    cls._schedule_refresh(
+                        key,
+                        partial(cls._fetch_database, database_id, Priority.BACKGROUND),
+                    )
+                return database
             except Exception:
                 # If deserialization fails, continue to fetch from API
-                pass
+                CACHE_DECODE_FAILURES.labels(cls.DATABASE_CACHE_KEY).inc()
 
-        # If not in cache, fetch from API
-        database_id = settings.notion_config.database_id
-        response = cls.notion.databases.retrieve(database_id=database_id)
+        CACHE_LOOKUPS.labels(cls.DATABASE_CACHE_KEY, "miss").inc()
+        return await cls._fetch_database(database_id)
+
+    @classmethod
+    async def _fetch_database(
+        cls, database_id: str, priority: Priority = Priority.WRITE
+    ) -> NotionRetrieveDatabaseResponse:
+        response = await cls._call(
+            priority, cls._notion().databases.retrieve, database_id=database_id
+        )
 
         # Create the response object
-        database = NotionRetrieveDatabaseResponse.model_validate(response)
+        database = validate_notion_response(NotionRetrieveDatabaseResponse, response)
 
         # Cache the results
-        if hasattr(database, "model_dump"):
-            serialized = json.dumps(database.model_dump(mode="json"))
-            cls._redis.setex(cls.DATABASE_CACHE_KEY, settings.cache_timeout, serialized)
+        key = cls._database_cache_key(database_id)
+        serialized = encode_cache_entry(
+            database.model_dump(mode="json"), settings.cache_soft_timeout
+        )
+        await cls._redis.setex(key, settings.cache_timeout, serialized)
+        cls._local_cache.set(key, database)
 
         return database
 
     @classmethod
-    def _get_and_cache_users(cls) -> List[NotionUserResponse]:
-        # Try to get from cache first
-        cached_data = cls._redis.get(cls.USER_CACHE_KEY)
+    async def _get_and_cache_users(cls) -> Sequence[NotionUserResponse]:
+        user_index = await cls._get_user_index()
+        return user_index.users
+
+    @classmethod
+    async def _get_user_index(cls) -> UserIndex:
+        # Try the in-process cache first
+        key = tenant_key(cls.USER_CACHE_KEY)
+        local_index = cls._local_cache.get(key)
+        if local_index is not None:
+            CACHE_LOOKUPS.labels(cls.USER_CACHE_KEY, "local_hit").inc()
+            return local_index
+
+        # Concurrent misses share a single load
+        return await cls._single_flight.do(key, cls._load_users)
+
+    @classmethod
+    async def _load_users(cls) -> UserIndex:
+        # Try Redis before going to the API
+        key = tenant_key(cls.USER_CACHE_KEY)
+        with span("cache.get", key=cls.USER_CACHE_KEY):
+            # The client doesn't decode responses, so values are bytes
+            cached_data = cast(Optional[bytes], await cls._redis.get(key))
         if cached_data:
             try:
-                data = json.loads(cached_data.decode("utf-8"))
-                return [NotionUserResponse.model_validate(item) for item in data]
+                users: Sequence[NotionUserResponse]
+                digest: Optional[bytes] = None
+                with span("cache.decode", key=cls.USER_CACHE_KEY):
+                    if is_binary_user_cache(cached_data):
+                        users, is_stale = decode_users(cached_data)
+                        digest = user_cache_digest(cached_data)
+                    else:
+                        # Entry written before the binary format was introduced
+                        data, is_stale = decode_cache_entry(cached_data)
+                        users = [
+                            NotionUserResponse.model_validate(item) for item in data
+                        ]
+                user_index = cls._cache_user_index(users, digest)
+                CACHE_LOOKUPS.labels(
+                    cls.USER_CACHE_KEY, "stale_hit" if is_stale else "redis_hit"
+                ).inc()
+                if is_stale:
+                    # Serve the stale directory while a fresh copy is fetched
+                    cls._schedule_refresh(
+                        key, partial(cls._fetch_users, Priority.BACKGROUND)
+                    )
+                return user_index
             except Exception:
                 # If deserialization fails, continue to fetch from API
-                pass
+                CACHE_DECODE_FAILURES.labels(cls.USER_CACHE_KEY).inc()
 
-        # If not in cache, fetch from API
+        CACHE_LOOKUPS.labels(cls.USER_CACHE_KEY, "miss").inc()
+        return await cls._fetch_users()
+
+    @classmethod
+    async def _fetch_users(cls, priority: Priority = Priority.INTERACTIVE) -> UserIndex:
         all_users: List[NotionUserResponse] = []
         start_cursor: Optional[str] = None
         has_more: bool = True
@@ -236,8 +1257,9 @@ class NotionClient:
             if start_cursor:
                 params["start_cursor"] = start_cursor
 
-            response = NotionListUsersResponse.model_validate(
-                cls.notion.users.list(**params)
+            response = validate_notion_response(
+                NotionListUsersResponse,
+                await cls._call(priority, cls._notion().users.list, **params),
             )
 
             # Add the current page of results
@@ -253,7 +1275,50 @@ class NotionClient:
                 has_more = False
 
         # Cache the results
-        serialized = json.dumps([user.model_dump(mode="json") for user in all_users])
-        cls._redis.setex(cls.USER_CACHE_KEY, settings.cache_timeout, serialized)
+        serialized = encode_users(
+            all_users,
+            settings.cache_soft_timeout,
+            compress=settings.user_cache_compression,
+        )
+        await cls._redis.setex(
+            tenant_key(cls.USER_CACHE_KEY), settings.cache_timeout, serialized
+        )
 
-        return all_users
+        return cls._cache_user_index(all_users, user_cache_digest(serialized))
+
+    @classmethod
+    def _cache_user_index(
+        cls,
+        users: Sequence[NotionUserResponse],
+        digest: Optional[bytes] = None,
+    ) -> UserIndex:
+        """Index the users once per directory, so lookups never rescan it.
+
+        Building the index of a large directory takes hundreds of
+        milliseconds, so the last index built is reused while the cached
+        users have the same digest, along with its generation.
+        """
+        key = tenant_key(cls.USER_CACHE_KEY)
+        built = cls._user_indexes.get(key)
+        if digest is not None and built is not None and built[0] == digest:
+            user_index = built[1]
+        else:
+            user_index = UserIndex(users)
+            if digest is not None:
+                cls._user_indexes[key] = (digest, user_index)
+        cls._local_cache.set(key, user_index)
+        return user_index
+
+
+def _same_notion_id(first: str, second: str) -> bool:
+    # Notion accepts IDs with or without dashes
+    return first.replace("-", "").lower() == second.replace("-", "").lower()
+
+
+# Reported when metrics are collected, so queueing costs nothing extra
+NOTION_QUEUE_DEPTH.set_function(
+    lambda: (
+        NotionClient._scheduler.queue_depth()
+        + sum(tenant.scheduler.queue_depth() for tenant in NotionClient._tenants)
+    )
+)
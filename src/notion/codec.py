@@ -0,0 +1,145 @@
+import hashlib
+import struct
+import time
+import zlib
+from typing import List, Optional, Sequence, Tuple, Union, overload
+from uuid import UUID
+
+from notion.types import NotionUserResponse
+
+# Leading bytes of every binary user cache entry, so they can be told apart
+# from the JSON entries written by earlier releases
+USER_CACHE_MAGIC = b"NU"
+USER_CACHE_VERSION = 1
+
+# magic, version, flags, refresh_at (unix time), user count
+_HEADER = struct.Struct("<2sBBdI")
+_FLAG_COMPRESSED = 0x01
+_UUID_SIZE = 16
+_NAME_SEPARATOR = "\0"
+
+
+class CachedUsers(Sequence[NotionUserResponse]):
+    """Users decoded from a cache entry, each built the first time it is read.
+
+    The ids and names come from a layout written by ``encode_users``, so
+    users are built with ``model_construct`` rather than validated. Most
+    lookups only read a page of results, so most users are never built.
+    """
+
+    def __init__(self, ids: bytes, names: List[str]) -> None:
+        self._ids = ids
+        self.names = names
+        self._users: List[Optional[NotionUserResponse]] = [None] * len(names)
+
+    @overload
+    def __getitem__(self, index: int) -> NotionUserResponse: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[NotionUserResponse]: ...
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[NotionUserResponse, List[NotionUserResponse]]:
+        if isinstance(index, slice):
+            return [self[position] for position in range(*index.indices(len(self)))]
+
+        user = self._users[index]
+        if user is None:
+            position = index % len(self)
+            offset = position * _UUID_SIZE
+            user = NotionUserResponse.model_construct(
+                id=UUID(bytes=self._ids[offset : offset + _UUID_SIZE]),
+                name=self.names[position],
+            )
+            self._users[position] = user
+        return user
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+def is_binary_user_cache(raw: bytes) -> bool:
+    return raw[: len(USER_CACHE_MAGIC)] == USER_CACHE_MAGIC
+
+
+def encode_users(
+    users: Sequence[NotionUserResponse], soft_ttl: float, compress: bool = True
+) -> bytes:
+    """Pack users into the compact columnar cache format.
+
+    The body holds every user id as 16 raw bytes followed by every name,
+    NUL-separated, so decoding is a few bulk operations on two buffers
+    instead of parsing one JSON object per user.
+
+    Args:
+        users: The users to cache
+        soft_ttl: Seconds until the entry should be refreshed
+        compress: Whether to zlib-compress the body
+
+    Returns:
+        The serialized cache entry
+
+    """
+    ids = b"".join(user.id.bytes for user in users)
+    # Notion never returns NUL in a name, drop it rather than corrupt the list
+    names = _NAME_SEPARATOR.join(
+        user.name.replace(_NAME_SEPARATOR, "") for user in users
+    ).encode("utf-8")
+    body = ids + names
+
+    flags = 0
+    if compress:
+        body = zlib.compress(body, 1)
+        flags |= _FLAG_COMPRESSED
+
+    header = _HEADER.pack(
+        USER_CACHE_MAGIC,
+        USER_CACHE_VERSION,
+        flags,
+        time.time() + soft_ttl,
+        len(users),
+    )
+    return header + body
+
+
+def user_cache_digest(raw: bytes) -> bytes:
+    """Identify the users in an entry written by ``encode_users``.
+
+    The header is left out, so entries rewritten for the same users when
+    the directory is refreshed have the same digest.
+    """
+    return hashlib.blake2b(raw[_HEADER.size :], digest_size=16).digest()
+
+
+def decode_users(raw: bytes) -> Tuple[CachedUsers, bool]:
+    """Unpack users written by ``encode_users``.
+
+    Only the two buffers are split here, users are built as they are read.
+
+    Args:
+        raw: The serialized cache entry
+
+    Returns:
+        The cached users and whether the entry is past its soft expiry
+
+    Raises:
+        ValueError: If the entry is corrupt or in a format this release
+            cannot read
+
+    """
+    magic, version, flags, refresh_at, count = _HEADER.unpack_from(raw)
+    if magic != USER_CACHE_MAGIC or version != USER_CACHE_VERSION:
+        raise ValueError(f"Unsupported user cache format version {version}")
+
+    body = raw[_HEADER.size :]
+    if flags & _FLAG_COMPRESSED:
+        body = zlib.decompress(body)
+
+    ids_end = count * _UUID_SIZE
+    ids = body[:ids_end]
+    names = body[ids_end:].decode("utf-8").split(_NAME_SEPARATOR) if count else []
+    if len(ids) != ids_end or len(names) != count:
+        raise ValueError("Corrupt user cache entry")
+
+    return CachedUsers(ids, names), refresh_at <= time.time()
@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import time
+from functools import partial
+from typing import TYPE_CHECKING, Awaitable, Callable, Optional, Type, TypeVar, cast
+from uuid import uuid4
+
+from pydantic import BaseModel
+
+from notion.cache import SingleFlight
+from notion.scheduler import DeadlineExceeded
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+
+logger = logging.getLogger(__name__)
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+# Value held under a key while its call is running, followed by an owner token
+PENDING_PREFIX = "pending:"
+
+# Releases a pending key, unless it has since expired and been taken over
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class IdempotentCalls:
+    """Runs a call at most once per key across every replica.
+
+    The first caller marks the key as pending in Redis and runs the call. Its
+    result is stored under the key for ``ttl`` seconds and handed to later
+    callers without running the call again. Callers arriving while the call
+    is running wait for its result: in process through a shared task, across
+    replicas by polling Redis. If the call fails the key is released so a
+    retry can run it again. If Redis is unreachable the call runs without
+    cross-replica deduplication.
+    """
+
+    def __init__(
+        self,
+        redis: "Redis",
+        prefix: str,
+        ttl: int,
+        pending_timeout: float,
+        poll_interval: float = 0.1,
+    ) -> None:
+        self.prefix = prefix
+        self.ttl = ttl
+        self.pending_timeout = pending_timeout
+        self.poll_interval = poll_interval
+        self._redis = redis
+        self._release = redis.register_script(RELEASE_SCRIPT)
+        self._single_flight = SingleFlight()
+
+    async def run(
+        self, key: str, call: Callable[[], Awaitable[ModelT]], model: Type[ModelT]
+    ) -> ModelT:
+        """Run the call unless it already ran, or is running, for this key.
+
+        Args:
+            key: Identifies the request being deduplicated
+            call: Function performing the request
+            model: Model the stored result is parsed back into
+
+        Returns:
+            The result of the call, from whichever caller ran it
+
+        Raises:
+            DeadlineExceeded: If another replica is still running the call
+                after ``pending_timeout`` seconds
+
+        """
+        return await self._single_flight.do(
+            key, partial(self._run, f"{self.prefix}:{key}", call, model)
+        )
+
+    async def _run(
+        self, redis_key: str, call: Callable[[], Awaitable[ModelT]], model: Type[ModelT]
+    ) -> ModelT:
+        deadline_at = time.monotonic() + self.pending_timeout
+
+        while True:
+            token = f"{PENDING_PREFIX}{uuid4()}"
+            try:
+                acquired = await self._redis.set(
+                    redis_key, token, nx=True, px=int(self.pending_timeout * 1000)
+                )
+                # The client doesn't decode responses, so values are bytes
+                stored = cast(
+                    Optional[bytes],
+                    None if acquired else await self._redis.get(redis_key),
+                )
+            except Exception as e:
+                logger.warning(f"Idempotency store unavailable, running call: {e}")
+                return await call()
+
+            if acquired:
+                return await self._call_and_store(redis_key, token, call)
+
+            if stored is None:
+                # The previous owner failed and released the key, take over
+                continue
+            if not stored.startswith(PENDING_PREFIX.encode("utf-8")):
+                return model.model_validate_json(stored)
+
+            if time.monotonic() + self.poll_interval >= deadline_at:
+                raise DeadlineExceeded(
+                    f"Call for {redis_key} is still running on another replica"
+                )
+            await asyncio.sleep(self.poll_interval)
+
+    async def _call_and_store(
+        self, redis_key: str, token: str, call: Callable[[], Awaitable[ModelT]]
+    ) -> ModelT:
+        try:
+            result = await call()
+        except BaseException:
+            try:
+                await self._release(keys=[redis_key], args=[token])
+            except Exception as e:
+                logger.warning(f"Failed to release idempotency key {redis_key}: {e}")
+            raise
+
+        try:
+            await self._redis.set(redis_key, result.model_dump_json(), ex=self.ttl)
+        except Exception as e:
+            logger.warning(f"Failed to store result for {redis_key}: {e}")
+        return result
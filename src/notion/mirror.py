@@ -0,0 +1,207 @@
+import bisect
+import heapq
+import itertools
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from notion.types import NotionIssueSummary
+
+# Sort key for issues missing an edit timestamp
+_OLDEST = datetime.min.replace(tzinfo=timezone.utc)
+
+
+def title_relevance(title: str, needle: str) -> int:
+    """Rank a casefolded title containing ``needle``, lower is more relevant.
+
+    Exact titles come first, then titles starting with the needle, then
+    titles with a word starting with it, then any other match.
+    """
+    if not needle or title == needle:
+        return 0
+    if title.startswith(needle):
+        return 1
+    if _starts_word(title, needle):
+        return 2
+    return 3
+
+
+def _starts_word(title: str, needle: str) -> bool:
+    return any(word.startswith(needle) for word in title.split())
+
+
+def rank_issues(
+    issues: Iterable[NotionIssueSummary], query: Optional[str], limit: int
+) -> List[NotionIssueSummary]:
+    """Pick the ``limit`` issues matching ``query`` best.
+
+    Issues are ordered by title relevance, most recently edited first among
+    equally relevant ones. Every issue is assumed to match the query.
+    """
+    needle = query.casefold() if query else ""
+    return heapq.nsmallest(
+        limit,
+        issues,
+        key=lambda issue: (
+            title_relevance(issue.title.casefold(), needle),
+            -(issue.last_edited_time or _OLDEST).timestamp(),
+        ),
+    )
+
+
+class IssueMirror:
+    """In-memory mirror of the issues database used to answer searches.
+
+    The mirror is filled by a full sync and then kept current by incremental
+    syncs that only fetch pages edited since the last high-water mark. Pages
+    removed from the database are not reported by incremental syncs, so a
+    full sync is repeated every ``full_sync_interval`` seconds.
+
+    ``generation`` changes whenever the mirror contents may have changed, so
+    search results can be cached until the next sync that finds edits.
+    """
+
+    def __init__(self, sync_interval: float, full_sync_interval: float) -> None:
+        self.sync_interval = sync_interval
+        self.full_sync_interval = full_sync_interval
+        self.high_water_mark: Optional[datetime] = None
+        self.generation = 0
+        self._issues: Dict[UUID, NotionIssueSummary] = {}
+        # Casefolded titles ordered by most recently edited first
+        self._index: List[Tuple[str, NotionIssueSummary]] = []
+        # Casefolded titles in alphabetical order, with their index position
+        self._titles: List[Tuple[str, int]] = []
+        self._last_sync: Optional[float] = None
+        self._last_full_sync: Optional[float] = None
+
+    @property
+    def is_ready(self) -> bool:
+        """Whether the mirror has completed at least one full sync."""
+        return self._last_full_sync is not None
+
+    def is_stale(self) -> bool:
+        if self._last_sync is None:
+            return True
+        return time.monotonic() - self._last_sync >= self.sync_interval
+
+    def needs_full_sync(self) -> bool:
+        if self._last_full_sync is None:
+            return True
+        return time.monotonic() - self._last_full_sync >= self.full_sync_interval
+
+    def replace(self, issues: Iterable[NotionIssueSummary]) -> List[NotionIssueSummary]:
+        """Replace the mirror contents with the result of a full sync.
+
+        Returns:
+            The issues that are new or changed since the previous contents
+        """
+        previous = self._issues
+        self._issues = {}
+        self._index = []
+        self._titles = []
+        self.high_water_mark = None
+        self.generation += 1
+        self._apply(issues)
+        now = time.monotonic()
+        self._last_sync = now
+        self._last_full_sync = now
+        return [
+            issue for issue in self._issues.values() if previous.get(issue.id) != issue
+        ]
+
+    def upsert(self, issues: Iterable[NotionIssueSummary]) -> List[NotionIssueSummary]:
+        """Merge the result of an incremental sync into the mirror.
+
+        Returns:
+            The issues that are new or changed
+        """
+        changed = self._apply(issues)
+        self._last_sync = time.monotonic()
+        return changed
+
+    def add(self, issues: Iterable[NotionIssueSummary]) -> List[NotionIssueSummary]:
+        """Add issues written by this process, such as a page it just created.
+
+        The high-water mark is left alone, so the next incremental sync still
+        fetches the pages edited by others since the last sync.
+
+        Returns:
+            The issues that are new or changed
+        """
+        high_water_mark = self.high_water_mark
+        changed = self._apply(issues)
+        self.high_water_mark = high_water_mark
+        return changed
+
+    def search(
+        self, query: Optional[str] = None, limit: int = 10
+    ) -> List[NotionIssueSummary]:
+        """Return the ``limit`` issues matching ``query`` best, as ``rank_issues``."""
+        if not query:
+            return [issue for _, issue in self._index[:limit]]
+
+        needle = query.casefold()
+        # Titles equal to or starting with the needle sort next to it, equal
+        # ones first. Index positions order equally relevant issues by recency.
+        exact: List[int] = []
+        prefixed: List[int] = []
+        start = bisect.bisect_left(self._titles, (needle,))
+        for title, position in itertools.islice(self._titles, start, None):
+            if not title.startswith(needle):
+                break
+            (exact if title == needle else prefixed).append(position)
+        positions = sorted(exact)[:limit]
+        positions += heapq.nsmallest(limit - len(positions), prefixed)
+
+        # The remaining matches are found most recent first, so the scan can
+        # stop once word matches fill the results
+        words: List[int] = []
+        others: List[int] = []
+        if len(positions) < limit:
+            for position, (title, _) in enumerate(self._index):
+                if needle not in title or title.startswith(needle):
+                    continue
+                if _starts_word(title, needle):
+                    words.append(position)
+                    if len(positions) + len(words) >= limit:
+                        break
+                elif len(others) < limit:
+                    others.append(position)
+
+        positions = (positions + words + others)[:limit]
+        return [self._index[position][1] for position in positions]
+
+    def _apply(self, issues: Iterable[NotionIssueSummary]) -> List[NotionIssueSummary]:
+        changed: List[NotionIssueSummary] = []
+        for issue in issues:
+            if self._issues.get(issue.id) != issue:
+                changed.append(issue)
+            self._issues[issue.id] = issue
+            if issue.last_edited_time and (
+                self.high_water_mark is None
+                or issue.last_edited_time > self.high_water_mark
+            ):
+                self.high_water_mark = issue.last_edited_time
+
+        if not changed:
+            # Incremental syncs usually only see the last page they saw before
+            return changed
+
+        self.generation += 1
+        ordered = sorted(
+            self._issues.values(),
+            key=lambda issue: issue.last_edited_time or _OLDEST,
+            reverse=True,
+        )
+        self._index = [(issue.title.casefold(), issue) for issue in ordered]
+        self._titles = sorted(
+            (title, position) for position, (title, _) in enumerate(self._index)
+        )
+        return changed
+
+    def __contains__(self, page_id: UUID) -> bool:
+        return page_id in self._issues
+
+    def __len__(self) -> int:
+        return len(self._issues)
@@ -0,0 +1,122 @@
+import logging
+from typing import TYPE_CHECKING, Dict
+
+from metrics import (
+    NOTION_RATE_LIMIT_ERRORS,
+    NOTION_RATE_LIMIT_REJECTIONS,
+    NOTION_RATE_LIMIT_WAITS,
+)
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+
+logger = logging.getLogger(__name__)
+
+# Token bucket shared by every replica. Uses the Redis server clock so that
+# replicas with skewed clocks still agree on the refill. Returns how long the
+# caller has to wait before trying again, or 0 when a token was taken.
+# ARGV: rate (tokens/s), burst, pause (seconds to stop handing out tokens)
+TOKEN_BUCKET_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local pause = tonumber(ARGV[3])
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(state[1]) or burst
+local updated_at = tonumber(state[2]) or now
+
+if now > updated_at then
+    tokens = math.min(burst, tokens + (now - updated_at) * rate)
+    updated_at = now
+end
+
+local wait = 0
+if pause > 0 then
+    tokens = 0
+    updated_at = math.max(updated_at, now + pause)
+elseif updated_at > now then
+    wait = updated_at - now + (1 - tokens) / rate
+elseif tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated_at', updated_at)
+local ttl = (burst / rate + math.max(0, updated_at - now)) * 1000
+redis.call('PEXPIRE', KEYS[1], math.ceil(ttl) + 1000)
+return tostring(wait)
+"""
+
+
+class RedisTokenBucket:
+    """Token bucket kept in Redis so every replica shares one Notion quota.
+
+    Each acquisition runs a single Lua script, so the read, refill and take
+    are atomic across replicas. If Redis is unreachable the bucket fails
+    open and the per-process limit is the only pacing applied.
+
+    Waits, rejections and errors are exported as Prometheus metrics labelled
+    by the bucket key, and counted in ``stats()``.
+    """
+
+    def __init__(self, redis: "Redis", key: str, rate: float, burst: int) -> None:
+        self.key = key
+        self.rate = rate
+        self.burst = burst
+        self._script = redis.register_script(TOKEN_BUCKET_SCRIPT)
+
+        # Metrics
+        self.acquired = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.rejections = 0
+        self.errors = 0
+
+    async def acquire(self) -> float:
+        """Take a token from the shared bucket.
+
+        Returns:
+            0 when a token was taken, otherwise the seconds to wait before
+            trying again
+
+        """
+        wait = await self._run(pause=0)
+        if wait > 0:
+            self.waits += 1
+            self.wait_seconds += wait
+            NOTION_RATE_LIMIT_WAITS.labels(self.key).observe(wait)
+        else:
+            self.acquired += 1
+        return wait
+
+    async def pause(self, seconds: float) -> None:
+        """Stop every replica taking tokens for the given number of seconds."""
+        await self._run(pause=seconds)
+
+    def record_rejection(self) -> None:
+        self.rejections += 1
+        NOTION_RATE_LIMIT_REJECTIONS.labels(self.key).inc()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "acquired": self.acquired,
+            "waits": self.waits,
+            "wait_seconds": self.wait_seconds,
+            "rejections": self.rejections,
+            "errors": self.errors,
+        }
+
+    async def _run(self, pause: float) -> float:
+        try:
+            result = await self._script(
+                keys=[self.key], args=[self.rate, self.burst, pause]
+            )
+        except Exception as e:
+            self.errors += 1
+            NOTION_RATE_LIMIT_ERRORS.labels(self.key).inc()
+            logger.warning(f"Distributed Notion rate limiter unavailable: {e}")
+            return 0.0
+        return float(result)
@@ -0,0 +1,221 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from enum import IntEnum
+from typing import Awaitable, Callable, List, Optional, Tuple, TypeVar
+
+from notion_client.errors import HTTPResponseError
+
+from notion.rate_limit import RedisTokenBucket
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class Priority(IntEnum):
+    """Order in which queued Notion calls are let through (lowest first)."""
+
+    INTERACTIVE = 0
+    WRITE = 1
+    BACKGROUND = 2
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a Notion call is dropped because it would miss its deadline."""
+
+
+class NotionScheduler:
+    """Paces Notion API calls with a token bucket and a priority queue.
+
+    Every call waits for a token before it is sent. When tokens run out,
+    waiting calls are released in priority order, oldest first within a
+    priority. A call whose deadline passes while it is queued, or that
+    cannot be expected to get a token before its deadline, is dropped with
+    ``DeadlineExceeded``. A 429 response pauses the bucket for the
+    ``Retry-After`` period and the call is retried if its deadline allows.
+
+    When a shared ``limiter`` is given, a call must also take a token from it
+    before it is released, so replicas together stay within the quota.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        max_retries: int = 2,
+        limiter: Optional[RedisTokenBucket] = None,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.limiter = limiter
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._counter = itertools.count()
+        self._queue: List[Tuple[int, int, float, asyncio.Future]] = []
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    async def submit(
+        self,
+        call: Callable[[], Awaitable[T]],
+        *,
+        priority: Priority,
+        timeout: float,
+    ) -> T:
+        """Run a Notion call once the rate limit and its priority allow.
+
+        Args:
+            call: Function starting the Notion request
+            priority: Priority of the call relative to other queued calls
+            timeout: Seconds the call may wait in the queue, including retries
+
+        Returns:
+            The result of the call
+
+        """
+        deadline_at = time.monotonic() + timeout
+        attempt = 0
+
+        while True:
+            await self._acquire(priority, deadline_at)
+            try:
+                return await call()
+            except HTTPResponseError as e:
+                if e.status != 429 or attempt >= self.max_retries:
+                    raise
+
+                retry_after = _retry_after(e)
+                self.pause(retry_after)
+                if self.limiter:
+                    await self.limiter.pause(retry_after)
+                if time.monotonic() + retry_after >= deadline_at:
+                    raise
+                attempt += 1
+                logger.warning(
+                    f"Notion rate limit hit, retrying in {retry_after:.1f}s "
+                    f"(attempt {attempt} of {self.max_retries})"
+                )
+
+    def pause(self, seconds: float) -> None:
+        """Stop releasing calls for the given number of seconds."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+
+    def time_until_token(self) -> float:
+        """Seconds until the next call could be released, ignoring the queue."""
+        now = time.monotonic()
+        if now < self._paused_until:
+            return self._paused_until - now
+
+        self._refill(now)
+        if self._tokens >= 1:
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    def queue_depth(self) -> int:
+        """Number of calls waiting for their turn."""
+        return sum(1 for _, _, _, future in self._queue if not future.done())
+
+    async def _acquire(self, priority: Priority, deadline_at: float) -> None:
+        loop = asyncio.get_running_loop()
+        remaining = deadline_at - time.monotonic()
+
+        # Drop calls that could not be released in time even if nothing else
+        # arrived ahead of them
+        ahead = sum(
+            1
+            for queued_priority, _, _, future in self._queue
+            if queued_priority <= priority and not future.done()
+        )
+        if self.time_until_token() + ahead / self.rate > remaining:
+            raise DeadlineExceeded(
+                f"Notion call would wait longer than its {remaining:.1f}s deadline"
+            )
+
+        future = loop.create_future()
+        heapq.heappush(
+            self._queue, (priority, next(self._counter), deadline_at, future)
+        )
+        self._ensure_dispatcher(loop)
+
+        try:
+            await asyncio.wait_for(future, timeout=remaining)
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded(
+                f"Notion call was queued past its {remaining:.1f}s deadline"
+            ) from None
+
+    def _ensure_dispatcher(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self._dispatcher and not self._dispatcher.done():
+            if self._dispatcher.get_loop() is loop:
+                return
+            # Entries queued on another event loop can never be released
+            self._queue = [
+                entry for entry in self._queue if entry[3].get_loop() is loop
+            ]
+            heapq.heapify(self._queue)
+        self._dispatcher = loop.create_task(self._dispatch())
+
+    async def _dispatch(self) -> None:
+        while self._queue:
+            _, _, deadline_at, future = self._queue[0]
+
+            # Skip calls that timed out or were cancelled while queued
+            if future.done():
+                heapq.heappop(self._queue)
+                continue
+            if deadline_at <= time.monotonic():
+                heapq.heappop(self._queue)
+                future.set_exception(
+                    DeadlineExceeded("Notion call missed its deadline")
+                )
+                continue
+
+            wait = self.time_until_token()
+            if wait > 0:
+                # Re-check the head afterwards, a higher priority call may
+                # have been queued in the meantime
+                await asyncio.sleep(wait)
+                continue
+
+            if self.limiter:
+                wait = await self.limiter.acquire()
+                if wait > 0:
+                    if time.monotonic() + wait >= deadline_at:
+                        # Left in the queue; skipped as done on the next pass
+                        self.limiter.record_rejection()
+                        if not future.done():
+                            future.set_exception(
+                                DeadlineExceeded("Shared Notion quota exhausted")
+                            )
+                    else:
+                        await asyncio.sleep(wait)
+                    continue
+
+            self._tokens -= 1
+            self._release_next()
+
+    def _release_next(self) -> None:
+        # The head may have changed while waiting on the shared limiter
+        while self._queue:
+            _, _, _, future = heapq.heappop(self._queue)
+            if not future.done():
+                future.set_result(None)
+                return
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - max(self._updated_at, self._paused_until)
+        if elapsed > 0:
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+        self._updated_at = now
+
+
+def _retry_after(error: HTTPResponseError) -> float:
+    try:
+        return max(float(error.headers.get("retry-after", 1)), 0.0)
+    except ValueError:
+        return 1.0
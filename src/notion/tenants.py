@@ -0,0 +1,125 @@
+import asyncio
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, Iterator, Optional
+
+from notion_client import AsyncClient
+
+from notion.mirror import IssueMirror
+from notion.scheduler import NotionScheduler
+from settings import NotionTenantConfig
+
+# Workspace of the Sentry installation being served, None for the default one
+current_tenant: ContextVar[Optional["NotionTenant"]] = ContextVar(
+    "notion_tenant", default=None
+)
+
+
+def tenant_key_prefix(name: str) -> str:
+    return f"tenant:{name}:"
+
+
+def tenant_key(key: str) -> str:
+    """Namespace a cache key by the current tenant.
+
+    Keys of the default workspace are left as they are.
+    """
+    tenant = current_tenant.get()
+    return key if tenant is None else f"{tenant.key_prefix}{key}"
+
+
+class NotionTenant:
+    """Notion client, rate limit and issue mirrors of one tenant's workspace.
+
+    Every tenant has its own connection pool and scheduler, so a busy
+    installation only ever queues behind its own Notion calls.
+    """
+
+    def __init__(
+        self,
+        config: NotionTenantConfig,
+        notion: AsyncClient,
+        scheduler: NotionScheduler,
+    ) -> None:
+        self.config = config
+        self.name = config.name
+        self.key_prefix = tenant_key_prefix(config.name)
+        self.notion = notion
+        self.scheduler = scheduler
+        self.issue_mirrors: Dict[str, IssueMirror] = {}
+        self.issue_mirror_syncs: Dict[str, asyncio.Task] = {}
+        # Requests and background tasks using the tenant
+        self.in_use = 0
+
+    async def aclose(self) -> None:
+        await self.notion.aclose()
+
+
+class NotionTenantPool:
+    """Tenants built on first use, at most ``max_tenants`` kept at a time.
+
+    Once the pool is full, the least recently used tenants with nothing in
+    flight are dropped and ``evict`` is called to close their connections.
+    A dropped tenant is rebuilt by its next request, with empty mirrors.
+
+    Tenants in use are never dropped, as that would close connections under
+    their requests. When every tenant is in use the pool grows past
+    ``max_tenants`` instead, and shrinks back as the tenants are released.
+    """
+
+    def __init__(
+        self,
+        configs: Iterable[NotionTenantConfig],
+        max_tenants: int,
+        build: Callable[[NotionTenantConfig], NotionTenant],
+        evict: Callable[[NotionTenant], None],
+    ) -> None:
+        self.max_tenants = max_tenants
+        self._build = build
+        self._evict = evict
+        self._configs = {
+            installation_id: config
+            for config in configs
+            for installation_id in config.installation_ids
+        }
+        self._tenants: OrderedDict[str, NotionTenant] = OrderedDict()
+
+    def config_for(
+        self, installation_id: Optional[str]
+    ) -> Optional[NotionTenantConfig]:
+        """The tenant serving a Sentry installation, None for the default one."""
+        if installation_id is None:
+            return None
+        return self._configs.get(installation_id)
+
+    def acquire(self, config: NotionTenantConfig) -> NotionTenant:
+        """Get the tenant, building it if needed, and mark it in use."""
+        tenant = self._tenants.get(config.name)
+        if tenant is None:
+            tenant = self._build(config)
+            self._tenants[config.name] = tenant
+        else:
+            self._tenants.move_to_end(config.name)
+        tenant.in_use += 1
+        self._shrink()
+        return tenant
+
+    def release(self, tenant: NotionTenant) -> None:
+        tenant.in_use -= 1
+        self._shrink()
+
+    def _shrink(self) -> None:
+        if len(self._tenants) <= self.max_tenants:
+            return
+        for name, tenant in list(self._tenants.items()):
+            if len(self._tenants) <= self.max_tenants:
+                break
+            if tenant.in_use == 0:
+                del self._tenants[name]
+                self._evict(tenant)
+
+    def __iter__(self) -> Iterator[NotionTenant]:
+        return iter(list(self._tenants.values()))
+
+    def __len__(self) -> int:
+        return len(self._tenants)
@@ -1,7 +1,33 @@
-from typing import Any, Dict, List, Literal, Optional
+from datetime import datetime
+from typing import Annotated, Any, Dict, List, Literal, Optional
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import (
+    BaseModel,
+    ValidationInfo,
+    ValidatorFunctionWrapHandler,
+    WrapValidator,
+)
+
+# Validation context for payloads that came straight from the Notion API
+TRUSTED_NOTION_DATA = {"trusted_notion_data": True}
+
+
+def _skip_if_trusted(
+    value: Any, handler: ValidatorFunctionWrapHandler, info: ValidationInfo
+) -> Any:
+    # Raw property values are only ever read by key, so trusted payloads are
+    # kept as-is instead of being copied dict by dict
+    if info.context and info.context.get("trusted_notion_data"):
+        if isinstance(value, dict):
+            return value
+    return handler(value)
+
+
+# Property values exactly as Notion returns them, keyed by property name
+RawPageProperties = Annotated[
+    Dict[str, dict[str, Any]], WrapValidator(_skip_if_trusted)
+]
 
 
 class NotionProperty(BaseModel):
@@ -28,16 +54,25 @@ class NotionUniqueIdPageProperty(NotionProperty):
 class NotionCreatePageResponse(BaseModel):
     id: UUID
     url: str
+    properties: RawPageProperties = {}
+    last_edited_time: Optional[datetime] = None
 
 
 class NotionRetrieveDatabaseResponse(BaseModel):
     properties: Dict[str, NotionProperty]
 
 
+class NotionPageParent(BaseModel):
+    type: str
+    database_id: Optional[str] = None
+
+
 class NotionRetrievePageResponse(BaseModel):
     id: UUID
     url: str
-    properties: Dict[str, dict[str, Any]]
+    properties: RawPageProperties
+    parent: Optional[NotionPageParent] = None
+    last_edited_time: Optional[datetime] = None
 
 
 class NotionListUsersResponse(BaseModel):
@@ -67,3 +102,13 @@ class GetPageDataResponse(BaseModel):
 
 class NotionFilterDatabaseResponse(BaseModel):
     results: List[NotionRetrievePageResponse]
+    next_cursor: Optional[str] = None
+
+
+class NotionIssueSummary(BaseModel):
+    id: UUID
+    title: str
+    url: str
+    identifier: Optional[str] = None
+    sentry_url: Optional[str] = None
+    last_edited_time: Optional[datetime] = None
@@ -0,0 +1,130 @@
+import itertools
+import unicodedata
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Set
+
+from notion.codec import CachedUsers
+from notion.types import NotionUserResponse
+
+# Longest n-gram stored in the posting lists
+MAX_GRAM_SIZE = 3
+
+# Source of ``UserIndex.generation``, unique for the life of the process
+_generations = itertools.count(1)
+
+
+def fold(text: str) -> str:
+    """Casefold text and strip accents so "José" matches "jose"."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(
+        char for char in decomposed if not unicodedata.combining(char)
+    ).casefold()
+
+
+def _starts_name(name: str, needle: str) -> bool:
+    return name.startswith(needle)
+
+
+def _starts_word(name: str, needle: str) -> bool:
+    return any(word.startswith(needle) for word in name.split())
+
+
+def _contains(name: str, needle: str) -> bool:
+    return needle in name
+
+
+class UserIndex:
+    """Substring index over user names built once per directory load.
+
+    Every name is folded and split into 1- to 3-character n-grams, each with
+    a posting list of the users containing it, and the n-grams starting the
+    name or one of its words get posting lists of their own. Ranked matches
+    are read from those lists in rank order until the limit is reached, so a
+    query costs time proportional to the users it has to look at rather than
+    the size of the workspace.
+
+    Each index gets a new ``generation``, so anything derived from it can be
+    cached until the directory is reloaded.
+    """
+
+    def __init__(self, users: Sequence[NotionUserResponse]) -> None:
+        self.generation = next(_generations)
+        self.users: Sequence[NotionUserResponse]
+        if isinstance(users, CachedUsers):
+            # Users decoded from the cache are only built once returned
+            self.users = users
+            names = users.names
+        else:
+            self.users = list(users)
+            names = [user.name for user in self.users]
+        self._names = [fold(name) for name in names]
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        # Users whose name starts with the n-gram
+        self._name_prefixes: Dict[str, List[int]] = defaultdict(list)
+        # Users with a word starting with the n-gram
+        self._word_prefixes: Dict[str, List[int]] = defaultdict(list)
+
+        for position, name in enumerate(self._names):
+            grams = set()
+            for size in range(1, MAX_GRAM_SIZE + 1):
+                for start in range(len(name) - size + 1):
+                    grams.add(name[start : start + size])
+            for gram in grams:
+                self._postings[gram].append(position)
+
+            for gram in {name[:size] for size in range(1, MAX_GRAM_SIZE + 1)}:
+                self._name_prefixes[gram].append(position)
+            for gram in {
+                word[:size]
+                for word in name.split()
+                for size in range(1, MAX_GRAM_SIZE + 1)
+            }:
+                self._word_prefixes[gram].append(position)
+
+    def search(
+        self, query: Optional[str] = None, limit: int = 10
+    ) -> List[NotionUserResponse]:
+        """Find users whose name contains the query.
+
+        Users whose name starts with the query come first, then users with a
+        word starting with the query, then any other match. Ties keep the
+        directory order.
+        """
+        needle = fold(query) if query else ""
+        if not needle:
+            return list(self.users[:limit])
+
+        # Prefix lists of the query's first n-gram hold every prefix match,
+        # the rarest posting list of its n-grams every match
+        gram = needle[:MAX_GRAM_SIZE]
+        exact = len(needle) <= MAX_GRAM_SIZE
+        matching = self._rarest_posting(needle)
+        ranked: List[int] = []
+        seen: Set[int] = set()
+        for positions, matches in (
+            (self._name_prefixes.get(gram, []), _starts_name),
+            (self._word_prefixes.get(gram, []), _starts_word),
+            (matching, _contains),
+        ):
+            # Ranks are read in order, so the first matches found are kept
+            for position in min(positions, matching, key=len):
+                if position in seen:
+                    continue
+                if exact or matches(self._names[position], needle):
+                    ranked.append(position)
+                    seen.add(position)
+                    if len(ranked) == limit:
+                        return [self.users[position] for position in ranked]
+        return [self.users[position] for position in ranked]
+
+    def _rarest_posting(self, needle: str) -> List[int]:
+        if len(needle) <= MAX_GRAM_SIZE:
+            return self._postings.get(needle, [])
+        grams = {
+            needle[start : start + MAX_GRAM_SIZE]
+            for start in range(len(needle) - MAX_GRAM_SIZE + 1)
+        }
+        return min((self._postings.get(gram, []) for gram in grams), key=len)
+
+    def __len__(self) -> int:
+        return len(self.users)
@@ -1,4 +1,33 @@
-from typing import Any
+from typing import Any, Type, TypeVar
+
+from pydantic import BaseModel
+
+from notion.types import (
+    TRUSTED_NOTION_DATA,
+    NotionIssueSummary,
+    NotionRetrievePageResponse,
+)
+from settings import NotionColumns, settings
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def validate_notion_response(model: Type[ModelT], data: Any) -> ModelT:
+    """Validate a Notion API payload.
+
+    With ``FAST_SERIALIZATION`` enabled the payload is trusted, so raw page
+    property values are kept as returned instead of being validated.
+
+    Args:
+        model: The model describing the payload
+        data: The payload returned by the Notion client
+
+    Returns:
+        The validated payload
+
+    """
+    context = TRUSTED_NOTION_DATA if settings.fast_serialization else None
+    return model.model_validate(data, context=context)
 
 
 def initialize_empty_properties(property_schema: dict[str, Any]) -> dict[str, Any]:
@@ -49,3 +78,44 @@ def initialize_empty_properties(property_schema: dict[str, Any]) -> dict[str, An
             properties_object[prop_name] = {"status": None}
 
     return properties_object
+
+
+def summarize_issue_page(
+    page: NotionRetrievePageResponse, column_names: NotionColumns
+) -> NotionIssueSummary:
+    """Extract the fields needed to search and link an issue from a page.
+
+    Args:
+        page: The page as returned by the Notion API
+        column_names: The configured names of the database columns
+
+    Returns:
+        The summary of the issue stored in the page
+
+    """
+    title = ""
+    for prop in page.properties.values():
+        if prop.get("type") == "title":
+            title = "".join(part["plain_text"] for part in prop.get("title") or [])
+            break
+
+    identifier = None
+    id_property = page.properties.get(column_names.id)
+    if id_property and id_property.get("type") == "unique_id":
+        unique_id = id_property.get("unique_id") or {}
+        if unique_id.get("number") is not None:
+            identifier = f"{unique_id.get('prefix')}-{unique_id['number']}"
+
+    sentry_url = None
+    sentry_url_property = page.properties.get(column_names.sentry_url)
+    if sentry_url_property and sentry_url_property.get("type") == "url":
+        sentry_url = sentry_url_property.get("url")
+
+    return NotionIssueSummary(
+        id=page.id,
+        title=title,
+        url=page.url,
+        identifier=identifier,
+        sentry_url=sentry_url,
+        last_edited_time=page.last_edited_time,
+    )
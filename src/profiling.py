@@ -0,0 +1,257 @@
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from types import FrameType
+from typing import Deque, Dict, Iterable, List, Optional
+
+from pydantic import BaseModel, Field
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from tracing import request_id
+
+
+class NotionCallRecord(BaseModel):
+    endpoint: str
+    status: Optional[int] = None
+    duration: float
+
+
+class SlowRequestProfile(BaseModel):
+    id: int
+    request_id: Optional[str] = None
+    method: str
+    path: str
+    status: int
+    started_at: float
+    duration: float
+    sampled: bool
+    samples: int = 0
+    stacks: Dict[str, int] = Field(default_factory=dict)
+    notion_calls: List[NotionCallRecord] = Field(default_factory=list)
+
+    def folded_stacks(self) -> str:
+        """Render the stacks in the folded format read by flame graph tools."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.items())
+
+
+class ProfilingConfig(BaseModel):
+    enabled: Optional[bool] = None
+    sample_rate: Optional[float] = Field(default=None, ge=0, le=1)
+    slow_request_threshold: Optional[float] = Field(default=None, ge=0)
+
+
+class ProfilingStatus(BaseModel):
+    enabled: bool
+    sample_rate: float
+    slow_request_threshold: float
+    profiles: List[SlowRequestProfile]
+
+
+# Notion calls made while handling the current request, if it is profiled
+_notion_calls: ContextVar[Optional[List[NotionCallRecord]]] = ContextVar(
+    "notion_calls", default=None
+)
+
+
+def record_notion_call(endpoint: str, status: Optional[int], duration: float) -> None:
+    """Note a Notion call against the request being profiled, if any."""
+    calls = _notion_calls.get()
+    if calls is not None:
+        calls.append(
+            NotionCallRecord(endpoint=endpoint, status=status, duration=duration)
+        )
+
+
+class _StackSamples:
+    __slots__ = ("thread_id", "stacks", "samples")
+
+    def __init__(self, thread_id: int) -> None:
+        self.thread_id = thread_id
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+
+
+class StackSampler:
+    """Samples the stacks of threads running profiled requests.
+
+    A single daemon thread takes a sample every ``interval`` seconds while at
+    least one request is being profiled and sleeps otherwise. Requests share
+    their event loop thread, so concurrent profiled requests on the same loop
+    see the same samples.
+    """
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._sessions: List[_StackSamples] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> _StackSamples:
+        session = _StackSamples(threading.get_ident())
+        with self._lock:
+            self._sessions.append(session)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="stack-sampler", daemon=True
+                )
+                self._thread.start()
+        self._wakeup.set()
+        return session
+
+    def stop(self, session: _StackSamples) -> None:
+        with self._lock:
+            self._sessions.remove(session)
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait()
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._sessions:
+                    self._wakeup.clear()
+                    continue
+                frames = sys._current_frames()
+                for session in self._sessions:
+                    frame = frames.get(session.thread_id)
+                    if frame is not None:
+                        session.stacks[_fold(frame)] += 1
+                        session.samples += 1
+
+
+def _fold(frame: Optional[FrameType]) -> str:
+    names: List[str] = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(
+            f"{code.co_qualname} ({os.path.basename(code.co_filename)}:"
+            f"{frame.f_lineno})"
+        )
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class Profiler:
+    """Captures profiles of slow requests into a ring buffer.
+
+    While enabled, the Notion calls of every request are recorded, and a
+    ``sample_rate`` fraction of requests also have their stacks sampled.
+    Requests slower than ``slow_request_threshold`` seconds are kept, the
+    ``max_profiles`` most recent first.
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        sample_rate: float,
+        slow_request_threshold: float,
+        max_profiles: int,
+        interval: float,
+    ) -> None:
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.slow_request_threshold = slow_request_threshold
+        self.sampler = StackSampler(interval)
+        self._profiles: Deque[SlowRequestProfile] = deque(maxlen=max_profiles)
+        self._ids = itertools.count(1)
+
+    def configure(self, config: ProfilingConfig) -> None:
+        if config.enabled is not None:
+            self.enabled = config.enabled
+        if config.sample_rate is not None:
+            self.sample_rate = config.sample_rate
+        if config.slow_request_threshold is not None:
+            self.slow_request_threshold = config.slow_request_threshold
+
+    def status(self) -> ProfilingStatus:
+        return ProfilingStatus(
+            enabled=self.enabled,
+            sample_rate=self.sample_rate,
+            slow_request_threshold=self.slow_request_threshold,
+            profiles=self.profiles(),
+        )
+
+    def profiles(self) -> List[SlowRequestProfile]:
+        """Captured profiles, most recent first."""
+        return list(reversed(self._profiles))
+
+    def get_profile(self, profile_id: int) -> Optional[SlowRequestProfile]:
+        for profile in self._profiles:
+            if profile.id == profile_id:
+                return profile
+        return None
+
+    def clear(self) -> None:
+        self._profiles.clear()
+
+    def should_sample(self) -> bool:
+        return random.random() < self.sample_rate
+
+    def capture(self, profile: SlowRequestProfile) -> None:
+        profile.id = next(self._ids)
+        self._profiles.append(profile)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware handing requests to ``paths`` over to the profiler.
+
+    Does nothing beyond a path check while the profiler is disabled.
+    """
+
+    def __init__(self, app: ASGIApp, profiler: Profiler, paths: Iterable[str]) -> None:
+        self.app = app
+        self.profiler = profiler
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        profiler = self.profiler
+        if (
+            not profiler.enabled
+            or scope["type"] != "http"
+            or scope["path"] not in self.paths
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        notion_calls: List[NotionCallRecord] = []
+        token = _notion_calls.set(notion_calls)
+        session = profiler.sampler.start() if profiler.should_sample() else None
+        started_at = time.time()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start
+            _notion_calls.reset(token)
+            if session is not None:
+                profiler.sampler.stop(session)
+
+            if duration >= profiler.slow_request_threshold:
+                profiler.capture(
+                    SlowRequestProfile(
+                        id=0,
+                        request_id=request_id.get(),
+                        method=scope["method"],
+                        path=scope["path"],
+                        status=status,
+                        started_at=started_at,
+                        duration=duration,
+                        sampled=session is not None,
+                        samples=session.samples if session else 0,
+                        stacks=dict(session.stacks) if session else {},
+                        notion_calls=notion_calls,
+                    )
+                )
@@ -0,0 +1,59 @@
+import hashlib
+from typing import Any, List, NamedTuple, Optional, Sequence
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from sentry.types import SentryAsyncFieldResponse
+
+_field_responses = TypeAdapter(List[SentryAsyncFieldResponse])
+
+
+class EncodedResponse(NamedTuple):
+    body: bytes
+    etag: str
+
+
+class OrjsonResponse(JSONResponse):
+    """JSON response rendered with orjson, from the optional ``fast`` extra."""
+
+    def render(self, content: Any) -> bytes:
+        # Only used once the app has checked orjson is installed
+        import orjson
+
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def encode_field_responses(
+    fields: Sequence[SentryAsyncFieldResponse],
+) -> EncodedResponse:
+    """Serialize select field options once so they can be served as bytes.
+
+    The ETag is derived from the body, so every replica hands out the same
+    tag for the same options.
+    """
+    body = _field_responses.dump_json(list(fields))
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    return EncodedResponse(body=body, etag=etag)
+
+
+def field_response(
+    encoded: EncodedResponse, if_none_match: Optional[str] = None
+) -> Response:
+    """Build the response for encoded options, honouring ``If-None-Match``."""
+    headers = {"ETag": encoded.etag}
+    if if_none_match and _etag_matches(encoded.etag, if_none_match):
+        return Response(status_code=304, headers=headers)
+    return Response(
+        content=encoded.body, media_type="application/json", headers=headers
+    )
+
+
+def _etag_matches(etag: str, if_none_match: str) -> bool:
+    # Weak comparison, as required for If-None-Match
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
@@ -46,10 +46,14 @@ class SentryAsyncFieldResponse(BaseModel):
 
 class GetNotionUsersParams(BaseModel):
     query: Optional[str] = None
+    installationId: Optional[str] = None
 
 
 class SearchNotionIssuesParams(BaseModel):
     query: Optional[str] = None
+    # Sent by Sentry with the slug of the project the search is made from
+    projectSlug: Optional[str] = None
+    installationId: Optional[str] = None
 
 
 class LinkNotionIssueFields(BaseModel):
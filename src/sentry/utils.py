@@ -1,30 +1,28 @@
 import hashlib
 import hmac
 import logging
-from typing import Optional
+from typing import Dict, Iterable, List, Mapping, Optional
 
-from fastapi import HTTPException, Request
+from starlette.requests import ClientDisconnect
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from settings import settings
+from notion.cache import LocalCache
+from tracing import span
 
 logger = logging.getLogger(__name__)
 
+# The signature header may be either of these, depending on the hook
+SIGNATURE_HEADERS = (b"sentry-hook-signature", b"sentry-app-signature")
 
-def is_correct_sentry_signature(
-    body: bytes, key: str, expected: Optional[str] = None
-) -> bool:
+
+def is_correct_sentry_signature(digest: str, expected: Optional[str] = None) -> bool:
     # expected could be `None` if the header was missing,
     # in which case we return early as the request is invalid
     # without a signature
     if not expected:
         return False
 
-    digest = hmac.new(
-        key=key.encode("utf-8"),
-        msg=body,
-        digestmod=hashlib.sha256,
-    ).hexdigest()
-
     if not hmac.compare_digest(digest, expected):
         return False
 
@@ -32,34 +30,140 @@ def is_correct_sentry_signature(
     return True
 
 
-async def verify_sentry_signature(request: Request):
-    """
-    Dependency function to authenticate that requests are coming from Sentry.
-    Raises HTTPException if the signature is invalid.
+class SentrySignatureMiddleware:
+    """ASGI middleware authenticating that requests are coming from Sentry.
+
+    The body is fed into an HMAC-SHA256 keyed with the client secret as it is
+    received, then the digest is compared against the signature header.
+    Requests with a missing or invalid signature are rejected with a 401
+    before routing or request parsing starts.
+
+    With a ``replay_cache``, signatures of requests with a body are
+    remembered and a second request carrying the same signature is rejected.
+    Requests without a body always carry the same signature, so they are
+    never treated as replays.
+
+    Requests may also be signed with the client secret of a tenant in
+    ``tenant_secrets``, which maps tenant names to secrets and is read on
+    every request. MACs are keyed once per secret, so secrets added after
+    startup are keyed on the first request that needs them. The name of the
+    tenant that signed the request, or None for ``secret``, is left in
+    ``request.state.sentry_tenant``.
 
-    Args:
-        request: The FastAPI Request object to verify
+    Paths in ``exempt_paths``, or starting with one of ``exempt_prefixes``,
+    are passed through unchecked.
     """
-    # We need to read the raw body
-    body = await request.body()
-
-    # Get client secret from settings
-    client_secret = settings.sentry_notion_integration_client_secret or ""
-
-    # The signature header may be one of these two values
-    is_valid = is_correct_sentry_signature(
-        body=body,
-        key=client_secret,
-        expected=request.headers.get("sentry-hook-signature"),
-    ) or is_correct_sentry_signature(
-        body=body,
-        key=client_secret,
-        expected=request.headers.get("sentry-app-signature"),
-    )
-
-    if not is_valid:
-        logger.warning("Unauthorized: Invalid Sentry signature.")
-        raise HTTPException(status_code=401, detail="Invalid Sentry Signature")
-
-    # If valid, the dependency succeeds, and execution continues
-    # No explicit return is needed
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        secret: str,
+        replay_cache: Optional[LocalCache] = None,
+        tenant_secrets: Optional[Mapping[str, str]] = None,
+        exempt_paths: Iterable[str] = (),
+        exempt_prefixes: Iterable[str] = (),
+    ) -> None:
+        self.app = app
+        self.replay_cache = replay_cache
+        self.tenant_secrets = tenant_secrets if tenant_secrets is not None else {}
+        self.exempt_paths = frozenset(exempt_paths)
+        self.exempt_prefixes = tuple(exempt_prefixes)
+        # Keyed once, copied for every request
+        self._hmac = _keyed_hmac(secret)
+        self._tenant_hmacs: Dict[str, hmac.HMAC] = {
+            tenant_secret: _keyed_hmac(tenant_secret)
+            for tenant_secret in self.tenant_secrets.values()
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self._is_exempt(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            with span("sentry.verify_signature") as verify_span:
+                body = await self._verify(scope, receive)
+                verify_span.set_attribute("sentry.signature_valid", body is not None)
+        except ClientDisconnect:
+            return
+        if body is None:
+            await self._reject(scope, receive, send)
+            return
+
+        # Hand the already received body to the app
+        body_sent = False
+
+        async def receive_body() -> Message:
+            nonlocal body_sent
+            if body_sent:
+                return await receive()
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        await self.app(scope, receive_body, send)
+
+    def _is_exempt(self, path: str) -> bool:
+        return path in self.exempt_paths or path.startswith(self.exempt_prefixes)
+
+    async def _verify(self, scope: Scope, receive: Receive) -> Optional[bytes]:
+        """Receive the body, returning it only if the request may be handled."""
+        expected = _signature_header(scope)
+        if expected is None:
+            logger.warning("Unauthorized: Missing Sentry signature.")
+            return None
+
+        macs: Dict[Optional[str], hmac.HMAC] = {None: self._hmac.copy()}
+        for name, secret in self.tenant_secrets.items():
+            keyed = self._tenant_hmacs.get(secret)
+            if keyed is None:
+                keyed = self._tenant_hmacs[secret] = _keyed_hmac(secret)
+            macs[name] = keyed.copy()
+        chunks: List[bytes] = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                raise ClientDisconnect()
+            chunk = message.get("body", b"")
+            for mac in macs.values():
+                mac.update(chunk)
+            chunks.append(chunk)
+            more_body = message.get("more_body", False)
+
+        signers = [
+            name
+            for name, mac in macs.items()
+            if is_correct_sentry_signature(mac.hexdigest(), expected)
+        ]
+        if not signers:
+            logger.warning("Unauthorized: Invalid Sentry signature.")
+            return None
+        scope.setdefault("state", {})["sentry_tenant"] = signers[0]
+
+        body = b"".join(chunks)
+        if self.replay_cache is not None and body:
+            if self.replay_cache.get(expected) is not None:
+                logger.warning("Unauthorized: Replayed Sentry signature.")
+                return None
+            self.replay_cache.set(expected, True)
+        return body
+
+    @staticmethod
+    async def _reject(scope: Scope, receive: Receive, send: Send) -> None:
+        response = JSONResponse(
+            status_code=401, content={"detail": "Invalid Sentry Signature"}
+        )
+        await response(scope, receive, send)
+
+
+def _keyed_hmac(secret: str) -> hmac.HMAC:
+    return hmac.new(key=secret.encode("utf-8"), digestmod=hashlib.sha256)
+
+
+def _signature_header(scope: Scope) -> Optional[str]:
+    headers = dict(scope["headers"])
+    for name in SIGNATURE_HEADERS:
+        value = headers.get(name)
+        if value:
+            return value.decode("latin-1")
+    return None
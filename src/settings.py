@@ -1,6 +1,7 @@
 import os
+from typing import Any, List, Literal, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -13,6 +14,72 @@ class NotionColumns(BaseModel):
 class NotionTasksDatabaseConfig(BaseModel):
     database_id: str
     column_names: NotionColumns
+    # Slugs of the Sentry projects whose issues are created in this database,
+    # empty to accept issues from any project
+    projects: List[str] = []
+
+
+class NotionConfig(BaseModel):
+    databases: List[NotionTasksDatabaseConfig] = Field(min_length=1)
+
+    @model_validator(mode="before")
+    @classmethod
+    def _single_database(cls, data: Any) -> Any:
+        # A single database may be given on its own, as before databases
+        # could be listed
+        if isinstance(data, dict) and "databases" not in data:
+            return {"databases": [data]}
+        return data
+
+    def database_for_project(
+        self, project_slug: Optional[str] = None
+    ) -> NotionTasksDatabaseConfig:
+        """Database new issues from a Sentry project are created in.
+
+        That is the first database listing the project, else the first one
+        accepting any project, else the first database.
+        """
+        if project_slug:
+            for database in self.databases:
+                if project_slug in database.projects:
+                    return database
+        for database in self.databases:
+            if not database.projects:
+                return database
+        return self.databases[0]
+
+    def databases_for_project(
+        self, project_slug: Optional[str] = None
+    ) -> List[NotionTasksDatabaseConfig]:
+        """Databases searched for issues of a Sentry project.
+
+        These are the databases listing the project or accepting any
+        project, or every database when the project is unknown or none match.
+        """
+        if project_slug:
+            databases = [
+                database
+                for database in self.databases
+                if not database.projects or project_slug in database.projects
+            ]
+            if databases:
+                return databases
+        return list(self.databases)
+
+
+class NotionTenantConfig(BaseModel):
+    """Notion workspace serving the Sentry installations listed."""
+
+    # Namespaces the workspace's cache and rate limit keys
+    name: str = Field(pattern=r"^[A-Za-z0-9_.-]+$")
+    installation_ids: List[str]
+    notion_token: str
+    notion_config: NotionConfig
+    # Signs the requests of the tenant's installations, so it must be its own
+    sentry_client_secret: str = Field(min_length=1)
+    # Defaults to NOTION_REQUESTS_PER_SECOND and NOTION_BURST
+    requests_per_second: Optional[float] = None
+    burst: Optional[int] = None
 
 
 class Settings(BaseSettings):
@@ -27,20 +94,137 @@ class Settings(BaseSettings):
 
     # Notion API settings
     notion_token: str = Field(default="", validation_alias="NOTION_TOKEN")
-    notion_config: NotionTasksDatabaseConfig = Field(validation_alias="NOTION_CONFIG")
+    notion_config: NotionConfig = Field(validation_alias="NOTION_CONFIG")
+    notion_base_url: str = Field(
+        default="https://api.notion.com", validation_alias="NOTION_BASE_URL"
+    )
+    notion_tenants: List[NotionTenantConfig] = Field(
+        default=[], validation_alias="NOTION_TENANTS"
+    )
+    notion_tenant_pool_size: int = Field(
+        default=16, validation_alias="NOTION_TENANT_POOL_SIZE"
+    )
+
+    # Notion rate limit settings
+    notion_requests_per_second: float = Field(
+        default=3.0, validation_alias="NOTION_REQUESTS_PER_SECOND"
+    )
+    notion_burst: int = Field(default=3, validation_alias="NOTION_BURST")
+    notion_max_retries: int = Field(default=2, validation_alias="NOTION_MAX_RETRIES")
+    notion_distributed_rate_limit: bool = Field(
+        default=True, validation_alias="NOTION_DISTRIBUTED_RATE_LIMIT"
+    )
+    notion_interactive_timeout: float = Field(
+        default=5.0, validation_alias="NOTION_INTERACTIVE_TIMEOUT"
+    )
+    notion_write_timeout: float = Field(
+        default=20.0, validation_alias="NOTION_WRITE_TIMEOUT"
+    )
+    notion_background_timeout: float = Field(
+        default=120.0, validation_alias="NOTION_BACKGROUND_TIMEOUT"
+    )
 
     # Sentry API settings
     sentry_notion_integration_client_secret: str = Field(
         default="", validation_alias="SENTRY_NOTION_INTEGRATION_CLIENT_SECRET"
     )
+    sentry_replay_cache_timeout: int = Field(
+        default=0, validation_alias="SENTRY_REPLAY_CACHE_TIMEOUT"
+    )  # Disabled by default
+    sentry_replay_cache_max_entries: int = Field(
+        default=10000, validation_alias="SENTRY_REPLAY_CACHE_MAX_ENTRIES"
+    )
 
     # Cache settings
     cache_timeout: int = Field(
         default=21600, validation_alias="CACHE_TIMEOUT"
     )  # 6 hours default
+    cache_soft_timeout: int = Field(
+        default=3600, validation_alias="CACHE_SOFT_TIMEOUT"
+    )  # 1 hour default
+    local_cache_timeout: int = Field(
+        default=300, validation_alias="LOCAL_CACHE_TIMEOUT"
+    )  # 5 minutes default
+    local_cache_max_entries: int = Field(
+        default=128, validation_alias="LOCAL_CACHE_MAX_ENTRIES"
+    )
+    page_cache_max_entries: int = Field(
+        default=10000, validation_alias="PAGE_CACHE_MAX_ENTRIES"
+    )
+    create_issue_idempotency_ttl: int = Field(
+        default=86400, validation_alias="CREATE_ISSUE_IDEMPOTENCY_TTL"
+    )  # 1 day default
+    user_cache_compression: bool = Field(
+        default=True, validation_alias="USER_CACHE_COMPRESSION"
+    )
     redis_host: str = Field(default="localhost", validation_alias="REDIS_HOST")
     redis_port: int = Field(default=6379, validation_alias="REDIS_PORT")
 
+    # Issue mirror settings
+    issue_mirror_enabled: bool = Field(
+        default=True, validation_alias="ISSUE_MIRROR_ENABLED"
+    )
+    issue_mirror_sync_interval: int = Field(
+        default=30, validation_alias="ISSUE_MIRROR_SYNC_INTERVAL"
+    )
+    issue_mirror_full_sync_interval: int = Field(
+        default=3600, validation_alias="ISSUE_MIRROR_FULL_SYNC_INTERVAL"
+    )  # 1 hour default
+
+    # Performance settings
+    warm_up_enabled: bool = Field(default=True, validation_alias="WARM_UP_ENABLED")
+    warm_up_timeout: float = Field(default=60.0, validation_alias="WARM_UP_TIMEOUT")
+    fast_serialization: bool = Field(
+        default=False, validation_alias="FAST_SERIALIZATION"
+    )
+    metrics_enabled: bool = Field(default=True, validation_alias="METRICS_ENABLED")
+    metrics_token: str = Field(
+        default="", validation_alias="METRICS_TOKEN"
+    )  # /metrics is disabled without one
+
+    # Tracing settings
+    tracing_exporter: Literal["", "memory", "file"] = Field(
+        default="", validation_alias="TRACING_EXPORTER"
+    )  # Disabled by default
+    tracing_file: str = Field(default="traces.jsonl", validation_alias="TRACING_FILE")
+
+    # Profiling settings
+    profiling_enabled: bool = Field(default=False, validation_alias="PROFILING_ENABLED")
+    profiling_sample_rate: float = Field(
+        default=0.1, validation_alias="PROFILING_SAMPLE_RATE"
+    )
+    profiling_slow_request_threshold: float = Field(
+        default=1.0, validation_alias="PROFILING_SLOW_REQUEST_THRESHOLD"
+    )
+    profiling_max_profiles: int = Field(
+        default=20, validation_alias="PROFILING_MAX_PROFILES"
+    )
+    profiling_interval: float = Field(
+        default=0.005, validation_alias="PROFILING_INTERVAL"
+    )
+    profiling_admin_token: str = Field(
+        default="", validation_alias="PROFILING_ADMIN_TOKEN"
+    )  # Admin routes are disabled without one
+
+    @model_validator(mode="after")
+    def _unique_tenants(self) -> "Settings":
+        names = [tenant.name for tenant in self.notion_tenants]
+        if len(set(names)) < len(names):
+            raise ValueError("NOTION_TENANTS names must be unique")
+        installation_ids = [
+            installation_id
+            for tenant in self.notion_tenants
+            for installation_id in tenant.installation_ids
+        ]
+        if len(set(installation_ids)) < len(installation_ids):
+            raise ValueError("A Sentry installation may only belong to one tenant")
+        secrets = [self.sentry_notion_integration_client_secret] + [
+            tenant.sentry_client_secret for tenant in self.notion_tenants
+        ]
+        if len(set(secrets)) < len(secrets):
+            raise ValueError("Every tenant needs its own Sentry client secret")
+        return self
+
 
 # Create a global settings instance
 settings = Settings()
@@ -0,0 +1,293 @@
+import json
+import logging
+import queue
+import secrets
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterator, List, Optional, Protocol, TextIO
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+# Sentry sends an id with every request; used to correlate logs and spans
+REQUEST_ID_HEADER = b"request-id"
+
+request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+LOG_FORMAT = "%(levelname)s [%(request_id)s] %(name)s: %(message)s"
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Span:
+    """A timed step of handling a request, such as a cache read or Notion call."""
+
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "start_time",
+        "duration",
+        "attributes",
+        "error",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str],
+        attributes: Dict[str, Any],
+    ) -> None:
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.start_time = time.time()
+        self.duration = 0.0
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "duration": self.duration,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    """Stands in for a span while tracing is disabled."""
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class SpanExporter(Protocol):
+    """Receives every span once it has finished."""
+
+    def export(self, span: Span) -> None: ...
+
+
+class InMemoryExporter:
+    """Keeps the most recent finished spans in memory."""
+
+    def __init__(self, max_spans: int = 10000) -> None:
+        self.spans: Deque[Span] = deque(maxlen=max_spans)
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+    def trace(self, trace_id: str) -> List[Span]:
+        """Spans recorded for a request, in the order they finished."""
+        return [span for span in self.spans if span.trace_id == trace_id]
+
+    def clear(self) -> None:
+        self.spans.clear()
+
+
+class FileExporter:
+    """Appends finished spans to a file, one JSON object per line.
+
+    Spans are queued and written by a background thread, so requests never
+    wait on the file. ``close`` writes the spans still queued.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file: TextIO = open(path, "a", encoding="utf-8")
+        # None asks the writer to stop
+        self._queue: "queue.SimpleQueue[Optional[Span]]" = queue.SimpleQueue()
+        self._writer = threading.Thread(
+            target=self._write, name="span-writer", daemon=True
+        )
+        self._writer.start()
+
+    def export(self, span: Span) -> None:
+        self._queue.put(span)
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._writer.join()
+        self._file.close()
+
+    def _write(self) -> None:
+        closing = False
+        while not closing:
+            spans = [self._queue.get()]
+            # Write whatever was queued in the meantime in one go
+            while True:
+                try:
+                    spans.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            closing = None in spans
+            try:
+                self._file.writelines(
+                    json.dumps(span.to_dict(), default=str) + "\n"
+                    for span in spans
+                    if span is not None
+                )
+                self._file.flush()
+            except Exception as e:
+                logger.warning(f"Failed to write spans to {self.path}: {e}")
+
+
+_exporter: Optional[SpanExporter] = None
+
+
+def set_exporter(exporter: Optional[SpanExporter]) -> None:
+    """Send finished spans to the given exporter, or disable tracing with None."""
+    global _exporter
+    _exporter = exporter
+
+
+def get_exporter() -> Optional[SpanExporter]:
+    return _exporter
+
+
+def configure_tracing(exporter: str, path: str) -> None:
+    """Set up the exporter named in settings.
+
+    Args:
+        exporter: ``memory``, ``file``, or an empty string to disable tracing
+        path: File spans are written to by the ``file`` exporter
+
+    """
+    if not exporter:
+        set_exporter(None)
+    elif exporter == "memory":
+        set_exporter(InMemoryExporter())
+    elif exporter == "file":
+        set_exporter(FileExporter(path))
+    else:
+        raise ValueError(f"Unknown tracing exporter: {exporter}")
+
+
+def close_tracing() -> None:
+    """Disable tracing and close the exporter, if it can be closed."""
+    exporter = _exporter
+    set_exporter(None)
+    close = getattr(exporter, "close", None)
+    if close is not None:
+        close()
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Any]:
+    """Time the enclosed block as a child of the current span.
+
+    Exceptions raised in the block are recorded on the span and re-raised.
+    Does nothing but yield a stand-in while tracing is disabled.
+    """
+    exporter = _exporter
+    if exporter is None:
+        yield _NOOP_SPAN
+        return
+
+    parent = _current_span.get()
+    trace_id = parent.trace_id if parent else request_id.get() or _new_request_id()
+    current = Span(name, trace_id, parent.span_id if parent else None, attributes)
+    token = _current_span.set(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.error = type(e).__name__
+        raise
+    finally:
+        current.duration = time.perf_counter() - start
+        _current_span.reset(token)
+        try:
+            exporter.export(current)
+        except Exception as e:
+            # Tracing must never fail the request
+            logger.warning(f"Failed to export span {name}: {e}")
+
+
+class TracingMiddleware:
+    """ASGI middleware giving every request an id and a root span.
+
+    The id is taken from Sentry's ``Request-ID`` header when present and
+    generated otherwise. It is available to log records as ``request_id``
+    and returned in the ``Request-ID`` response header.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        current_id = _request_id_header(scope) or _new_request_id()
+        token = request_id.set(current_id)
+
+        async def send_with_request_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((REQUEST_ID_HEADER, current_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+                root.set_attribute("http.status_code", message["status"])
+            await send(message)
+
+        try:
+            with span("http.request", method=scope["method"]) as root:
+                await self.app(scope, receive, send_with_request_id)
+                # The router stores the matched route in the shared scope
+                route = scope.get("route")
+                root.set_attribute("http.route", getattr(route, "path", None))
+        finally:
+            request_id.reset(token)
+
+
+def _request_id_header(scope: Scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == REQUEST_ID_HEADER and value:
+            return value.decode("latin-1")
+    return None
+
+
+def _new_request_id() -> str:
+    return secrets.token_hex(16)
+
+
+class RequestIdFilter(logging.Filter):
+    """Add the id of the request a record was logged for as ``request_id``."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id.get() or "-"
+        return True
+
+
+def configure_logging() -> None:
+    """Log to stderr, tagging every record with its request id.
+
+    Does nothing if the root logger already has handlers, so logging set up
+    by the host process, such as a test runner, is left alone.
+    """
+    root = logging.getLogger()
+    if root.handlers:
+        return
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    handler.addFilter(RequestIdFilter())
+    root.addHandler(handler)
@@ -1,4 +1,4 @@
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from fastapi.testclient import TestClient
@@ -65,7 +65,7 @@ class TestCreateNotionIssue:
         assert data == expected_response
 
     @patch("sentry.utils.is_correct_sentry_signature", return_value=True)
-    @patch("main.NotionClient.create_issue")
+    @patch("main.NotionClient.create_issue", new_callable=AsyncMock)
     def test_create_notion_issue(
         self,
         mock_create_issue: MagicMock,
@@ -97,4 +97,6 @@ class TestCreateNotionIssue:
             sentry_issue_url=request_data["webUrl"],
             description=request_data["fields"]["description"],
             owner_id=request_data["fields"]["owner_id"],
+            project_slug="test-project",
+            idempotency_key="test-installation-id:123",
         )
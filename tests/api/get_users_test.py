@@ -1,11 +1,16 @@
+import hashlib
+import hmac
 from typing import Any, Dict, List, Optional
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from fastapi.testclient import TestClient
 
-from main import app
+from main import app, response_cache, tenant_secrets
+from notion.client import NotionClient
+from notion.tenants import NotionTenantPool, current_tenant
 from notion.types import NotionUserResponse
+from settings import NotionTenantConfig, settings
 
 
 class TestGetNotionUsers:
@@ -22,6 +27,10 @@ class TestGetNotionUsers:
     def client(self):
         return TestClient(app)
 
+    @pytest.fixture(autouse=True)
+    def empty_response_cache(self):
+        response_cache.invalidate()
+
     @pytest.fixture
     def mock_users(self):
         return [
@@ -78,7 +87,7 @@ class TestGetNotionUsers:
         assert data == expected_data
 
     @patch("sentry.utils.is_correct_sentry_signature", return_value=True)
-    @patch("main.NotionClient.get_users")
+    @patch("main.NotionClient.get_users", new_callable=AsyncMock)
     def test_get_notion_users_no_query(
         self, mock_get_users: MagicMock, mock_verify: MagicMock, client, mock_users, expected_response
     ) -> None:
@@ -97,7 +106,7 @@ class TestGetNotionUsers:
         mock_verify.assert_called_once()
 
     @patch("sentry.utils.is_correct_sentry_signature", return_value=True)
-    @patch("main.NotionClient.get_users")
+    @patch("main.NotionClient.get_users", new_callable=AsyncMock)
     def test_get_notion_users_with_query(
         self, mock_get_users: MagicMock, mock_verify: MagicMock, client, mock_users, expected_response
     ) -> None:
@@ -121,3 +130,133 @@ class TestGetNotionUsers:
         # Verify the mock was called correctly
         mock_get_users.assert_called_once_with("avocado")
         mock_verify.assert_called_once()
+
+    @patch("sentry.utils.is_correct_sentry_signature", return_value=True)
+    @patch("main.NotionClient.get_users_generation", return_value=1)
+    @patch("main.NotionClient.get_users", new_callable=AsyncMock)
+    def test_get_notion_users_reuses_encoded_response(
+        self, mock_get_users: MagicMock, mock_generation: MagicMock, mock_verify: MagicMock, client, mock_users, expected_response
+    ) -> None:
+        # Setup mocks
+        mock_get_users.return_value = mock_users
+
+        # Make the same request twice
+        first = self._make_request(client)
+        second = self._make_request(client)
+
+        # Verify both got the same body and the users were only loaded once
+        self._verify_successful_response(first, expected_response)
+        assert second.content == first.content
+        assert second.headers["ETag"] == first.headers["ETag"]
+        mock_get_users.assert_called_once_with(None)
+
+        # Verify a new generation encodes the response again
+        mock_generation.return_value = 2
+        self._make_request(client)
+        assert mock_get_users.call_count == 2
+
+    @patch("sentry.utils.is_correct_sentry_signature", return_value=True)
+    @patch("main.NotionClient.get_users", new_callable=AsyncMock)
+    def test_get_notion_users_not_modified(
+        self, mock_get_users: MagicMock, mock_verify: MagicMock, client, mock_users
+    ) -> None:
+        # Setup mocks
+        mock_get_users.return_value = mock_users
+        etag = self._make_request(client).headers["ETag"]
+
+        # Make the request with the ETag from the first response
+        response = client.get(
+            self.API_ENDPOINT,
+            headers={"sentry-hook-signature": "valid-signature", "If-None-Match": etag},
+        )
+
+        # Verify the body is not sent again
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+
+    @pytest.fixture
+    def tenants(self):
+        """Serve installation 1 from acme and installation 2 from globex."""
+        configs = [
+            NotionTenantConfig(
+                name=name,
+                installation_ids=[installation_id],
+                notion_token=f"{name}-token",
+                sentry_client_secret=f"{name}-secret",
+                notion_config=settings.notion_config,
+            )
+            for name, installation_id in (("acme", "1"), ("globex", "2"))
+        ]
+        pool = NotionTenantPool(
+            configs, max_tenants=2, build=NotionClient._create_tenant, evict=MagicMock()
+        )
+        secrets = {config.name: config.sentry_client_secret for config in configs}
+        with (
+            patch.object(NotionClient, "_tenants", pool),
+            patch.dict(tenant_secrets, secrets),
+        ):
+            yield
+
+    @staticmethod
+    def _sign(secret: str) -> Dict[str, str]:
+        # GET requests are signed over their empty body
+        signature = hmac.new(secret.encode("utf-8"), b"", hashlib.sha256).hexdigest()
+        return {"sentry-hook-signature": signature}
+
+    @patch("main.NotionClient.get_users_generation", return_value=1)
+    @patch("main.NotionClient.get_users", new_callable=AsyncMock)
+    def test_get_notion_users_per_tenant(
+        self,
+        mock_get_users: MagicMock,
+        mock_generation: MagicMock,
+        client,
+        mock_users,
+        tenants,
+    ) -> None:
+        # Setup mocks
+        loaded: List[Optional[str]] = []
+
+        async def get_users(query: Optional[str]) -> List[NotionUserResponse]:
+            tenant = current_tenant.get()
+            loaded.append(tenant.name if tenant else None)
+            return mock_users
+
+        mock_get_users.side_effect = get_users
+
+        # Make the same request for the tenant and the default workspace
+        for _ in range(2):
+            response = client.get(
+                f"{self.API_ENDPOINT}?installationId=1",
+                headers=self._sign("acme-secret"),
+            )
+            assert response.status_code == 200
+        response = client.get(
+            self.API_ENDPOINT,
+            headers=self._sign(settings.sentry_notion_integration_client_secret),
+        )
+        assert response.status_code == 200
+
+        # Verify each workspace loaded its own users and cached its response
+        assert loaded == ["acme", None]
+
+    @patch("main.NotionClient.get_users", new_callable=AsyncMock)
+    def test_get_notion_users_of_other_tenant(
+        self, mock_get_users: MagicMock, client, tenants
+    ) -> None:
+        """Test that a request signed for one tenant can't reach another."""
+        # The query string is not signed, so only the secret tells them apart
+        acme_headers = self._sign("acme-secret")
+        default_headers = self._sign(settings.sentry_notion_integration_client_secret)
+
+        requests = [("2", acme_headers), ("3", acme_headers), ("1", default_headers)]
+        responses = [
+            client.get(
+                f"{self.API_ENDPOINT}?installationId={installation_id}", headers=headers
+            )
+            for installation_id, headers in requests
+        ]
+
+        # Verify every request was rejected before reaching Notion
+        assert [response.status_code for response in responses] == [401, 401, 401]
+        mock_get_users.assert_not_called()
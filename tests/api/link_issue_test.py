@@ -1,4 +1,4 @@
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from fastapi.testclient import TestClient
@@ -63,8 +63,8 @@ class TestLinkNotionIssue:
         assert data == expected_response
 
     @patch("sentry.utils.is_correct_sentry_signature", return_value=True)
-    @patch("main.NotionClient.add_sentry_link_to_page")
-    @patch("main.NotionClient.get_page_data")
+    @patch("main.NotionClient.add_sentry_link_to_page", new_callable=AsyncMock)
+    @patch("main.NotionClient.get_page_data", new_callable=AsyncMock)
     def test_link_notion_issue(
         self,
         mock_get_page_data: MagicMock,
@@ -78,8 +78,8 @@ class TestLinkNotionIssue:
         # Setup mocks
         self._setup_auth_mock(mock_verify)
 
-        # Mock the get_page_data method to return a proper response
-        mock_get_page_data.return_value = GetPageDataResponse(
+        # Mock the add_sentry_link_to_page method to return the updated page data
+        mock_add_link.return_value = GetPageDataResponse(
             url=self.PAGE_URL,
             identifier=self.ISSUE_ID,
         )
@@ -93,13 +93,11 @@ class TestLinkNotionIssue:
         # Verify the mocks were called correctly
         mock_verify.assert_called_once()
         mock_add_link.assert_called_once()
-        mock_get_page_data.assert_called_once()
+
+        # Verify the page was not retrieved a second time
+        mock_get_page_data.assert_not_called()
 
         # Verify add_sentry_link_to_page was called with correct params
         add_link_args = mock_add_link.call_args
         assert str(add_link_args[0][0]) == self.PAGE_ID  # page_id
         assert add_link_args[0][1] == request_data["webUrl"]  # url
-
-        # Verify get_page_data was called with correct page_id
-        get_page_args = mock_get_page_data.call_args
-        assert str(get_page_args[0][0]) == self.PAGE_ID
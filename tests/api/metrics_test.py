@@ -0,0 +1,157 @@
+from typing import Dict
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from notion_client.errors import HTTPResponseError
+from prometheus_client import REGISTRY
+
+from main import app, response_cache
+from metrics import notion_endpoint_name, observe_notion_call
+from notion.client import NotionClient
+from settings import settings
+
+METRICS_TOKEN = "test-metrics-token"
+
+
+def _sample(name: str, labels: Dict[str, str]) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+class TestMetrics:
+    @pytest.fixture
+    def client(self):
+        return TestClient(app)
+
+    @pytest.fixture(autouse=True)
+    def empty_caches(self):
+        response_cache.invalidate()
+        NotionClient._local_cache.invalidate()
+
+    def test_metrics_served_with_token(self, client) -> None:
+        with patch.object(settings, "metrics_token", METRICS_TOKEN):
+            response = client.get(
+                "/metrics", headers={"Authorization": f"Bearer {METRICS_TOKEN}"}
+            )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert b"http_request_duration_seconds" in response.content
+        assert b"notion_queue_depth" in response.content
+
+    def test_metrics_require_token(self, client) -> None:
+        with patch.object(settings, "metrics_token", METRICS_TOKEN):
+            missing = client.get("/metrics")
+            wrong = client.get("/metrics", headers={"Authorization": "Bearer wrong"})
+            # The Sentry signature doesn't stand in for the token
+            signed = client.get(
+                "/metrics", headers={"sentry-hook-signature": "valid-signature"}
+            )
+
+        assert [missing.status_code, wrong.status_code, signed.status_code] == [
+            401,
+            401,
+            401,
+        ]
+        assert missing.json() == {"detail": "Invalid metrics token"}
+
+    def test_metrics_disabled_without_token(self, client) -> None:
+        with patch.object(settings, "metrics_token", ""):
+            response = client.get("/metrics")
+
+        assert response.status_code == 404
+
+    @patch("sentry.utils.is_correct_sentry_signature", return_value=True)
+    @patch("main.NotionClient.get_users", new_callable=AsyncMock)
+    def test_request_latency_recorded_by_route(
+        self, mock_get_users: MagicMock, mock_verify: MagicMock, client
+    ) -> None:
+        labels = {"method": "GET", "route": "/users", "status": "200"}
+        before = _sample("http_request_duration_seconds_count", labels)
+        mock_get_users.return_value = []
+
+        client.get("/users", headers={"sentry-hook-signature": "valid-signature"})
+
+        assert _sample("http_request_duration_seconds_count", labels) == before + 1
+
+    def test_rejected_request_recorded_as_unmatched(self, client) -> None:
+        labels = {"method": "GET", "route": "unmatched", "status": "401"}
+        before = _sample("http_request_duration_seconds_count", labels)
+
+        response = client.get("/users")
+
+        assert response.status_code == 401
+        assert _sample("http_request_duration_seconds_count", labels) == before + 1
+
+    @pytest.mark.asyncio
+    async def test_notion_rate_limit_counted(self) -> None:
+        call_labels = {"operation": "create_issue", "endpoint": "pages.create"}
+        labels = {**call_labels, "reason": "rate_limited"}
+        before = _sample("notion_request_errors_total", labels)
+
+        async def call() -> None:
+            raise HTTPResponseError(httpx.Response(429, text=""))
+
+        with pytest.raises(HTTPResponseError):
+            await observe_notion_call("create_issue", "pages.create", call)
+
+        assert _sample("notion_request_errors_total", labels) == before + 1
+        assert _sample("notion_request_duration_seconds_count", call_labels)
+
+    @pytest.mark.asyncio
+    @patch("notion.client.NotionClient._redis", new_callable=AsyncMock)
+    @patch("notion.client.NotionClient.notion", new_callable=AsyncMock)
+    async def test_notion_calls_labelled_by_operation(
+        self, mock_notion: MagicMock, mock_redis: MagicMock
+    ) -> None:
+        # The mocked client has no endpoint names
+        labels = {"operation": "get_users", "endpoint": "unknown"}
+        before = _sample("notion_request_duration_seconds_count", labels)
+        mock_redis.get.return_value = None
+        mock_notion.users.list.return_value = {
+            "object": "list",
+            "results": [],
+            "next_cursor": None,
+        }
+
+        await NotionClient.get_users()
+
+        assert _sample("notion_request_duration_seconds_count", labels) == before + 1
+
+    def test_notion_endpoint_name(self) -> None:
+        assert notion_endpoint_name(NotionClient.notion.pages.create) == "pages.create"
+        assert (
+            notion_endpoint_name(NotionClient.notion.databases.query)
+            == "databases.query"
+        )
+        assert notion_endpoint_name(AsyncMock()) == "unknown"
+
+    @pytest.mark.asyncio
+    @patch("notion.client.NotionClient._redis", new_callable=AsyncMock)
+    async def test_user_cache_lookups_counted(self, mock_redis: MagicMock) -> None:
+        def lookups(result: str) -> float:
+            return _sample(
+                "notion_cache_lookups_total",
+                {"key": NotionClient.USER_CACHE_KEY, "result": result},
+            )
+
+        failures = {"key": NotionClient.USER_CACHE_KEY}
+        before_miss = lookups("miss")
+        before_hit = lookups("local_hit")
+        before_failures = _sample("notion_cache_decode_failures_total", failures)
+        mock_redis.get.return_value = b"not a cache entry"
+
+        with patch.object(
+            NotionClient, "_fetch_users", new_callable=AsyncMock
+        ) as mock_fetch:
+            mock_fetch.side_effect = lambda: NotionClient._cache_user_index([])
+            await NotionClient.get_users()
+            await NotionClient.get_users()
+
+        assert lookups("miss") == before_miss + 1
+        assert lookups("local_hit") == before_hit + 1
+        assert (
+            _sample("notion_cache_decode_failures_total", failures)
+            == before_failures + 1
+        )
@@ -0,0 +1,143 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app, profiler, response_cache
+from profiling import record_notion_call
+from settings import settings
+
+
+ADMIN_TOKEN = "test-admin-token"
+
+
+def _burn_cpu(seconds: float) -> None:
+    # Stands in for CPU-bound work, the kind of frame profiles should catch
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class TestProfiling:
+    HEADERS = {"sentry-hook-signature": "valid-signature"}
+    ADMIN_HEADERS = {"Authorization": f"Bearer {ADMIN_TOKEN}"}
+
+    @pytest.fixture
+    def client(self):
+        return TestClient(app)
+
+    @pytest.fixture(autouse=True)
+    def reset_profiler(self):
+        response_cache.invalidate()
+        profiler.clear()
+        with patch.object(settings, "profiling_admin_token", ADMIN_TOKEN):
+            yield
+        profiler.enabled = settings.profiling_enabled
+        profiler.sample_rate = settings.profiling_sample_rate
+        profiler.slow_request_threshold = settings.profiling_slow_request_threshold
+        profiler.clear()
+
+    @pytest.fixture
+    def slow_get_users(self):
+        async def get_users(query=None):
+            record_notion_call("users.list", 200, 0.05)
+            # Keep this frame on the event loop thread for the stack sampler
+            _burn_cpu(0.03)
+            await asyncio.sleep(0.02)
+            return []
+
+        with patch(
+            "main.NotionClient.get_users", new_callable=AsyncMock
+        ) as mock_get_users:
+            mock_get_users.side_effect = get_users
+            yield mock_get_users
+
+    def _enable(self, client, **config) -> dict:
+        response = client.post(
+            "/admin/profiling",
+            json={"enabled": True, **config},
+            headers=self.ADMIN_HEADERS,
+        )
+        assert response.status_code == 200
+        return response.json()
+
+    @patch("sentry.utils.is_correct_sentry_signature", return_value=True)
+    def test_slow_request_captured(
+        self, mock_verify: MagicMock, client, slow_get_users
+    ) -> None:
+        status = self._enable(client, sample_rate=1, slow_request_threshold=0.01)
+        assert status["enabled"] is True
+
+        client.get("/users", headers=self.HEADERS)
+
+        # Verify the profile is listed without its stacks
+        profiles = client.get("/admin/profiling", headers=self.ADMIN_HEADERS).json()[
+            "profiles"
+        ]
+        assert len(profiles) == 1
+        assert "stacks" not in profiles[0]
+        assert profiles[0]["path"] == "/users"
+        assert profiles[0]["sampled"] is True
+
+        # Verify the full profile holds the Notion calls and sampled stacks
+        profile_id = profiles[0]["id"]
+        profile = client.get(
+            f"/admin/profiling/{profile_id}", headers=self.ADMIN_HEADERS
+        ).json()
+        assert profile["notion_calls"] == [
+            {"endpoint": "users.list", "status": 200, "duration": 0.05}
+        ]
+        assert profile["samples"] > 0
+
+        folded = client.get(
+            f"/admin/profiling/{profile_id}/folded", headers=self.ADMIN_HEADERS
+        )
+        assert folded.status_code == 200
+        assert "get_users" in folded.text
+
+    @patch("sentry.utils.is_correct_sentry_signature", return_value=True)
+    def test_fast_request_not_captured(
+        self, mock_verify: MagicMock, client, slow_get_users
+    ) -> None:
+        self._enable(client, slow_request_threshold=10)
+
+        client.get("/users", headers=self.HEADERS)
+
+        assert profiler.profiles() == []
+
+    @patch("sentry.utils.is_correct_sentry_signature", return_value=True)
+    def test_disabled_by_default(
+        self, mock_verify: MagicMock, client, slow_get_users
+    ) -> None:
+        profiler.slow_request_threshold = 0
+
+        client.get("/users", headers=self.HEADERS)
+
+        assert profiler.profiles() == []
+
+    def test_unknown_profile(self, client) -> None:
+        response = client.get("/admin/profiling/123", headers=self.ADMIN_HEADERS)
+
+        assert response.status_code == 404
+
+    @patch("sentry.utils.is_correct_sentry_signature", return_value=True)
+    def test_admin_requires_token(self, mock_verify: MagicMock, client) -> None:
+        # A Sentry signature is not enough
+        response = client.post(
+            "/admin/profiling", json={"enabled": True}, headers=self.HEADERS
+        )
+        wrong_token = client.get(
+            "/admin/profiling", headers={"Authorization": "Bearer wrong"}
+        )
+
+        assert response.status_code == 401
+        assert wrong_token.status_code == 401
+        assert profiler.enabled is False
+
+    def test_admin_disabled_without_token(self, client) -> None:
+        with patch.object(settings, "profiling_admin_token", ""):
+            response = client.get("/admin/profiling", headers=self.ADMIN_HEADERS)
+
+        assert response.status_code == 404
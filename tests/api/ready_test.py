@@ -0,0 +1,56 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from fastapi.testclient import TestClient
+
+from main import app
+from settings import settings
+
+
+class TestReady:
+    @patch("main.NotionClient.warm_up", new_callable=AsyncMock)
+    def test_ready_after_warm_up(self, mock_warm_up: MagicMock) -> None:
+        with TestClient(app) as client:
+            # Let the warm-up task run
+            client.portal.call(asyncio.sleep, 0)
+            response = client.get("/ready")
+
+        assert response.status_code == 200
+        assert response.json() == {"status": "ready"}
+        mock_warm_up.assert_called_once_with()
+
+    @patch("main.NotionClient.warm_up", new_callable=AsyncMock)
+    def test_not_ready_while_warming_up(self, mock_warm_up: MagicMock) -> None:
+        async def warm_up() -> None:
+            await asyncio.sleep(10)
+
+        mock_warm_up.side_effect = warm_up
+
+        with TestClient(app) as client:
+            response = client.get("/ready")
+
+        assert response.status_code == 503
+
+    @patch.object(settings, "warm_up_timeout", 0.01)
+    @patch("main.NotionClient.warm_up", new_callable=AsyncMock)
+    def test_ready_after_warm_up_timeout(self, mock_warm_up: MagicMock) -> None:
+        async def warm_up() -> None:
+            await asyncio.sleep(10)
+
+        mock_warm_up.side_effect = warm_up
+
+        with TestClient(app) as client:
+            # Give the timeout a chance to pass
+            client.portal.call(asyncio.sleep, 0.05)
+            response = client.get("/ready")
+
+        assert response.status_code == 200
+
+    @patch.object(settings, "warm_up_enabled", False)
+    @patch("main.NotionClient.warm_up", new_callable=AsyncMock)
+    def test_ready_without_warm_up(self, mock_warm_up: MagicMock) -> None:
+        with TestClient(app) as client:
+            response = client.get("/ready")
+
+        assert response.status_code == 200
+        mock_warm_up.assert_not_called()
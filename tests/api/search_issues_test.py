@@ -1,12 +1,13 @@
 from typing import Any, Dict, List, Optional
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 from uuid import UUID
 
 import pytest
 from fastapi.testclient import TestClient
 
-from main import app
-from notion.types import NotionRetrievePageResponse
+from main import app, response_cache
+from notion.scheduler import DeadlineExceeded
+from notion.types import NotionIssueSummary
 
 
 class TestSearchNotionIssues:
@@ -29,43 +30,23 @@ class TestSearchNotionIssues:
     def client(self):
         return TestClient(app)
 
+    @pytest.fixture(autouse=True)
+    def empty_response_cache(self):
+        response_cache.invalidate()
+
     @pytest.fixture
     def mock_issues(self):
-        # Setup mock Notion page responses
+        # Setup mock Notion issue summaries
         return [
-            NotionRetrievePageResponse(
+            NotionIssueSummary(
                 id=UUID(self.ISSUE_ID_1),
+                title=self.ISSUE_TITLE_1,
                 url=self.ISSUE_URL_1,
-                properties={
-                    "Name": {
-                        "id": "title",
-                        "type": "title",
-                        "title": [
-                            {
-                                "type": "text",
-                                "text": {"content": self.ISSUE_TITLE_1, "link": None},
-                                "plain_text": self.ISSUE_TITLE_1,
-                            }
-                        ],
-                    }
-                },
             ),
-            NotionRetrievePageResponse(
+            NotionIssueSummary(
                 id=UUID(self.ISSUE_ID_2),
+                title=self.ISSUE_TITLE_2,
                 url=self.ISSUE_URL_2,
-                properties={
-                    "Name": {
-                        "id": "title",
-                        "type": "title",
-                        "title": [
-                            {
-                                "type": "text",
-                                "text": {"content": self.ISSUE_TITLE_2, "link": None},
-                                "plain_text": self.ISSUE_TITLE_2,
-                            }
-                        ],
-                    }
-                },
             ),
         ]
 
@@ -113,7 +94,7 @@ class TestSearchNotionIssues:
         assert data == expected_data
 
     @patch("sentry.utils.is_correct_sentry_signature", return_value=True)
-    @patch("main.NotionClient.search_issues")
+    @patch("main.NotionClient.search_issues", new_callable=AsyncMock)
     def test_search_notion_issues_no_query(
         self, mock_search_issues: MagicMock, mock_verify: MagicMock, client, mock_issues, expected_response
     ) -> None:
@@ -129,11 +110,11 @@ class TestSearchNotionIssues:
         self._verify_successful_response(response, expected_response)
 
         # Verify the mocks were called correctly
-        mock_search_issues.assert_called_once_with(None)
+        mock_search_issues.assert_called_once_with(None, project_slug=None)
         mock_verify.assert_called_once()
 
     @patch("sentry.utils.is_correct_sentry_signature", return_value=True)
-    @patch("main.NotionClient.search_issues")
+    @patch("main.NotionClient.search_issues", new_callable=AsyncMock)
     def test_search_notion_issues_with_query(
         self, mock_search_issues: MagicMock, mock_verify: MagicMock, client, mock_issues, expected_response
     ) -> None:
@@ -152,11 +133,36 @@ class TestSearchNotionIssues:
         self._verify_successful_response(response, expected_filtered_response)
 
         # Verify the mocks were called correctly
-        mock_search_issues.assert_called_once_with(query)
+        mock_search_issues.assert_called_once_with(query, project_slug=None)
         mock_verify.assert_called_once()
 
     @patch("sentry.utils.is_correct_sentry_signature", return_value=True)
-    @patch("main.NotionClient.search_issues")
+    @patch("main.NotionClient.search_issues", new_callable=AsyncMock)
+    def test_search_notion_issues_for_project(
+        self,
+        mock_search_issues: MagicMock,
+        mock_verify: MagicMock,
+        client,
+        mock_issues,
+        expected_response,
+    ) -> None:
+        """Test that the project Sentry searches from narrows the search."""
+        # Setup mocks
+        self._setup_auth_mock(mock_verify)
+        mock_search_issues.return_value = mock_issues
+
+        # Make the request with the project Sentry sends along
+        response = client.get(
+            f"{self.API_ENDPOINT}?query=Security&projectSlug=backend",
+            headers={"sentry-hook-signature": "valid-signature"},
+        )
+
+        # Verify response
+        self._verify_successful_response(response, expected_response)
+        mock_search_issues.assert_called_once_with("Security", project_slug="backend")
+
+    @patch("sentry.utils.is_correct_sentry_signature", return_value=True)
+    @patch("main.NotionClient.search_issues", new_callable=AsyncMock)
     def test_search_notion_issues_empty_results(
         self, mock_search_issues: MagicMock, mock_verify: MagicMock, client, mock_issues
     ) -> None:
@@ -173,5 +179,40 @@ class TestSearchNotionIssues:
         self._verify_successful_response(response, [])
 
         # Verify the mocks were called correctly
-        mock_search_issues.assert_called_once_with(query)
+        mock_search_issues.assert_called_once_with(query, project_slug=None)
         mock_verify.assert_called_once()
+
+    @patch("sentry.utils.is_correct_sentry_signature", return_value=True)
+    @patch("main.NotionClient.search_issues", new_callable=AsyncMock)
+    def test_search_notion_issues_deadline_exceeded(
+        self, mock_search_issues: MagicMock, mock_verify: MagicMock, client
+    ) -> None:
+        """Test that a call dropped by the Notion scheduler returns a 503."""
+        # Setup mocks
+        self._setup_auth_mock(mock_verify)
+        mock_search_issues.side_effect = DeadlineExceeded("Notion is saturated")
+
+        # Make the request
+        response = self._make_request(client, "Security")
+
+        # Verify Sentry is asked to retry
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+
+    @patch("sentry.utils.is_correct_sentry_signature", return_value=True)
+    @patch("main.NotionClient.get_issues_generation", return_value=None)
+    @patch("main.NotionClient.search_issues", new_callable=AsyncMock)
+    def test_search_notion_issues_without_mirror_is_not_cached(
+        self, mock_search_issues: MagicMock, mock_generation: MagicMock, mock_verify: MagicMock, client, mock_issues
+    ) -> None:
+        """Test that live Notion searches are never answered from the cache."""
+        # Setup mocks
+        mock_search_issues.return_value = mock_issues
+
+        # Make the same request twice
+        first = self._make_request(client)
+        second = self._make_request(client)
+
+        # Verify Notion was searched both times but the ETag is stable
+        assert mock_search_issues.call_count == 2
+        assert second.headers["ETag"] == first.headers["ETag"]
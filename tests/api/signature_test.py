@@ -0,0 +1,171 @@
+import hashlib
+import hmac
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from main import app
+from notion.cache import LocalCache
+from sentry.utils import SentrySignatureMiddleware, _keyed_hmac
+
+SECRET: str = "test_secret"
+
+
+def sign(body: bytes, secret: str = SECRET) -> str:
+    return hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+
+
+class TestSentrySignatureMiddleware:
+    @pytest.fixture
+    def echo_app(self):
+        echo_app = FastAPI()
+
+        @echo_app.post("/echo")
+        async def echo(request: Request):
+            return {"body": (await request.body()).decode("utf-8")}
+
+        @echo_app.get("/echo")
+        async def echo_get():
+            return {"body": ""}
+
+        return echo_app
+
+    @pytest.fixture
+    def client(self, echo_app):
+        echo_app.add_middleware(SentrySignatureMiddleware, secret=SECRET)
+        return TestClient(echo_app)
+
+    @pytest.fixture
+    def replay_client(self, echo_app):
+        echo_app.add_middleware(
+            SentrySignatureMiddleware,
+            secret=SECRET,
+            replay_cache=LocalCache(max_entries=10, ttl=60),
+        )
+        return TestClient(echo_app)
+
+    @pytest.mark.parametrize(
+        "header", ["sentry-hook-signature", "sentry-app-signature"]
+    )
+    def test_valid_signature(self, client, header: str) -> None:
+        """Test that a signed request reaches the app with its body intact."""
+        body = json.dumps({"issueId": 123}).encode("utf-8")
+
+        response = client.post("/echo", content=body, headers={header: sign(body)})
+
+        assert response.status_code == 200
+        assert response.json() == {"body": body.decode("utf-8")}
+
+    def test_invalid_signature(self, client) -> None:
+        """Test that a request signed with another secret is rejected."""
+        body = b'{"issueId": 123}'
+
+        response = client.post(
+            "/echo",
+            content=body,
+            headers={"sentry-hook-signature": sign(body, "other_secret")},
+        )
+
+        assert response.status_code == 401
+        assert response.json() == {"detail": "Invalid Sentry Signature"}
+
+    def test_missing_signature(self, client) -> None:
+        """Test that an unsigned request is rejected."""
+        response = client.post("/echo", content=b"{}")
+
+        assert response.status_code == 401
+
+    def test_replayed_signature(self, replay_client) -> None:
+        """Test that a signed body is only accepted once with a replay cache."""
+        body = b'{"issueId": 123}'
+        headers = {"sentry-hook-signature": sign(body)}
+
+        first = replay_client.post("/echo", content=body, headers=headers)
+        second = replay_client.post("/echo", content=body, headers=headers)
+
+        assert first.status_code == 200
+        assert second.status_code == 401
+
+    def test_requests_without_body_are_not_replays(self, replay_client) -> None:
+        """Test that repeated lookups, which share a signature, are accepted."""
+        headers = {"sentry-hook-signature": sign(b"")}
+
+        assert replay_client.get("/echo", headers=headers).status_code == 200
+        assert replay_client.get("/echo", headers=headers).status_code == 200
+
+    def test_tenant_signature(self) -> None:
+        """Test that the tenant whose secret signed a request is recorded."""
+        tenant_app = FastAPI()
+
+        @tenant_app.post("/signer")
+        async def signer(request: Request):
+            return {"tenant": request.state.sentry_tenant}
+
+        tenant_app.add_middleware(
+            SentrySignatureMiddleware,
+            secret=SECRET,
+            tenant_secrets={"acme": "acme_secret"},
+        )
+        client = TestClient(tenant_app)
+        body = b'{"installationId": "1"}'
+
+        signers = [
+            client.post(
+                "/signer",
+                content=body,
+                headers={"sentry-hook-signature": sign(body, secret)},
+            ).json()
+            for secret in (SECRET, "acme_secret")
+        ]
+
+        assert signers == [{"tenant": None}, {"tenant": "acme"}]
+
+    def test_tenant_macs_keyed_once(self) -> None:
+        """Test that tenant MACs are keyed once, not for every request."""
+        tenant_app = FastAPI()
+
+        @tenant_app.post("/signer")
+        async def signer(request: Request):
+            return {"tenant": request.state.sentry_tenant}
+
+        tenant_secrets = {"acme": "acme_secret"}
+        tenant_app.add_middleware(
+            SentrySignatureMiddleware, secret=SECRET, tenant_secrets=tenant_secrets
+        )
+        client = TestClient(tenant_app)
+        body = b'{"installationId": "1"}'
+
+        def post(secret: str) -> dict:
+            return client.post(
+                "/signer",
+                content=body,
+                headers={"sentry-hook-signature": sign(body, secret)},
+            ).json()
+
+        # The middleware is built on the first request
+        assert post("acme_secret") == {"tenant": "acme"}
+        with patch("sentry.utils._keyed_hmac", wraps=_keyed_hmac) as mock_keyed_hmac:
+            assert post("acme_secret") == {"tenant": "acme"}
+            mock_keyed_hmac.assert_not_called()
+
+            # Secrets added later are keyed when first needed
+            tenant_secrets["globex"] = "globex_secret"
+            assert post("globex_secret") == {"tenant": "globex"}
+            assert post("globex_secret") == {"tenant": "globex"}
+            mock_keyed_hmac.assert_called_once()
+
+    @patch("main.NotionClient.create_issue", new_callable=AsyncMock)
+    def test_rejected_before_routing(self, mock_create_issue: MagicMock) -> None:
+        """Test that an invalid request never reaches request parsing or the route."""
+        client = TestClient(app)
+
+        # The body would also fail validation if it reached the route
+        response = client.post(
+            "/create", content=b"not json", headers={"sentry-hook-signature": "bad"}
+        )
+
+        assert response.status_code == 401
+        mock_create_issue.assert_not_called()
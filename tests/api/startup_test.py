@@ -0,0 +1,62 @@
+import os
+import subprocess
+import sys
+
+ROOT_DIR = os.path.join(os.path.dirname(__file__), "..", "..")
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+
+# Generous budgets so slow CI machines pass, which can be tightened per
+# machine; benchmarks/startup.py gives precise numbers
+IMPORT_TIME_BUDGET_MS = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "2000"))
+FIRST_RESPONSE_BUDGET_MS = float(os.getenv("STARTUP_FIRST_RESPONSE_BUDGET_MS", "4000"))
+
+
+def run_python(*args: str) -> subprocess.CompletedProcess:
+    env = dict(os.environ, PYTHONPATH=SRC_DIR, TEST_MODE="1")
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=ROOT_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+class TestStartup:
+    def test_import_builds_no_clients(self) -> None:
+        result = run_python(
+            "-c",
+            "import sys\n"
+            "import main\n"
+            "from notion.client import NotionClient\n"
+            "print('redis' in sys.modules)\n"
+            "print(type(NotionClient.__dict__['notion']).__name__)\n",
+        )
+
+        assert result.stdout.split() == ["False", "_LazyClassAttribute"]
+
+    def test_import_time_budget(self) -> None:
+        result = run_python("-X", "importtime", "-c", "import main")
+
+        main_line = result.stderr.strip().splitlines()[-1]
+        assert main_line.endswith("| main")
+        total_ms = int(main_line.split("|")[1]) / 1000
+        assert total_ms < IMPORT_TIME_BUDGET_MS
+
+    def test_time_to_first_response(self) -> None:
+        result = run_python(
+            "-c",
+            "import os, time\n"
+            "start = time.perf_counter()\n"
+            "os.environ['WARM_UP_ENABLED'] = 'false'\n"
+            "from fastapi.testclient import TestClient\n"
+            "from main import app\n"
+            "with TestClient(app) as client:\n"
+            "    status = client.get('/ready').status_code\n"
+            "print(status, (time.perf_counter() - start) * 1000)\n",
+        )
+
+        status, elapsed_ms = result.stdout.split()
+        assert status == "200"
+        assert float(elapsed_ms) < FIRST_RESPONSE_BUDGET_MS
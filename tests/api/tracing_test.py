@@ -0,0 +1,148 @@
+import json
+import logging
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from notion_client.errors import HTTPResponseError
+
+from main import app, response_cache
+from notion.client import NotionClient
+from notion.scheduler import Priority
+from settings import settings
+from tracing import (
+    FileExporter,
+    InMemoryExporter,
+    RequestIdFilter,
+    get_exporter,
+    set_exporter,
+    span,
+)
+
+
+class TestTracing:
+    REQUEST_ID: str = "4f1a2b3c"
+
+    @pytest.fixture
+    def client(self):
+        return TestClient(app)
+
+    @pytest.fixture(autouse=True)
+    def exporter(self):
+        response_cache.invalidate()
+        exporter = InMemoryExporter()
+        set_exporter(exporter)
+        yield exporter
+        set_exporter(None)
+
+    @patch("sentry.utils.is_correct_sentry_signature", return_value=True)
+    @patch("main.NotionClient.get_users", new_callable=AsyncMock)
+    def test_request_spans_share_request_id(
+        self, mock_get_users: MagicMock, mock_verify: MagicMock, client, exporter
+    ) -> None:
+        mock_get_users.return_value = []
+
+        response = client.get(
+            "/users",
+            headers={
+                "sentry-hook-signature": "valid-signature",
+                "Request-ID": self.REQUEST_ID,
+            },
+        )
+
+        # Verify the id is echoed back and every step is part of one trace
+        assert response.headers["Request-ID"] == self.REQUEST_ID
+        spans = {span.name: span for span in exporter.trace(self.REQUEST_ID)}
+        assert set(spans) == {
+            "http.request",
+            "sentry.verify_signature",
+            "response.encode",
+        }
+        root = spans["http.request"]
+        assert root.parent_id is None
+        assert root.attributes["http.route"] == "/users"
+        assert root.attributes["http.status_code"] == 200
+        assert spans["sentry.verify_signature"].parent_id == root.span_id
+        assert spans["sentry.verify_signature"].attributes == {
+            "sentry.signature_valid": True
+        }
+
+    def test_request_id_generated(self, client, exporter) -> None:
+        response = client.get("/users")
+
+        request_id = response.headers["Request-ID"]
+        assert request_id
+        assert [span.name for span in exporter.trace(request_id)] == [
+            "sentry.verify_signature",
+            "http.request",
+        ]
+
+    @pytest.mark.asyncio
+    @patch("notion.client.NotionClient.notion", new_callable=AsyncMock)
+    async def test_notion_call_records_status(
+        self, mock_notion: MagicMock, exporter
+    ) -> None:
+        mock_notion.pages.create.side_effect = HTTPResponseError(
+            httpx.Response(400, text="")
+        )
+
+        with pytest.raises(HTTPResponseError):
+            await NotionClient._call(Priority.WRITE, mock_notion.pages.create)
+
+        request_span, call_span = exporter.spans
+        assert request_span.name == "notion.request"
+        assert request_span.attributes["http.status_code"] == 400
+        assert request_span.error == "HTTPResponseError"
+        assert request_span.parent_id == call_span.span_id
+        assert call_span.attributes == {"operation": "unknown", "priority": "write"}
+
+    def test_logs_carry_request_id(self, caplog) -> None:
+        caplog.set_level(logging.INFO)
+        caplog.handler.addFilter(RequestIdFilter())
+
+        with patch("tracing.request_id") as mock_request_id:
+            mock_request_id.get.return_value = self.REQUEST_ID
+            logging.getLogger("tracing_test").info("inside a request")
+        logging.getLogger("tracing_test").info("outside a request")
+
+        assert [record.request_id for record in caplog.records] == [
+            self.REQUEST_ID,
+            "-",
+        ]
+        # Only the app's handler adds the id, records are built as usual
+        assert logging.getLogRecordFactory() is logging.LogRecord
+
+    def test_file_exporter(self, tmp_path) -> None:
+        path = tmp_path / "traces.jsonl"
+        file_exporter = FileExporter(str(path))
+        set_exporter(file_exporter)
+
+        with span("outer"):
+            with span("inner", step=1):
+                pass
+        # Spans are written in the background until the exporter is closed
+        file_exporter.close()
+
+        records = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [record["name"] for record in records] == ["inner", "outer"]
+        assert records[0]["attributes"] == {"step": 1}
+        assert records[0]["parent_id"] == records[1]["span_id"]
+
+    @patch.object(settings, "warm_up_enabled", False)
+    @patch.object(settings, "tracing_exporter", "memory")
+    def test_configured_on_startup(self) -> None:
+        set_exporter(None)
+
+        with TestClient(app):
+            assert isinstance(get_exporter(), InMemoryExporter)
+
+        assert get_exporter() is None
+
+    def test_span_disabled(self, exporter) -> None:
+        set_exporter(None)
+
+        with span("disabled") as disabled:
+            disabled.set_attribute("ignored", True)
+
+        assert not exporter.spans
@@ -0,0 +1,147 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from notion.cache import (
+    LocalCache,
+    SingleFlight,
+    decode_cache_entry,
+    encode_cache_entry,
+)
+
+
+class TestLocalCache:
+    """Test suite for the LocalCache class."""
+
+    def test_get_and_set(self) -> None:
+        """Test storing and reading a value."""
+        cache = LocalCache(max_entries=2, ttl=60)
+        cache.set("key", "value")
+
+        assert cache.get("key") == "value"
+        assert cache.get("missing") is None
+        assert cache.hits == 1
+        assert cache.misses == 1
+
+    def test_expired_entry_is_a_miss(self) -> None:
+        """Test that entries are dropped once their TTL passes."""
+        cache = LocalCache(max_entries=2, ttl=60)
+
+        with patch("notion.cache.time.monotonic", return_value=100.0):
+            cache.set("key", "value")
+        with patch("notion.cache.time.monotonic", return_value=161.0):
+            assert cache.get("key") is None
+
+        assert cache.misses == 1
+        assert len(cache) == 0
+
+    def test_evicts_least_recently_used(self) -> None:
+        """Test that the least recently used entry is evicted at capacity."""
+        cache = LocalCache(max_entries=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+
+        # Touch "a" so "b" becomes the least recently used entry
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    def test_invalidate(self) -> None:
+        """Test invalidating a single key and the whole cache."""
+        cache = LocalCache(max_entries=3, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+
+        cache.invalidate("a")
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+
+        cache.invalidate()
+        assert len(cache) == 0
+
+
+class TestSingleFlight:
+    """Test suite for the SingleFlight class."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_load(self) -> None:
+        """Test that concurrent callers for a key wait on a single load."""
+        single_flight = SingleFlight()
+        release = asyncio.Event()
+        calls = 0
+
+        async def load() -> str:
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return "value"
+
+        waiters = [asyncio.create_task(single_flight.do("key", load)) for _ in range(5)]
+        await asyncio.sleep(0)
+        assert single_flight.in_flight("key")
+
+        release.set()
+        results = await asyncio.gather(*waiters)
+
+        assert results == ["value"] * 5
+        assert calls == 1
+        assert not single_flight.in_flight("key")
+
+    @pytest.mark.asyncio
+    async def test_errors_are_shared_and_not_cached(self) -> None:
+        """Test that a failed load is reported to every waiter and retried."""
+        single_flight = SingleFlight()
+        calls = 0
+
+        async def load() -> str:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0)
+            raise RuntimeError("boom")
+
+        results = await asyncio.gather(
+            single_flight.do("key", load),
+            single_flight.do("key", load),
+            return_exceptions=True,
+        )
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert calls == 1
+
+        # The next call starts a fresh load
+        with pytest.raises(RuntimeError):
+            await single_flight.do("key", load)
+        assert calls == 2
+
+
+class TestCacheEntry:
+    """Test suite for the soft-expiry cache entry helpers."""
+
+    def test_fresh_entry(self) -> None:
+        """Test that an entry within its soft expiry is not stale."""
+        raw = encode_cache_entry({"key": "value"}, soft_ttl=60).encode("utf-8")
+
+        data, is_stale = decode_cache_entry(raw)
+
+        assert data == {"key": "value"}
+        assert not is_stale
+
+    def test_stale_entry(self) -> None:
+        """Test that an entry past its soft expiry is stale."""
+        with patch("notion.cache.time.time", return_value=1000.0):
+            raw = encode_cache_entry([1, 2], soft_ttl=60).encode("utf-8")
+        with patch("notion.cache.time.time", return_value=1061.0):
+            data, is_stale = decode_cache_entry(raw)
+
+        assert data == [1, 2]
+        assert is_stale
+
+    def test_legacy_entry_is_stale(self) -> None:
+        """Test that entries without a soft expiry are treated as stale."""
+        data, is_stale = decode_cache_entry(b'[{"id": 1}]')
+
+        assert data == [{"id": 1}]
+        assert is_stale
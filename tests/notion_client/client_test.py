@@ -1,11 +1,19 @@
-import json
-from unittest.mock import MagicMock, patch
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
 from uuid import UUID
 
+import fakeredis
 import pytest
 
+from notion.cache import encode_cache_entry
 from notion.client import NotionClient
-from notion.types import NotionRetrieveDatabaseResponse
+from notion.codec import decode_users, encode_users
+from notion.idempotency import IdempotentCalls
+from notion.types import (
+    GetPageDataResponse,
+    NotionRetrieveDatabaseResponse,
+    NotionUserResponse,
+)
 from sentry.types import (
     CreateNotionIssueFields,
     CreateNotionIssueParams,
@@ -18,9 +26,29 @@ from settings import settings
 class TestNotionClient:
     """Test suite for the NotionClient class."""
 
+    @pytest.fixture(autouse=True)
+    def empty_redis(self):
+        """Keep tests that don't mock Redis themselves off the network."""
+        with patch(
+            "notion.client.NotionClient._redis", new_callable=AsyncMock
+        ) as mock_redis:
+            mock_redis.get.return_value = None
+            # Pipelines buffer commands and only send them on execute
+            mock_redis.pipeline = MagicMock()
+            mock_redis.pipeline.return_value.execute = AsyncMock()
+            yield mock_redis
+
     @pytest.fixture(autouse=True)
     def setup(self):
         """Set up test data."""
+        # Start every test with cold in-process caches and an empty mirror
+        NotionClient._local_cache.invalidate()
+        NotionClient._page_cache.invalidate()
+        NotionClient._user_indexes = {}
+        NotionClient._issue_mirrors = {}
+        NotionClient._issue_mirror_syncs = {}
+        self.database = settings.notion_config.databases[0]
+
         # Test data for users
         self.user_id_1: str = "59833787-2cf9-4fdf-8782-e53db20768a5"
         self.user_id_2: str = "ee5f0f84-409a-440f-983a-a5315961c6e4"
@@ -67,7 +95,7 @@ class TestNotionClient:
         # Mock database response
         self.mock_database_response = {
             "object": "database",
-            "id": settings.notion_config.database_id,
+            "id": self.database.database_id,
             "properties": {
                 "Name": {
                     "id": "title",
@@ -100,6 +128,7 @@ class TestNotionClient:
                     "object": "page",
                     "id": self.issue_id_1,
                     "url": self.issue_url_1,
+                    "last_edited_time": "2025-01-02T10:00:00.000Z",
                     "properties": {
                         "Name": {
                             "id": "title",
@@ -121,6 +150,7 @@ class TestNotionClient:
                     "object": "page",
                     "id": self.issue_id_2,
                     "url": self.issue_url_2,
+                    "last_edited_time": "2025-01-01T10:00:00.000Z",
                     "properties": {
                         "Name": {
                             "id": "title",
@@ -157,9 +187,10 @@ class TestNotionClient:
             },
         }
 
-    @patch("notion.client.NotionClient._redis")
-    @patch("notion.client.NotionClient.notion")
-    def test_get_users_no_cache(
+    @pytest.mark.asyncio
+    @patch("notion.client.NotionClient._redis", new_callable=AsyncMock)
+    @patch("notion.client.NotionClient.notion", new_callable=AsyncMock)
+    async def test_get_users_no_cache(
         self, mock_notion: MagicMock, mock_get_redis: MagicMock
     ) -> None:
         """Test getting users without cache."""
@@ -170,7 +201,7 @@ class TestNotionClient:
         mock_notion.users.list.return_value = self.mock_users_response
 
         # Call the method
-        users = NotionClient.get_users()
+        users = await NotionClient.get_users()
 
         # Verify the results
         assert len(users) == 2
@@ -188,11 +219,69 @@ class TestNotionClient:
         args = mock_get_redis.setex.call_args[0]
         assert args[0] == "notion:users:all"
         assert args[1] == settings.cache_timeout
-        # The third argument is the JSON string, which we can't easily compare directly
 
-    @patch("notion.client.NotionClient._redis")
-    @patch("notion.client.NotionClient.notion")
-    def test_get_users_with_cache(
+        # Verify the users were stored in the binary format
+        cached_users, is_stale = decode_users(args[2])
+        assert [user.name for user in cached_users] == [
+            self.user_name_1,
+            self.user_name_2,
+        ]
+        assert not is_stale
+
+    @pytest.mark.asyncio
+    @patch("notion.client.NotionClient.notion", new_callable=AsyncMock)
+    async def test_get_users_generation(
+        self, mock_notion: MagicMock, empty_redis: MagicMock
+    ) -> None:
+        """Test that reloading the user directory changes its generation."""
+        # Setup mocks
+        mock_notion.users.list.return_value = self.mock_users_response
+        assert NotionClient.get_users_generation() is None
+
+        # Load the directory twice
+        await NotionClient.get_users()
+        generation = NotionClient.get_users_generation()
+        await NotionClient.get_users()
+        assert NotionClient.get_users_generation() == generation
+
+        # Verify a reload is a new generation
+        await NotionClient.invalidate_cache()
+        await NotionClient.get_users()
+        assert NotionClient.get_users_generation() != generation
+
+    @pytest.mark.asyncio
+    @patch("notion.client.NotionClient._redis", new_callable=AsyncMock)
+    @patch("notion.client.NotionClient.notion", new_callable=AsyncMock)
+    async def test_get_users_with_binary_cache(
+        self, mock_notion: MagicMock, mock_get_redis: MagicMock
+    ) -> None:
+        """Test getting users from a binary cache entry."""
+        # Setup mocks
+        cached_data = encode_users(
+            [
+                NotionUserResponse(id=UUID(self.user_id_1), name=self.user_name_1),
+                NotionUserResponse(id=UUID(self.user_id_2), name=self.user_name_2),
+            ],
+            settings.cache_soft_timeout,
+        )
+        mock_get_redis.get.return_value = cached_data
+
+        # Call the method
+        users = await NotionClient.get_users(query="Jane")
+
+        # Verify the results
+        assert len(users) == 1
+        assert str(users[0].id) == self.user_id_2
+        assert users[0].name == self.user_name_2
+
+        # Verify the Notion API was NOT called (cache was used)
+        mock_notion.users.list.assert_not_called()
+        mock_get_redis.setex.assert_not_called()
+
+    @pytest.mark.asyncio
+    @patch("notion.client.NotionClient._redis", new_callable=AsyncMock)
+    @patch("notion.client.NotionClient.notion", new_callable=AsyncMock)
+    async def test_get_users_with_cache(
         self, mock_notion: MagicMock, mock_get_redis: MagicMock
     ) -> None:
         """Test getting users with cache."""
@@ -201,16 +290,17 @@ class TestNotionClient:
         mock_get_redis.return_value = mock_redis
 
         # Create cached data that matches what would have been stored
-        cached_data = json.dumps(
+        cached_data = encode_cache_entry(
             [
                 {"id": self.user_id_1, "name": self.user_name_1, "object": "user"},
                 {"id": self.user_id_2, "name": self.user_name_2, "object": "user"},
-            ]
+            ],
+            settings.cache_soft_timeout,
         ).encode("utf-8")
         mock_get_redis.get.return_value = cached_data
 
         # Call the method
-        users = NotionClient.get_users()
+        users = await NotionClient.get_users()
 
         # Verify the results
         assert len(users) == 2
@@ -228,9 +318,10 @@ class TestNotionClient:
         # Verify setex was not called again (no need to set cache again)
         mock_get_redis.setex.assert_not_called()
 
-    @patch("notion.client.NotionClient._redis")
-    @patch("notion.client.NotionClient.notion")
-    def test_get_users_with_query(
+    @pytest.mark.asyncio
+    @patch("notion.client.NotionClient._redis", new_callable=AsyncMock)
+    @patch("notion.client.NotionClient.notion", new_callable=AsyncMock)
+    async def test_get_users_with_query(
         self, mock_notion: MagicMock, mock_get_redis: MagicMock
     ) -> None:
         """Test getting users with a search query."""
@@ -239,17 +330,18 @@ class TestNotionClient:
         mock_get_redis.return_value = mock_redis
 
         # Create cached data that matches what would have been stored
-        cached_data = json.dumps(
+        cached_data = encode_cache_entry(
             [
                 {"id": self.user_id_1, "name": self.user_name_1, "object": "user"},
                 {"id": self.user_id_2, "name": self.user_name_2, "object": "user"},
-            ]
+            ],
+            settings.cache_soft_timeout,
         ).encode("utf-8")
         mock_get_redis.get.return_value = cached_data
 
         # Call the method with a query
         query = "John"
-        users = NotionClient.get_users(query=query)
+        users = await NotionClient.get_users(query=query)
 
         # Verify the results - should only return the first user
         assert len(users) == 1
@@ -262,14 +354,16 @@ class TestNotionClient:
         # Verify the Notion API was NOT called (cache was used)
         mock_notion.users.list.assert_not_called()
 
-    @patch("notion.client.NotionClient.notion")
-    def test_search_issues_no_query(self, mock_notion: MagicMock) -> None:
+    @pytest.mark.asyncio
+    @patch.object(settings, "issue_mirror_enabled", False)
+    @patch("notion.client.NotionClient.notion", new_callable=AsyncMock)
+    async def test_search_issues_no_query(self, mock_notion: MagicMock) -> None:
         """Test searching issues without a query."""
         # Setup mocks
         mock_notion.databases.query.return_value = self.mock_issues_response
 
         # Call the method
-        issues = NotionClient.search_issues()
+        issues = await NotionClient.search_issues()
 
         # Verify the results
         assert len(issues) == 2
@@ -278,15 +372,17 @@ class TestNotionClient:
         assert str(issues[1].id) == self.issue_id_2
         assert issues[1].url == self.issue_url_2
 
-        database_id = settings.notion_config.database_id
+        database_id = self.database.database_id
 
         # Verify the mocks were called correctly
         mock_notion.databases.query.assert_called_once_with(
             database_id=database_id, page_size=10
         )
 
-    @patch("notion.client.NotionClient.notion")
-    def test_search_issues_with_query(self, mock_notion: MagicMock) -> None:
+    @pytest.mark.asyncio
+    @patch.object(settings, "issue_mirror_enabled", False)
+    @patch("notion.client.NotionClient.notion", new_callable=AsyncMock)
+    async def test_search_issues_with_query(self, mock_notion: MagicMock) -> None:
         """Test searching issues with a query."""
         # Setup mocks
         mock_notion.databases.query.return_value = {
@@ -296,14 +392,14 @@ class TestNotionClient:
 
         # Call the method with a query
         query = "Security"
-        issues = NotionClient.search_issues(query=query)
+        issues = await NotionClient.search_issues(query=query)
 
         # Verify the results
         assert len(issues) == 1
         assert str(issues[0].id) == self.issue_id_1
         assert issues[0].url == self.issue_url_1
 
-        database_id = settings.notion_config.database_id
+        database_id = self.database.database_id
 
         # Verify the mocks were called correctly
         mock_notion.databases.query.assert_called_once_with(
@@ -315,9 +411,10 @@ class TestNotionClient:
             },
         )
 
-    @patch("notion.client.NotionClient.notion")
-    @patch("notion.client.NotionClient._retrieve_database")
-    def test_create_issue(
+    @pytest.mark.asyncio
+    @patch("notion.client.NotionClient.notion", new_callable=AsyncMock)
+    @patch("notion.client.NotionClient._retrieve_database", new_callable=AsyncMock)
+    async def test_create_issue(
         self,
         mock_retrieve_database: MagicMock,
         mock_notion: MagicMock,
@@ -329,7 +426,6 @@ class TestNotionClient:
         )
         mock_retrieve_database.return_value = mock_database
         mock_notion.pages.create.return_value = self.mock_create_page_response
-        mock_notion.pages.retrieve.return_value = self.mock_create_page_response
 
         # Create issue params
         params = CreateNotionIssueParams(
@@ -349,7 +445,7 @@ class TestNotionClient:
         )
 
         # Call the method
-        response = NotionClient.create_issue(
+        response = await NotionClient.create_issue(
             title=params.fields.title,
             sentry_issue_url=params.webUrl,
             description=params.fields.description,
@@ -364,13 +460,14 @@ class TestNotionClient:
         mock_retrieve_database.assert_called_once()
         mock_notion.pages.create.assert_called_once()
 
+        # Verify the identifier was read from the create response
+        mock_notion.pages.retrieve.assert_not_called()
+
         # Verify the correct properties were passed to the create method
         create_args = mock_notion.pages.create.call_args[1]
-        assert (
-            create_args["parent"]["database_id"] == settings.notion_config.database_id
-        )
+        assert create_args["parent"]["database_id"] == self.database.database_id
 
-        columns = settings.notion_config.column_names
+        columns = self.database.column_names
 
         # In the actual implementation, we don't set the ID property directly
         # The ID is auto-generated by Notion, so we don't need to check it
@@ -381,15 +478,84 @@ class TestNotionClient:
             == params.fields.owner_id
         )
 
-    @patch("notion.client.NotionClient.notion")
-    def test_get_page_data(self, mock_notion: MagicMock) -> None:
+    @pytest.mark.asyncio
+    @patch("notion.client.NotionClient.notion", new_callable=AsyncMock)
+    @patch("notion.client.NotionClient._retrieve_database", new_callable=AsyncMock)
+    async def test_create_issue_with_idempotency_key(
+        self,
+        mock_retrieve_database: MagicMock,
+        mock_notion: MagicMock,
+    ) -> None:
+        """Test that a retried creation returns the first page."""
+        # Setup mocks
+        mock_retrieve_database.return_value = (
+            NotionRetrieveDatabaseResponse.model_validate(self.mock_database_response)
+        )
+        mock_notion.pages.create.return_value = self.mock_create_page_response
+        idempotent_creates = IdempotentCalls(
+            fakeredis.FakeAsyncRedis(),
+            prefix=NotionClient.CREATE_ISSUE_KEY_PREFIX,
+            ttl=60,
+            pending_timeout=1,
+        )
+
+        # Create the same issue twice
+        with patch.object(NotionClient, "_idempotent_creates", idempotent_creates):
+            responses = [
+                await NotionClient.create_issue(
+                    title=self.issue_title_1,
+                    sentry_issue_url="https://sentry.io/issues/123/",
+                    idempotency_key="installation:123",
+                )
+                for _ in range(2)
+            ]
+
+        # Verify only one page was created
+        assert responses[0] == responses[1]
+        assert responses[0].issue_id == "ID-123"
+        mock_notion.pages.create.assert_called_once()
+
+    @pytest.mark.asyncio
+    @patch("notion.client.NotionClient.notion", new_callable=AsyncMock)
+    @patch("notion.client.NotionClient._retrieve_database", new_callable=AsyncMock)
+    async def test_create_issue_without_identifier_in_response(
+        self,
+        mock_retrieve_database: MagicMock,
+        mock_notion: MagicMock,
+    ) -> None:
+        """Test that the page is retrieved when the create response lacks an ID."""
+        # Setup mocks
+        mock_retrieve_database.return_value = (
+            NotionRetrieveDatabaseResponse.model_validate(self.mock_database_response)
+        )
+        mock_notion.pages.create.return_value = {
+            "id": self.issue_id_1,
+            "url": self.issue_url_1,
+            "properties": {},
+        }
+        mock_notion.pages.retrieve.return_value = self.mock_create_page_response
+
+        # Call the method
+        response = await NotionClient.create_issue(
+            title=self.issue_title_1,
+            sentry_issue_url="https://sentry.io/organizations/example/issues/123456/",
+        )
+
+        # Verify the results came from the fallback retrieve
+        assert response.issue_id == "ID-123"
+        assert response.url == self.issue_url_1
+        mock_notion.pages.retrieve.assert_called_once_with(page_id=self.issue_id_1)
+
+    @pytest.mark.asyncio
+    @patch("notion.client.NotionClient.notion", new_callable=AsyncMock)
+    async def test_get_page_data(self, mock_notion: MagicMock) -> None:
         """Test getting page data."""
         # Setup mocks
         page_id = UUID(self.issue_id_1)
         mock_notion.pages.retrieve.return_value = self.mock_create_page_response
 
         # Call the method
-        response = NotionClient.get_page_data(page_id)
+        response = await NotionClient.get_page_data(page_id)
 
         # Verify the results
         assert response.identifier == "ID-123"
@@ -398,27 +564,35 @@ class TestNotionClient:
         # Verify the mocks were called correctly
         mock_notion.pages.retrieve.assert_called_once_with(page_id=str(page_id))
 
-    @patch("notion.client.NotionClient.notion")
-    def test_add_sentry_link_to_page(self, mock_notion: MagicMock) -> None:
+    @pytest.mark.asyncio
+    @patch("notion.client.NotionClient.notion", new_callable=AsyncMock)
+    async def test_add_sentry_link_to_page(self, mock_notion: MagicMock) -> None:
         """Test adding a Sentry link to a page."""
         # Setup mocks
         page_id = UUID(self.issue_id_1)
         sentry_url = "https://sentry.io/organizations/example/issues/123456/"
+        mock_notion.pages.update.return_value = self.mock_create_page_response
 
         # Call the method
-        NotionClient.add_sentry_link_to_page(page_id, sentry_url)
+        response = await NotionClient.add_sentry_link_to_page(page_id, sentry_url)
+
+        # Verify the results were read from the update response
+        assert response.identifier == "ID-123"
+        assert response.url == self.issue_url_1
 
-        columns = settings.notion_config.column_names
+        columns = self.database.column_names
 
         # Verify the mocks were called correctly
         mock_notion.pages.update.assert_called_once_with(
             page_id=str(page_id),
             properties={columns.sentry_url: {"url": sentry_url}},
         )
+        mock_notion.pages.retrieve.assert_not_called()
 
-    @patch("notion.client.NotionClient._redis")
-    @patch("notion.client.NotionClient.notion")
-    def test_retrieve_database_no_cache(
+    @pytest.mark.asyncio
+    @patch("notion.client.NotionClient._redis", new_callable=AsyncMock)
+    @patch("notion.client.NotionClient.notion", new_callable=AsyncMock)
+    async def test_retrieve_database_no_cache(
         self, mock_notion: MagicMock, mock_get_redis: MagicMock
     ) -> None:
         """Test retrieving database without cache."""
@@ -429,26 +603,29 @@ class TestNotionClient:
         mock_notion.databases.retrieve.return_value = self.mock_database_response
 
         # Call the method
-        database = NotionClient._retrieve_database()
+        database = await NotionClient._retrieve_database(self.database.database_id)
 
         # Verify the results
         assert len(database.properties) == 4
 
         # Verify the mocks were called correctly
-        mock_get_redis.get.assert_called_once_with("notion:database")
+        mock_get_redis.get.assert_called_once_with(
+            f"notion:database:{self.database.database_id}"
+        )
         mock_notion.databases.retrieve.assert_called_once_with(
-            database_id=settings.notion_config.database_id
+            database_id=self.database.database_id
         )
         mock_get_redis.setex.assert_called_once()
 
         # Verify the cache was set with the correct timeout
         args = mock_get_redis.setex.call_args[0]
-        assert args[0] == "notion:database"
+        assert args[0] == f"notion:database:{self.database.database_id}"
         assert args[1] == settings.cache_timeout
 
-    @patch("notion.client.NotionClient._redis")
-    @patch("notion.client.NotionClient.notion")
-    def test_retrieve_database_with_cache(
+    @pytest.mark.asyncio
+    @patch("notion.client.NotionClient._redis", new_callable=AsyncMock)
+    @patch("notion.client.NotionClient.notion", new_callable=AsyncMock)
+    async def test_retrieve_database_with_cache(
         self, mock_notion: MagicMock, mock_get_redis: MagicMock
     ) -> None:
         """Test retrieving database with cache."""
@@ -462,19 +639,416 @@ class TestNotionClient:
         )
 
         # Then serialize it as it would be in the actual implementation
-        cached_data = json.dumps(database_obj.model_dump(mode="json")).encode("utf-8")
+        cached_data = encode_cache_entry(
+            database_obj.model_dump(mode="json"), settings.cache_soft_timeout
+        ).encode("utf-8")
         mock_get_redis.get.return_value = cached_data
 
         # Call the method
-        database = NotionClient._retrieve_database()
+        database = await NotionClient._retrieve_database(self.database.database_id)
 
         # Verify the results
         assert len(database.properties) == 4
 
         # Verify the mocks were called correctly
-        mock_get_redis.get.assert_called_once_with("notion:database")
+        mock_get_redis.get.assert_called_once_with(
+            f"notion:database:{self.database.database_id}"
+        )
         # Verify the Notion API was NOT called (cache was used)
         mock_notion.databases.retrieve.assert_not_called()
 
         # Verify setex was not called again (no need to set cache again)
         mock_get_redis.setex.assert_not_called()
+
+    @pytest.mark.asyncio
+    @patch("notion.client.NotionClient._redis", new_callable=AsyncMock)
+    @patch("notion.client.NotionClient.notion", new_callable=AsyncMock)
+    async def test_get_users_with_local_cache(
+        self, mock_notion: MagicMock, mock_get_redis: MagicMock
+    ) -> None:
+        """Test that repeated user lookups are served from the in-process cache."""
+        # Setup mocks
+        mock_get_redis.get.return_value = None  # No cache
+        mock_notion.users.list.return_value = self.mock_users_response
+
+        # Call the method twice
+        await NotionClient.get_users()
+        users = await NotionClient.get_users()
+
+        # Verify the results
+        assert len(users) == 2
+
+        # Verify Redis and the Notion API were only hit by the first call
+        mock_get_redis.get.assert_called_once_with("notion:users:all")
+        mock_notion.users.list.assert_called_once_with()
+
+    @pytest.mark.asyncio
+    @patch("notion.client.NotionClient._redis", new_callable=AsyncMock)
+    async def test_user_index_kept_while_users_unchanged(
+        self, mock_get_redis: MagicMock
+    ) -> None:
+        """Test that the user index is only rebuilt when the users change."""
+        users = [
+            NotionUserResponse(id=UUID(self.user_id_1), name=self.user_name_1),
+            NotionUserResponse(id=UUID(self.user_id_2), name=self.user_name_2),
+        ]
+        mock_get_redis.get.return_value = encode_users(users, 60)
+        await NotionClient.get_users()
+        generation = NotionClient.get_users_generation()
+
+        # Expire the local cache, then reload the same users refreshed later
+        NotionClient._local_cache.invalidate()
+        mock_get_redis.get.return_value = encode_users(users, 120)
+        await NotionClient.get_users()
+        assert NotionClient.get_users_generation() == generation
+
+        # Verify a changed directory is indexed again
+        NotionClient._local_cache.invalidate()
+        mock_get_redis.get.return_value = encode_users(users[:1], 120)
+        assert len(await NotionClient.get_users()) == 1
+        assert NotionClient.get_users_generation() != generation
+
+    @pytest.mark.asyncio
+    @patch("notion.client.NotionClient._redis", new_callable=AsyncMock)
+    @patch("notion.client.NotionClient.notion", new_callable=AsyncMock)
+    async def test_invalidate_cache(
+        self, mock_notion: MagicMock, mock_get_redis: MagicMock
+    ) -> None:
+        """Test that invalidation drops both cache tiers."""
+        # Setup mocks
+        mock_get_redis.get.return_value = None  # No cache
+        mock_notion.databases.retrieve.return_value = self.mock_database_response
+
+        # Populate the cache, invalidate it, then fetch again
+        await NotionClient._retrieve_database(self.database.database_id)
+        await NotionClient.invalidate_cache()
+        await NotionClient._retrieve_database(self.database.database_id)
+
+        # Verify both lookups went past the in-process cache
+        assert mock_notion.databases.retrieve.call_count == 2
+        mock_get_redis.delete.assert_called_once_with(
+            "notion:users:all", f"notion:database:{self.database.database_id}"
+        )
+
+    @pytest.mark.asyncio
+    @patch("notion.client.NotionClient.notion", new_callable=AsyncMock)
+    async def test_sync_issue_mirror(self, mock_notion: MagicMock) -> None:
+        """Test that a full sync paginates the database into the mirror."""
+        # Setup mocks - the two issues are split across two pages of results
+        mock_notion.databases.query.side_effect = [
+            {
+                "object": "list",
+                "results": [self.mock_issues_response["results"][1]],
+                "next_cursor": "cursor-1",
+            },
+            {
+                "object": "list",
+                "results": [self.mock_issues_response["results"][0]],
+                "next_cursor": None,
+            },
+        ]
+
+        # Call the method
+        await NotionClient.sync_issue_mirror()
+
+        # Verify both pages of results were fetched
+        assert mock_notion.databases.query.call_count == 2
+        second_call = mock_notion.databases.query.call_args_list[1][1]
+        assert second_call["start_cursor"] == "cursor-1"
+        assert "filter" not in second_call
+
+        # Verify the mirror is ready and ordered by most recently edited
+        issues = await NotionClient.search_issues()
+        assert [str(issue.id) for issue in issues] == [
+            self.issue_id_1,
+            self.issue_id_2,
+        ]
+        assert issues[0].title == self.issue_title_1
+
+    @pytest.mark.asyncio
+    @patch("notion.client.NotionClient.notion", new_callable=AsyncMock)
+    async def test_sync_issue_mirror_incremental(self, mock_notion: MagicMock) -> None:
+        """Test that later syncs only fetch pages edited since the last sync."""
+        # Setup mocks
+        mock_notion.databases.query.return_value = self.mock_issues_response
+
+        # Run a full sync followed by an incremental one
+        await NotionClient.sync_issue_mirror()
+        await NotionClient.sync_issue_mirror()
+
+        # Verify the incremental sync filtered on the high-water mark
+        incremental_call = mock_notion.databases.query.call_args_list[1][1]
+        assert incremental_call["filter"] == {
+            "timestamp": "last_edited_time",
+            "last_edited_time": {"on_or_after": "2025-01-02T10:00:00+00:00"},
+        }
+
+    @pytest.mark.asyncio
+    @patch("notion.client.NotionClient.notion", new_callable=AsyncMock)
+    async def test_sync_issue_mirror_caches_changed_pages(
+        self, mock_notion: MagicMock, empty_redis: MagicMock
+    ) -> None:
+        """Test that syncs only write pages to Redis that changed."""
+        # Setup mocks - a page with an identifier, fetched by both syncs
+        page = self.mock_issues_response["results"][0]
+        mock_notion.databases.query.return_value = {
+            "object": "list",
+            "results": [
+                {
+                    **page,
+                    "properties": {
+                        **page["properties"],
+                        **self.mock_create_page_response["properties"],
+                    },
+                }
+            ],
+        }
+        pipe = empty_redis.pipeline.return_value
+
+        # Run a full sync followed by an incremental one
+        await NotionClient.sync_issue_mirror()
+        await asyncio.gather(*NotionClient._background_tasks)
+        await NotionClient.sync_issue_mirror()
+        await asyncio.gather(*NotionClient._background_tasks)
+
+        # Verify the page was written once, with an expiry
+        pipe.set.assert_called_once()
+        assert pipe.set.call_args[1] == {"ex": settings.cache_timeout}
+
+    @pytest.mark.asyncio
+    @patch("notion.client.NotionClient._schedule_issue_mirror_sync")
+    @patch("notion.client.NotionClient.notion", new_callable=AsyncMock)
+    async def test_search_issues_from_mirror(
+        self, mock_notion: MagicMock, mock_schedule_sync: MagicMock
+    ) -> None:
+        """Test that searches are answered by the mirror once it is ready."""
+        # Setup mocks
+        mock_notion.databases.query.return_value = self.mock_issues_response
+        await NotionClient.sync_issue_mirror()
+        mock_notion.databases.query.reset_mock()
+
+        # Call the method with a query
+        issues = await NotionClient.search_issues(query="security")
+
+        # Verify the results
+        assert len(issues) == 1
+        assert str(issues[0].id) == self.issue_id_1
+
+        # Verify Notion was not queried and no sync was needed
+        mock_notion.databases.query.assert_not_called()
+        mock_schedule_sync.assert_not_called()
+
+    @pytest.mark.asyncio
+    @patch("notion.client.NotionClient._schedule_issue_mirror_sync")
+    @patch("notion.client.NotionClient.notion", new_callable=AsyncMock)
+    async def test_search_issues_before_mirror_is_ready(
+        self, mock_notion: MagicMock, mock_schedule_sync: MagicMock
+    ) -> None:
+        """Test that searches fall back to Notion while the mirror is empty."""
+        # Setup mocks
+        mock_notion.databases.query.return_value = self.mock_issues_response
+
+        # Call the method
+        issues = await NotionClient.search_issues()
+
+        # Verify the live results were returned and a sync was started
+        assert len(issues) == 2
+        mock_notion.databases.query.assert_called_once()
+        mock_schedule_sync.assert_called_once_with(self.database)
+
+    @pytest.mark.asyncio
+    @patch("notion.client.NotionClient._redis", new_callable=AsyncMock)
+    @patch("notion.client.NotionClient.notion", new_callable=AsyncMock)
+    async def test_get_users_concurrent_misses(
+        self, mock_notion: MagicMock, mock_get_redis: MagicMock
+    ) -> None:
+        """Test that concurrent cache misses trigger a single user fetch."""
+        # Setup mocks
+        mock_get_redis.get.return_value = None  # No cache
+
+        async def list_users(**kwargs):
+            await asyncio.sleep(0)
+            return self.mock_users_response
+
+        mock_notion.users.list.side_effect = list_users
+
+        # Call the method concurrently
+        results = await asyncio.gather(*(NotionClient.get_users() for _ in range(5)))
+
+        # Verify every caller got the users from a single fetch
+        assert all(len(users) == 2 for users in results)
+        mock_get_redis.get.assert_called_once_with("notion:users:all")
+        mock_notion.users.list.assert_called_once_with()
+
+    @pytest.mark.asyncio
+    @patch("notion.client.NotionClient._redis", new_callable=AsyncMock)
+    @patch("notion.client.NotionClient.notion", new_callable=AsyncMock)
+    async def test_get_users_with_stale_cache(
+        self, mock_notion: MagicMock, mock_get_redis: MagicMock
+    ) -> None:
+        """Test that stale users are served while a refresh runs in the background."""
+        # Setup mocks - the cached entry is already past its soft expiry
+        cached_data = encode_cache_entry(
+            [{"id": self.user_id_1, "name": self.user_name_1}], soft_ttl=-1
+        ).encode("utf-8")
+        mock_get_redis.get.return_value = cached_data
+        mock_notion.users.list.return_value = self.mock_users_response
+
+        # Call the method
+        users = await NotionClient.get_users()
+
+        # Verify the stale users were returned without waiting for Notion
+        assert len(users) == 1
+        assert users[0].name == self.user_name_1
+
+        # Let the background refresh finish
+        await asyncio.gather(*NotionClient._background_tasks)
+
+        # Verify the refresh rewrote the cache with the hard timeout
+        mock_notion.users.list.assert_called_once_with()
+        args = mock_get_redis.setex.call_args[0]
+        assert args[0] == "notion:users:all"
+        assert args[1] == settings.cache_timeout
+
+        # Verify later calls see the refreshed users
+        users = await NotionClient.get_users()
+        assert len(users) == 2
+
+    @pytest.mark.asyncio
+    @patch("notion.client.NotionClient.notion", new_callable=AsyncMock)
+    async def test_get_page_data_with_cache(
+        self, mock_notion: MagicMock, empty_redis: MagicMock
+    ) -> None:
+        """Test that page data is only fetched from Notion once."""
+        # Setup mocks
+        page_id = UUID(self.issue_id_1)
+        mock_notion.pages.retrieve.return_value = self.mock_create_page_response
+
+        # Call the method twice
+        await NotionClient.get_page_data(page_id)
+        response = await NotionClient.get_page_data(page_id)
+
+        # Verify the results
+        assert response.identifier == "ID-123"
+        assert response.url == self.issue_url_1
+
+        # Verify the second call was served from the in-process cache
+        mock_notion.pages.retrieve.assert_called_once_with(page_id=str(page_id))
+
+        # Verify the page was written through to Redis under the ID column
+        await asyncio.gather(*NotionClient._background_tasks)
+        key = f"notion:page:{self.database.column_names.id}:{page_id}"
+        pipe = empty_redis.pipeline.return_value
+        pipe.set.assert_called_once_with(
+            key,
+            GetPageDataResponse(
+                identifier="ID-123", url=self.issue_url_1
+            ).model_dump_json(),
+            ex=settings.cache_timeout,
+        )
+        pipe.execute.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    @patch("notion.client.NotionClient.notion", new_callable=AsyncMock)
+    async def test_get_page_data_with_redis_cache(
+        self, mock_notion: MagicMock, empty_redis: MagicMock
+    ) -> None:
+        """Test that page data cached by another process is read from Redis."""
+        # Setup mocks
+        page_id = UUID(self.issue_id_1)
+        empty_redis.get.return_value = (
+            GetPageDataResponse(identifier="ID-123", url=self.issue_url_1)
+            .model_dump_json()
+            .encode("utf-8")
+        )
+
+        # Call the method
+        response = await NotionClient.get_page_data(page_id)
+
+        # Verify the results
+        assert response.identifier == "ID-123"
+        mock_notion.pages.retrieve.assert_not_called()
+
+    @pytest.mark.asyncio
+    @patch.object(settings, "issue_mirror_enabled", False)
+    @patch("notion.client.NotionClient.notion", new_callable=AsyncMock)
+    async def test_search_results_populate_page_cache(
+        self, mock_notion: MagicMock
+    ) -> None:
+        """Test that pages seen in search results need no later retrieve."""
+        # Setup mocks
+        search_response = {
+            "object": "list",
+            "results": [
+                {
+                    **self.mock_issues_response["results"][0],
+                    "properties": {
+                        **self.mock_issues_response["results"][0]["properties"],
+                        **self.mock_create_page_response["properties"],
+                    },
+                }
+            ],
+        }
+        mock_notion.databases.query.return_value = search_response
+
+        # Search, then look up the page that was found
+        await NotionClient.search_issues()
+        response = await NotionClient.get_page_data(UUID(self.issue_id_1))
+
+        # Verify the page data came from the search results
+        assert response.identifier == "ID-123"
+        mock_notion.pages.retrieve.assert_not_called()
+
+    @pytest.mark.asyncio
+    @patch("notion.client.NotionClient.notion", new_callable=AsyncMock)
+    async def test_warm_up(self, mock_notion: MagicMock) -> None:
+        """Test that warm-up loads the schema, users and issue mirror."""
+        # Setup mocks
+        mock_notion.databases.retrieve.return_value = self.mock_database_response
+        mock_notion.users.list.return_value = self.mock_users_response
+        mock_notion.databases.query.return_value = self.mock_issues_response
+
+        # Call the method
+        await NotionClient.warm_up()
+
+        # Verify later requests are served without calling Notion
+        mock_notion.reset_mock()
+        await NotionClient._retrieve_database(self.database.database_id)
+        await NotionClient.get_users()
+        issues = await NotionClient.search_issues()
+        assert len(issues) == 2
+        mock_notion.databases.retrieve.assert_not_called()
+        mock_notion.users.list.assert_not_called()
+        mock_notion.databases.query.assert_not_called()
+
+    @pytest.mark.asyncio
+    @patch("notion.client.NotionClient.notion", new_callable=AsyncMock)
+    async def test_warm_up_with_failure(self, mock_notion: MagicMock) -> None:
+        """Test that a failed load does not stop the others from warming up."""
+        # Setup mocks
+        mock_notion.databases.retrieve.side_effect = RuntimeError("Notion is down")
+        mock_notion.users.list.return_value = self.mock_users_response
+        mock_notion.databases.query.return_value = self.mock_issues_response
+
+        # Call the method
+        await NotionClient.warm_up()
+
+        # Verify the users were still loaded
+        mock_notion.reset_mock()
+        await NotionClient.get_users()
+        mock_notion.users.list.assert_not_called()
+
+    def test_configure_redis(self) -> None:
+        """Test that configuring Redis rebuilds what was built on the old client."""
+        redis = fakeredis.FakeAsyncRedis()
+        names = ["_redis", "_rate_limiter", "_idempotent_creates"]
+        original = {name: NotionClient.__dict__[name] for name in names}
+        try:
+            NotionClient.configure(redis=redis)
+
+            assert NotionClient._redis is redis
+            assert NotionClient._rate_limiter._script.registered_client is redis
+            assert NotionClient._idempotent_creates._redis is redis
+        finally:
+            for name, value in original.items():
+                setattr(NotionClient, name, value)
@@ -0,0 +1,84 @@
+import struct
+from uuid import uuid4
+
+import pytest
+
+from notion.codec import (
+    decode_users,
+    encode_users,
+    is_binary_user_cache,
+    user_cache_digest,
+)
+from notion.types import NotionUserResponse
+
+
+class TestUserCodec:
+    """Test suite for the binary user cache format."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Set up test data."""
+        self.users = [
+            NotionUserResponse(id=uuid4(), name="John Doe"),
+            NotionUserResponse(id=uuid4(), name="José Núñez"),
+            NotionUserResponse(id=uuid4(), name=""),
+        ]
+
+    @pytest.mark.parametrize("compress", [True, False])
+    def test_round_trip(self, compress: bool) -> None:
+        """Test that users decode to what was encoded."""
+        raw = encode_users(self.users, soft_ttl=60, compress=compress)
+        users, is_stale = decode_users(raw)
+
+        assert list(users) == self.users
+        assert not is_stale
+        assert is_binary_user_cache(raw)
+
+    def test_empty_directory(self) -> None:
+        """Test encoding a workspace without users."""
+        users, _ = decode_users(encode_users([], soft_ttl=60))
+
+        assert list(users) == []
+
+    def test_stale_entry(self) -> None:
+        """Test that entries past their soft expiry are reported as stale."""
+        _, is_stale = decode_users(encode_users(self.users, soft_ttl=-1))
+
+        assert is_stale
+
+    def test_digest(self) -> None:
+        """Test that the digest only changes with the users."""
+        digest = user_cache_digest(encode_users(self.users, soft_ttl=60))
+
+        assert user_cache_digest(encode_users(self.users, soft_ttl=-1)) == digest
+        assert user_cache_digest(encode_users(self.users[1:], soft_ttl=60)) != digest
+
+    def test_compression_shrinks_large_directories(self) -> None:
+        """Test that compression pays off on repetitive names."""
+        users = [
+            NotionUserResponse(id=uuid4(), name=f"Engineer {i}") for i in range(1000)
+        ]
+
+        compressed = encode_users(users, soft_ttl=60, compress=True)
+        uncompressed = encode_users(users, soft_ttl=60, compress=False)
+
+        assert len(compressed) < len(uncompressed)
+
+    def test_unknown_version(self) -> None:
+        """Test that entries from a newer format version are rejected."""
+        raw = bytearray(encode_users(self.users, soft_ttl=60))
+        struct.pack_into("<B", raw, 2, 99)
+
+        with pytest.raises(ValueError):
+            decode_users(bytes(raw))
+
+    def test_json_is_not_binary(self) -> None:
+        """Test that legacy JSON entries are told apart from binary ones."""
+        assert not is_binary_user_cache(b'{"refresh_at": 0, "data": []}')
+
+    def test_truncated_entry(self) -> None:
+        """Test that entries missing part of the body are rejected."""
+        raw = encode_users(self.users, soft_ttl=60, compress=False)
+
+        with pytest.raises(ValueError):
+            decode_users(raw[:-20])
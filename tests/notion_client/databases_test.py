@@ -0,0 +1,329 @@
+import asyncio
+from typing import Any, Dict, List, Optional
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import UUID
+
+import pytest
+
+from notion.client import NotionClient
+from settings import NotionConfig, settings
+
+ENGINEERING_DATABASE_ID = "11111111-1111-1111-1111-111111111111"
+SECURITY_DATABASE_ID = "22222222-2222-2222-2222-222222222222"
+
+
+def _config(security_sentry_url: str = "Sentry link") -> NotionConfig:
+    return NotionConfig.model_validate(
+        {
+            "databases": [
+                {"database_id": ENGINEERING_DATABASE_ID, "column_names": {}},
+                {
+                    "database_id": SECURITY_DATABASE_ID,
+                    "column_names": {"sentry_url": security_sentry_url},
+                    "projects": ["auth"],
+                },
+            ]
+        }
+    )
+
+
+def _page(number: int, title: str, day: int) -> Dict[str, Any]:
+    return {
+        "object": "page",
+        "id": str(UUID(int=number)),
+        "url": f"https://www.notion.so/{number}",
+        "last_edited_time": f"2025-01-{day:02d}T10:00:00.000Z",
+        "properties": {
+            "Name": {
+                "id": "title",
+                "type": "title",
+                "title": [{"type": "text", "plain_text": title}],
+            },
+            "ID": {
+                "id": "ID",
+                "type": "unique_id",
+                "unique_id": {"number": number, "prefix": "ENG"},
+            },
+        },
+    }
+
+
+class TestNotionConfig:
+    """Test suite for the Notion databases configuration."""
+
+    def test_single_database(self) -> None:
+        """Test that a single database may still be configured on its own."""
+        config = NotionConfig.model_validate(
+            {"database_id": "test_database_id", "column_names": {}}
+        )
+
+        assert [database.database_id for database in config.databases] == [
+            "test_database_id"
+        ]
+        assert config.database_for_project("auth").database_id == "test_database_id"
+
+    def test_database_for_project(self) -> None:
+        """Test that new issues go to the database listing their project."""
+        config = _config()
+
+        assert config.database_for_project("auth").database_id == SECURITY_DATABASE_ID
+        assert config.database_for_project("web").database_id == ENGINEERING_DATABASE_ID
+        assert config.database_for_project().database_id == ENGINEERING_DATABASE_ID
+
+    def test_databases_for_project(self) -> None:
+        """Test which databases are searched for a project."""
+        config = _config()
+
+        def searched(project_slug: Optional[str]) -> List[str]:
+            return [
+                database.database_id
+                for database in config.databases_for_project(project_slug)
+            ]
+
+        assert searched("auth") == [ENGINEERING_DATABASE_ID, SECURITY_DATABASE_ID]
+        assert searched("web") == [ENGINEERING_DATABASE_ID]
+        assert searched(None) == [ENGINEERING_DATABASE_ID, SECURITY_DATABASE_ID]
+
+
+class TestMultipleDatabases:
+    """Test suite for NotionClient with several issue databases."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Configure two databases and start with cold caches."""
+        NotionClient._local_cache.invalidate()
+        NotionClient._page_cache.invalidate()
+        NotionClient._issue_mirrors = {}
+        NotionClient._issue_mirror_syncs = {}
+        with (
+            patch.object(settings, "notion_config", _config()),
+            patch(
+                "notion.client.NotionClient._redis", new_callable=AsyncMock
+            ) as mock_redis,
+        ):
+            mock_redis.get.return_value = None
+            # Pipelines buffer commands and only send them on execute
+            mock_redis.pipeline = MagicMock()
+            mock_redis.pipeline.return_value.execute = AsyncMock()
+            self.redis = mock_redis
+            yield
+
+    @staticmethod
+    def _query_by_database(
+        results: Dict[str, List[Dict[str, Any]]],
+        delays: Optional[Dict[str, float]] = None,
+    ) -> Any:
+        async def query(database_id: str, **kwargs: Any) -> Dict[str, Any]:
+            await asyncio.sleep((delays or {}).get(database_id, 0))
+            return {"object": "list", "results": results[database_id]}
+
+        return query
+
+    @pytest.mark.asyncio
+    @patch("notion.client.NotionClient.notion", new_callable=AsyncMock)
+    async def test_create_issue_in_project_database(
+        self, mock_notion: MagicMock
+    ) -> None:
+        """Test that issues are created in the database of their project."""
+        # Setup mocks
+        mock_notion.databases.retrieve.return_value = {"properties": {}}
+        mock_notion.pages.create.return_value = _page(7, "Token leak", 1)
+
+        # Call the method
+        response = await NotionClient.create_issue(
+            title="Token leak",
+            sentry_issue_url="https://sentry.io/issues/7",
+            project_slug="auth",
+        )
+
+        # Verify the page and the cached schema belong to the project database
+        assert response.issue_id == "ENG-7"
+        mock_notion.databases.retrieve.assert_called_once_with(
+            database_id=SECURITY_DATABASE_ID
+        )
+        parent = mock_notion.pages.create.call_args[1]["parent"]
+        assert parent["database_id"] == SECURITY_DATABASE_ID
+        cache_key = self.redis.setex.call_args[0][0]
+        assert cache_key == f"notion:database:{SECURITY_DATABASE_ID}"
+
+    @pytest.mark.asyncio
+    @patch("notion.client.NotionClient.notion", new_callable=AsyncMock)
+    async def test_created_issue_added_to_mirror(self, mock_notion: MagicMock) -> None:
+        """Test that a created issue is searchable before the next sync."""
+        # Setup mocks
+        mock_notion.databases.query.side_effect = self._query_by_database(
+            {
+                ENGINEERING_DATABASE_ID: [_page(1, "Login fails", 1)],
+                SECURITY_DATABASE_ID: [_page(2, "Login token leak", 2)],
+            }
+        )
+        await NotionClient.sync_issue_mirror()
+        mock_notion.databases.query.reset_mock()
+        mirror = NotionClient._issue_mirrors[SECURITY_DATABASE_ID]
+        high_water_mark = mirror.high_water_mark
+        generation = NotionClient.get_issues_generation()
+        mock_notion.databases.retrieve.return_value = {"properties": {}}
+        mock_notion.pages.create.return_value = _page(7, "Login bypass", 3)
+
+        # Call the method
+        await NotionClient.create_issue(
+            title="Login bypass",
+            sentry_issue_url="https://sentry.io/issues/7",
+            project_slug="auth",
+        )
+
+        # Verify the issue is in its database's mirror
+        issues = await NotionClient.search_issues(query="login bypass")
+        assert [issue.identifier for issue in issues] == ["ENG-7"]
+        assert NotionClient.get_issues_generation() != generation
+        mock_notion.databases.query.assert_not_called()
+
+        # Verify the next sync still fetches pages edited by others
+        assert mirror.high_water_mark == high_water_mark
+
+    @pytest.mark.asyncio
+    @patch.object(settings, "issue_mirror_enabled", False)
+    @patch("notion.client.NotionClient.notion", new_callable=AsyncMock)
+    async def test_search_merges_databases_by_relevance(
+        self, mock_notion: MagicMock
+    ) -> None:
+        """Test that results from every database are merged by relevance."""
+        # Setup mocks
+        mock_notion.databases.query.side_effect = self._query_by_database(
+            {
+                ENGINEERING_DATABASE_ID: [
+                    _page(1, "Slow login page", 3),
+                    _page(2, "Login", 1),
+                ],
+                SECURITY_DATABASE_ID: [_page(3, "Login token leak", 2)],
+            }
+        )
+
+        # Call the method
+        issues = await NotionClient.search_issues(query="login", project_slug="auth")
+
+        # Verify exact and prefix matches come before other matches
+        assert [issue.title for issue in issues] == [
+            "Login",
+            "Login token leak",
+            "Slow login page",
+        ]
+        assert mock_notion.databases.query.call_count == 2
+
+    @pytest.mark.asyncio
+    @patch.object(settings, "issue_mirror_enabled", False)
+    @patch("notion.client.NotionClient.notion", new_callable=AsyncMock)
+    async def test_search_single_database_by_relevance(
+        self, mock_notion: MagicMock
+    ) -> None:
+        """Test that results from a single database are ranked the same way."""
+        # Setup mocks
+        mock_notion.databases.query.side_effect = self._query_by_database(
+            {
+                ENGINEERING_DATABASE_ID: [
+                    _page(1, "Slow login page", 3),
+                    _page(2, "Login", 1),
+                ],
+            }
+        )
+
+        # Call the method
+        issues = await NotionClient.search_issues(query="login", project_slug="web")
+
+        # Verify the exact match comes first
+        assert [issue.title for issue in issues] == ["Login", "Slow login page"]
+
+    @pytest.mark.asyncio
+    @patch.object(settings, "issue_mirror_enabled", False)
+    @patch.object(settings, "notion_interactive_timeout", 0.05)
+    @patch("notion.client.NotionClient.notion", new_callable=AsyncMock)
+    async def test_search_leaves_out_slow_databases(
+        self, mock_notion: MagicMock
+    ) -> None:
+        """Test that databases missing the deadline are left out of results."""
+        # Setup mocks
+        mock_notion.databases.query.side_effect = self._query_by_database(
+            {
+                ENGINEERING_DATABASE_ID: [_page(1, "Login fails", 1)],
+                SECURITY_DATABASE_ID: [_page(2, "Login token leak", 2)],
+            },
+            delays={SECURITY_DATABASE_ID: 10},
+        )
+
+        # Call the method
+        issues = await NotionClient.search_issues(query="login")
+
+        # Verify only the database that answered in time was used
+        assert [issue.title for issue in issues] == ["Login fails"]
+
+    @pytest.mark.asyncio
+    @patch.object(settings, "issue_mirror_enabled", False)
+    @patch("notion.client.NotionClient.notion", new_callable=AsyncMock)
+    async def test_search_fails_when_every_database_fails(
+        self, mock_notion: MagicMock
+    ) -> None:
+        """Test that the search fails if no database could be searched."""
+        # Setup mocks
+        mock_notion.databases.query.side_effect = RuntimeError("Notion is down")
+
+        # Call the method
+        with pytest.raises(RuntimeError):
+            await NotionClient.search_issues(query="login")
+
+    @pytest.mark.asyncio
+    @patch("notion.client.NotionClient.notion", new_callable=AsyncMock)
+    async def test_search_from_mirrors(self, mock_notion: MagicMock) -> None:
+        """Test that every database is mirrored and searched from its mirror."""
+        # Setup mocks
+        mock_notion.databases.query.side_effect = self._query_by_database(
+            {
+                ENGINEERING_DATABASE_ID: [_page(1, "Login fails", 1)],
+                SECURITY_DATABASE_ID: [_page(2, "Login token leak", 2)],
+            }
+        )
+        await NotionClient.sync_issue_mirror()
+        mock_notion.databases.query.reset_mock()
+        generation = NotionClient.get_issues_generation()
+
+        # Call the method for all databases and for a single one
+        issues = await NotionClient.search_issues(query="login")
+        web_issues = await NotionClient.search_issues(query="login", project_slug="web")
+
+        # Verify the results came from the mirrors
+        assert [issue.title for issue in issues] == [
+            "Login token leak",
+            "Login fails",
+        ]
+        assert [issue.title for issue in web_issues] == ["Login fails"]
+        mock_notion.databases.query.assert_not_called()
+
+        # Verify a change to any mirror changes the generation
+        NotionClient._issue_mirrors[SECURITY_DATABASE_ID].upsert(
+            [NotionClient._issue_mirrors[ENGINEERING_DATABASE_ID].search()[0]]
+        )
+        assert NotionClient.get_issues_generation() != generation
+
+    @pytest.mark.asyncio
+    @patch("notion.client.NotionClient.notion", new_callable=AsyncMock)
+    async def test_link_uses_column_of_page_database(
+        self, mock_notion: MagicMock
+    ) -> None:
+        """Test that linking writes to the Sentry column of the page's database."""
+        # Setup mocks
+        with patch.object(settings, "notion_config", _config("Sentry issue")):
+            page = _page(2, "Login token leak", 2)
+            mock_notion.pages.retrieve.return_value = {
+                **page,
+                "parent": {"type": "database_id", "database_id": SECURITY_DATABASE_ID},
+            }
+            mock_notion.pages.update.return_value = page
+
+            # Call the method
+            response = await NotionClient.add_sentry_link_to_page(
+                UUID(int=2), "https://sentry.io/issues/2"
+            )
+
+        # Verify the link was written to the right column
+        assert response.identifier == "ENG-2"
+        properties = mock_notion.pages.update.call_args[1]["properties"]
+        assert properties == {"Sentry issue": {"url": "https://sentry.io/issues/2"}}
@@ -0,0 +1,117 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import fakeredis
+import pytest
+
+from notion.idempotency import IdempotentCalls
+from notion.scheduler import DeadlineExceeded
+from notion.types import CreateNotionIssueResponse
+
+
+class TestIdempotentCalls:
+    """Test suite for the IdempotentCalls class."""
+
+    @pytest.fixture
+    def redis(self):
+        return fakeredis.FakeAsyncRedis()
+
+    @pytest.fixture
+    def response(self):
+        return CreateNotionIssueResponse(
+            url="https://www.notion.so/Issue-123", issue_id="ISSUE-1"
+        )
+
+    def _calls(self, redis, pending_timeout: float = 1.0) -> IdempotentCalls:
+        return IdempotentCalls(
+            redis,
+            prefix="notion:create_issue",
+            ttl=60,
+            pending_timeout=pending_timeout,
+            poll_interval=0.01,
+        )
+
+    @pytest.mark.asyncio
+    async def test_completed_call_is_not_repeated(self, redis, response) -> None:
+        """Test that a repeated key gets the stored result back."""
+        call = AsyncMock(return_value=response)
+        calls = self._calls(redis)
+
+        first = await calls.run("install:1", call, CreateNotionIssueResponse)
+        second = await calls.run("install:1", call, CreateNotionIssueResponse)
+
+        assert first == second == response
+        call.assert_called_once()
+        assert await redis.ttl("notion:create_issue:install:1") > 0
+
+    @pytest.mark.asyncio
+    async def test_different_keys_both_run(self, redis, response) -> None:
+        """Test that only identical keys are deduplicated."""
+        call = AsyncMock(return_value=response)
+        calls = self._calls(redis)
+
+        await calls.run("install:1", call, CreateNotionIssueResponse)
+        await calls.run("install:2", call, CreateNotionIssueResponse)
+
+        assert call.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_in_flight_duplicates_wait(self, redis, response) -> None:
+        """Test that duplicates on other replicas wait for the running call."""
+        release = asyncio.Event()
+
+        async def slow_call() -> CreateNotionIssueResponse:
+            await release.wait()
+            return response
+
+        call = AsyncMock(side_effect=slow_call)
+        # Two instances sharing Redis stand in for two replicas
+        first = asyncio.ensure_future(
+            self._calls(redis).run("install:1", call, CreateNotionIssueResponse)
+        )
+        await asyncio.sleep(0.02)
+        second = asyncio.ensure_future(
+            self._calls(redis).run("install:1", call, CreateNotionIssueResponse)
+        )
+        await asyncio.sleep(0.02)
+        release.set()
+
+        assert await first == await second == response
+        call.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_failed_call_can_be_retried(self, redis, response) -> None:
+        """Test that a failure releases the key for the next attempt."""
+        call = AsyncMock(side_effect=[RuntimeError("Notion is down"), response])
+        calls = self._calls(redis)
+
+        with pytest.raises(RuntimeError):
+            await calls.run("install:1", call, CreateNotionIssueResponse)
+        assert await calls.run("install:1", call, CreateNotionIssueResponse) == response
+        assert call.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_gives_up_waiting(self, redis, response) -> None:
+        """Test that waiting on a call that never finishes is bounded."""
+        await redis.set("notion:create_issue:install:1", "pending:other-replica")
+        call = AsyncMock(return_value=response)
+
+        with pytest.raises(DeadlineExceeded):
+            await self._calls(redis, pending_timeout=0.05).run(
+                "install:1", call, CreateNotionIssueResponse
+            )
+        call.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_runs_without_redis(self, response) -> None:
+        """Test that calls still run when Redis is unavailable."""
+        redis = MagicMock()
+        redis.set = AsyncMock(side_effect=ConnectionError("Redis is down"))
+        call = AsyncMock(return_value=response)
+
+        result = await self._calls(redis).run(
+            "install:1", call, CreateNotionIssueResponse
+        )
+
+        assert result == response
+        call.assert_called_once()
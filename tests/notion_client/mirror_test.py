@@ -0,0 +1,165 @@
+from datetime import datetime, timezone
+from unittest.mock import patch
+from uuid import UUID
+
+from notion.mirror import IssueMirror, rank_issues
+from notion.types import NotionIssueSummary
+
+
+def _issue(number: int, title: str, day: int) -> NotionIssueSummary:
+    return NotionIssueSummary(
+        id=UUID(int=number),
+        title=title,
+        url=f"https://www.notion.so/{number}",
+        identifier=f"ENG-{number}",
+        last_edited_time=datetime(2025, 1, day, tzinfo=timezone.utc),
+    )
+
+
+class TestIssueMirror:
+    """Test suite for the IssueMirror class."""
+
+    def test_not_ready_until_full_sync(self) -> None:
+        """Test that the mirror only reports ready after a full sync."""
+        mirror = IssueMirror(sync_interval=30, full_sync_interval=3600)
+        assert not mirror.is_ready
+        assert mirror.is_stale()
+        assert mirror.needs_full_sync()
+
+        mirror.replace([_issue(1, "Login fails", 1)])
+
+        assert mirror.is_ready
+        assert not mirror.is_stale()
+        assert not mirror.needs_full_sync()
+
+    def test_search(self) -> None:
+        """Test case-insensitive title search ordered by relevance, then last edit."""
+        mirror = IssueMirror(sync_interval=30, full_sync_interval=3600)
+        mirror.replace(
+            [
+                _issue(1, "Login fails", 1),
+                _issue(2, "Slow login page", 3),
+                _issue(3, "Billing error", 2),
+            ]
+        )
+
+        assert [issue.title for issue in mirror.search()] == [
+            "Slow login page",
+            "Billing error",
+            "Login fails",
+        ]
+        assert [issue.title for issue in mirror.search("LOGIN")] == [
+            "Login fails",
+            "Slow login page",
+        ]
+        assert [issue.title for issue in mirror.search("login", limit=1)] == [
+            "Login fails"
+        ]
+
+    def test_search_keeps_most_relevant(self) -> None:
+        """Test that an old exact match beats more recent partial matches."""
+        mirror = IssueMirror(sync_interval=30, full_sync_interval=3600)
+        mirror.replace(
+            [_issue(1, "Login", 1)]
+            + [_issue(number, f"Slow login {number}", 2) for number in range(2, 20)]
+        )
+
+        assert [issue.title for issue in mirror.search("login", limit=2)] == [
+            "Login",
+            "Slow login 2",
+        ]
+
+    def test_upsert_updates_existing_issues(self) -> None:
+        """Test that incremental syncs replace edited issues in place."""
+        mirror = IssueMirror(sync_interval=30, full_sync_interval=3600)
+        mirror.replace([_issue(1, "Login fails", 1), _issue(2, "Billing", 2)])
+
+        mirror.upsert([_issue(1, "Login fails on Safari", 4)])
+
+        assert len(mirror) == 2
+        assert mirror.search()[0].title == "Login fails on Safari"
+        assert mirror.high_water_mark == datetime(2025, 1, 4, tzinfo=timezone.utc)
+
+    def test_syncs_return_changed_issues(self) -> None:
+        """Test that syncs report the issues that are new or edited."""
+        mirror = IssueMirror(sync_interval=30, full_sync_interval=3600)
+        login, billing = _issue(1, "Login fails", 1), _issue(2, "Billing", 2)
+
+        assert mirror.replace([login, billing]) == [login, billing]
+        assert mirror.upsert([billing]) == []
+        edited = _issue(2, "Billing error", 3)
+        assert mirror.replace([login, edited]) == [edited]
+
+    def test_add_keeps_high_water_mark(self) -> None:
+        """Test that added issues are searchable but leave syncs unchanged."""
+        mirror = IssueMirror(sync_interval=30, full_sync_interval=3600)
+        mirror.replace([_issue(1, "Login fails", 1)])
+        generation = mirror.generation
+
+        mirror.add([_issue(2, "Billing error", 3)])
+
+        assert [issue.title for issue in mirror.search("billing")] == ["Billing error"]
+        assert mirror.generation > generation
+        assert mirror.high_water_mark == datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+    def test_becomes_stale(self) -> None:
+        """Test that the mirror asks for a sync once the interval passes."""
+        mirror = IssueMirror(sync_interval=30, full_sync_interval=3600)
+
+        with patch("notion.mirror.time.monotonic", return_value=100.0):
+            mirror.replace([])
+        with patch("notion.mirror.time.monotonic", return_value=131.0):
+            assert mirror.is_stale()
+            assert not mirror.needs_full_sync()
+
+    def test_generation_changes_with_contents(self) -> None:
+        """Test that only syncs which change the mirror bump the generation."""
+        mirror = IssueMirror(sync_interval=30, full_sync_interval=3600)
+        mirror.replace([_issue(1, "Login fails", 1)])
+        generation = mirror.generation
+
+        # Incremental syncs re-fetch the last page they already saw
+        mirror.upsert([_issue(1, "Login fails", 1)])
+        assert mirror.generation == generation
+
+        mirror.upsert([_issue(1, "Login fails on Safari", 2)])
+        assert mirror.generation > generation
+
+    def test_replace_with_no_issues(self) -> None:
+        """Test that a full sync of an empty database clears the mirror."""
+        mirror = IssueMirror(sync_interval=30, full_sync_interval=3600)
+        mirror.replace([_issue(1, "Login fails", 1)])
+
+        mirror.replace([])
+
+        assert mirror.search() == []
+
+
+class TestRankIssues:
+    """Test suite for ranking search results by relevance."""
+
+    def test_rank_issues(self) -> None:
+        """Test that exact, prefix and word matches beat other matches."""
+        issues = [
+            _issue(1, "Relogin loop", 5),
+            _issue(2, "Slow login page", 4),
+            _issue(3, "Login fails", 1),
+            _issue(4, "login", 2),
+            _issue(5, "Login button misaligned", 3),
+        ]
+
+        assert [issue.title for issue in rank_issues(issues, "Login", 4)] == [
+            "login",
+            "Login button misaligned",
+            "Login fails",
+            "Slow login page",
+        ]
+
+    def test_rank_issues_without_query(self) -> None:
+        """Test that without a query the most recently edited come first."""
+        issues = [_issue(1, "Login fails", 1), _issue(2, "Billing error", 2)]
+
+        assert [issue.title for issue in rank_issues(issues, None, 10)] == [
+            "Billing error",
+            "Login fails",
+        ]
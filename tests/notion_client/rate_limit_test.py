@@ -0,0 +1,114 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import fakeredis
+import pytest
+from prometheus_client import REGISTRY
+
+from notion.rate_limit import RedisTokenBucket
+from notion.scheduler import DeadlineExceeded, NotionScheduler, Priority
+
+
+class TestRedisTokenBucket:
+    """Test suite for the RedisTokenBucket class."""
+
+    @pytest.fixture
+    def redis(self):
+        return fakeredis.FakeAsyncRedis()
+
+    @pytest.mark.asyncio
+    async def test_hands_out_burst_then_waits(self, redis) -> None:
+        """Test that tokens run out after the burst and callers must wait."""
+        bucket = RedisTokenBucket(redis, key="notion:rate_limit", rate=2, burst=2)
+
+        assert await bucket.acquire() == 0
+        assert await bucket.acquire() == 0
+        wait = await bucket.acquire()
+
+        assert 0 < wait <= 0.5
+        assert bucket.stats()["acquired"] == 2
+        assert bucket.stats()["waits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_shared_between_replicas(self, redis) -> None:
+        """Test that buckets on the same key draw from the same tokens."""
+        first = RedisTokenBucket(redis, key="notion:rate_limit", rate=1, burst=1)
+        second = RedisTokenBucket(redis, key="notion:rate_limit", rate=1, burst=1)
+
+        assert await first.acquire() == 0
+        assert await second.acquire() > 0
+
+    @pytest.mark.asyncio
+    async def test_pause(self, redis) -> None:
+        """Test that a pause stops every replica taking tokens."""
+        bucket = RedisTokenBucket(redis, key="notion:rate_limit", rate=10, burst=5)
+
+        await bucket.pause(2)
+
+        assert 2 < await bucket.acquire() <= 2.1
+
+    @pytest.mark.asyncio
+    async def test_fails_open_without_redis(self) -> None:
+        """Test that calls proceed when Redis is unavailable."""
+        redis = MagicMock()
+        redis.register_script.return_value = AsyncMock(
+            side_effect=ConnectionError("Redis is down")
+        )
+        bucket = RedisTokenBucket(redis, key="notion:rate_limit", rate=1, burst=1)
+
+        assert await bucket.acquire() == 0
+        assert bucket.stats()["errors"] == 1
+
+    @pytest.mark.asyncio
+    async def test_exports_metrics(self, redis) -> None:
+        """Test that waits and rejections are exported to Prometheus."""
+        labels = {"key": "notion:rate_limit:metrics"}
+
+        def sample(name: str) -> float:
+            return REGISTRY.get_sample_value(name, labels) or 0.0
+
+        before_waits = sample("notion_rate_limit_wait_seconds_count")
+        before_rejections = sample("notion_rate_limit_rejections_total")
+        bucket = RedisTokenBucket(redis, key=labels["key"], rate=1, burst=1)
+
+        await bucket.acquire()
+        await bucket.acquire()
+        bucket.record_rejection()
+
+        assert sample("notion_rate_limit_wait_seconds_count") == before_waits + 1
+        assert sample("notion_rate_limit_rejections_total") == before_rejections + 1
+
+
+class TestNotionSchedulerWithSharedLimiter:
+    """Test suite for the NotionScheduler backed by a shared limiter."""
+
+    @pytest.mark.asyncio
+    async def test_waits_for_shared_token(self) -> None:
+        """Test that a call waits until the shared bucket hands out a token."""
+        limiter = MagicMock(spec=RedisTokenBucket)
+        limiter.acquire = AsyncMock(side_effect=[0.05, 0.0])
+        scheduler = NotionScheduler(rate=100, burst=1, limiter=limiter)
+
+        async def call() -> str:
+            return "result"
+
+        result = await scheduler.submit(call, priority=Priority.WRITE, timeout=1)
+
+        assert result == "result"
+        assert limiter.acquire.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_shared_wait_exceeds_deadline(self) -> None:
+        """Test that a call is dropped when the shared wait is too long."""
+        limiter = MagicMock(spec=RedisTokenBucket)
+        limiter.acquire = AsyncMock(return_value=5.0)
+        scheduler = NotionScheduler(rate=100, burst=1, limiter=limiter)
+
+        async def call() -> None:
+            pass
+
+        with pytest.raises(DeadlineExceeded):
+            await asyncio.wait_for(
+                scheduler.submit(call, priority=Priority.INTERACTIVE, timeout=1), 2
+            )
+        limiter.record_rejection.assert_called_once_with()
@@ -0,0 +1,113 @@
+import asyncio
+
+import httpx
+import pytest
+from notion_client.errors import HTTPResponseError
+
+from notion.scheduler import DeadlineExceeded, NotionScheduler, Priority
+
+
+def _rate_limited(retry_after: str = "0") -> HTTPResponseError:
+    return HTTPResponseError(
+        httpx.Response(429, headers={"retry-after": retry_after}, text="")
+    )
+
+
+class TestNotionScheduler:
+    """Test suite for the NotionScheduler class."""
+
+    @pytest.mark.asyncio
+    async def test_runs_call(self) -> None:
+        """Test that a call runs straight away while tokens are available."""
+        scheduler = NotionScheduler(rate=10, burst=1)
+
+        async def call() -> str:
+            return "result"
+
+        result = await scheduler.submit(call, priority=Priority.WRITE, timeout=1)
+
+        assert result == "result"
+
+    @pytest.mark.asyncio
+    async def test_releases_by_priority(self) -> None:
+        """Test that queued interactive calls go before earlier background ones."""
+        scheduler = NotionScheduler(rate=50, burst=1)
+        order = []
+
+        def record(name: str):
+            async def call() -> None:
+                order.append(name)
+
+            return call
+
+        # Use up the only token so the next calls have to queue
+        await scheduler.submit(record("first"), priority=Priority.WRITE, timeout=1)
+
+        background = asyncio.create_task(
+            scheduler.submit(
+                record("background"), priority=Priority.BACKGROUND, timeout=1
+            )
+        )
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(
+            scheduler.submit(
+                record("interactive"), priority=Priority.INTERACTIVE, timeout=1
+            )
+        )
+        await asyncio.gather(background, interactive)
+
+        assert order == ["first", "interactive", "background"]
+
+    @pytest.mark.asyncio
+    async def test_drops_call_that_would_miss_deadline(self) -> None:
+        """Test that a call is rejected when no token can arrive in time."""
+        scheduler = NotionScheduler(rate=1, burst=1)
+        calls = 0
+
+        async def call() -> None:
+            nonlocal calls
+            calls += 1
+
+        await scheduler.submit(call, priority=Priority.WRITE, timeout=1)
+        with pytest.raises(DeadlineExceeded):
+            await scheduler.submit(call, priority=Priority.INTERACTIVE, timeout=0.1)
+
+        assert calls == 1
+
+    @pytest.mark.asyncio
+    async def test_retries_after_rate_limit(self) -> None:
+        """Test that a 429 pauses the scheduler and the call is retried."""
+        scheduler = NotionScheduler(rate=100, burst=1)
+        attempts = 0
+
+        async def call() -> str:
+            nonlocal attempts
+            attempts += 1
+            if attempts == 1:
+                raise _rate_limited("0.05")
+            return "result"
+
+        result = await scheduler.submit(call, priority=Priority.WRITE, timeout=1)
+
+        assert result == "result"
+        assert attempts == 2
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_retries(self) -> None:
+        """Test that repeated 429s are raised once retries run out."""
+        scheduler = NotionScheduler(rate=100, burst=1, max_retries=1)
+
+        async def call() -> None:
+            raise _rate_limited()
+
+        with pytest.raises(HTTPResponseError):
+            await scheduler.submit(call, priority=Priority.WRITE, timeout=1)
+
+    def test_pause(self) -> None:
+        """Test that pausing holds back tokens for the Retry-After period."""
+        scheduler = NotionScheduler(rate=100, burst=5)
+        assert scheduler.time_until_token() == 0
+
+        scheduler.pause(2)
+
+        assert 1.9 < scheduler.time_until_token() <= 2
@@ -0,0 +1,193 @@
+from typing import Any, Dict, List
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import fakeredis
+import pytest
+
+from notion.client import NotionClient
+from notion.scheduler import NotionScheduler
+from notion.tenants import NotionTenant, NotionTenantPool, current_tenant
+from settings import NotionConfig, NotionTenantConfig, settings
+
+
+def _tenant_config(name: str, *installation_ids: str) -> NotionTenantConfig:
+    return NotionTenantConfig(
+        name=name,
+        installation_ids=list(installation_ids),
+        notion_token=f"{name}-token",
+        sentry_client_secret=f"{name}-secret",
+        notion_config=NotionConfig.model_validate(
+            {"database_id": f"{name}-database", "column_names": {}}
+        ),
+    )
+
+
+def _build(config: NotionTenantConfig) -> NotionTenant:
+    return NotionTenant(
+        config, notion=AsyncMock(), scheduler=NotionScheduler(rate=1000, burst=1000)
+    )
+
+
+class TestNotionTenantPool:
+    """Test suite for the NotionTenantPool class."""
+
+    def test_config_for(self) -> None:
+        """Test that installations are resolved to their tenant."""
+        acme = _tenant_config("acme", "1", "2")
+        pool = NotionTenantPool([acme], max_tenants=2, build=_build, evict=MagicMock())
+
+        assert pool.config_for("2") is acme
+        assert pool.config_for("3") is None
+        assert pool.config_for(None) is None
+
+    def test_reuses_tenants(self) -> None:
+        """Test that a tenant is built once and shared by its requests."""
+        acme = _tenant_config("acme", "1")
+        pool = NotionTenantPool([acme], max_tenants=2, build=_build, evict=MagicMock())
+
+        first = pool.acquire(acme)
+        second = pool.acquire(acme)
+
+        assert first is second
+        assert first.in_use == 2
+
+    def test_evicts_least_recently_used(self) -> None:
+        """Test that the pool drops the least recently used idle tenant."""
+        configs = [_tenant_config(name, name) for name in ("a", "b", "c")]
+        evict = MagicMock()
+        pool = NotionTenantPool(configs, max_tenants=2, build=_build, evict=evict)
+        a, b, c = configs
+
+        pool.release(pool.acquire(a))
+        pool.release(pool.acquire(b))
+        pool.release(pool.acquire(a))
+        pool.release(pool.acquire(c))
+
+        assert [tenant.name for tenant in pool] == ["a", "c"]
+        assert evict.call_args[0][0].name == "b"
+
+    def test_keeps_tenants_in_use(self) -> None:
+        """Test that tenants with requests in flight are never evicted."""
+        configs = [_tenant_config(name, name) for name in ("a", "b")]
+        evict = MagicMock()
+        pool = NotionTenantPool(configs, max_tenants=1, build=_build, evict=evict)
+
+        busy = pool.acquire(configs[0])
+        pool.release(pool.acquire(configs[1]))
+        assert [tenant.name for tenant in pool] == ["a"]
+
+        pool.release(busy)
+        assert len(pool) == 1
+        evict.assert_called_once()
+
+
+class TestNotionClientTenants:
+    """Test suite for serving several tenants from NotionClient."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Serve the acme tenant from installation 1."""
+        NotionClient._local_cache.invalidate()
+        self.acme = _tenant_config("acme", "1")
+        self.pool = NotionTenantPool(
+            [self.acme], max_tenants=4, build=_build, evict=MagicMock()
+        )
+        with (
+            patch.object(NotionClient, "_tenants", self.pool),
+            patch(
+                "notion.client.NotionClient._redis", new_callable=AsyncMock
+            ) as mock_redis,
+        ):
+            mock_redis.get.return_value = None
+            self.redis = mock_redis
+            yield
+
+    @staticmethod
+    def _users_response(*names: str) -> Dict[str, Any]:
+        results: List[Dict[str, Any]] = [
+            {
+                "object": "user",
+                "id": f"00000000-0000-0000-0000-00000000000{i}",
+                "name": name,
+            }
+            for i, name in enumerate(names)
+        ]
+        return {"object": "list", "results": results, "next_cursor": None}
+
+    @pytest.mark.asyncio
+    @patch("notion.client.NotionClient.notion", new_callable=AsyncMock)
+    async def test_tenant_workspace(self, mock_notion: MagicMock) -> None:
+        """Test that tenants get their own Notion client and cache keys."""
+        # Setup mocks
+        mock_notion.users.list.return_value = self._users_response("Default")
+
+        # Look up users for the tenant's installation
+        async with NotionClient.for_installation("1"):
+            tenant = current_tenant.get()
+            tenant.notion.users.list.return_value = self._users_response("Acme")
+            users = await NotionClient.get_users()
+
+        # Verify the tenant's workspace was used and its keys namespaced
+        assert [user.name for user in users] == ["Acme"]
+        mock_notion.users.list.assert_not_called()
+        assert self.redis.setex.call_args[0][0] == "tenant:acme:notion:users:all"
+        assert current_tenant.get() is None
+        assert tenant.in_use == 0
+
+        # Verify other installations still use the default workspace
+        async with NotionClient.for_installation("2"):
+            users = await NotionClient.get_users()
+        assert [user.name for user in users] == ["Default"]
+
+    @pytest.mark.asyncio
+    async def test_tenant_rate_limit(self) -> None:
+        """Test that a tenant's calls queue on its own scheduler."""
+        async with NotionClient.for_installation("1"):
+            tenant = current_tenant.get()
+            with (
+                patch.object(
+                    tenant.scheduler, "submit", new_callable=AsyncMock
+                ) as mock_submit,
+                patch.object(
+                    NotionClient._scheduler, "submit", new_callable=AsyncMock
+                ) as mock_default_submit,
+            ):
+                mock_submit.return_value = self._users_response("Acme")
+                await NotionClient.get_users()
+
+        mock_submit.assert_called_once()
+        mock_default_submit.assert_not_called()
+        assert tenant.scheduler is not NotionClient._scheduler
+
+    def test_create_tenant(self) -> None:
+        """Test that built tenants use their own token and quota."""
+        tenant = NotionClient._create_tenant(
+            self.acme.model_copy(update={"requests_per_second": 1.5})
+        )
+
+        assert tenant.notion.options.auth == "acme-token"
+        assert tenant.scheduler.rate == 1.5
+
+    @patch.object(settings, "notion_distributed_rate_limit", True)
+    def test_configure_redis_rebuilds_tenant_rate_limits(self) -> None:
+        """Test that configuring Redis moves tenant quotas to the new client."""
+        pool = NotionTenantPool(
+            [self.acme],
+            max_tenants=4,
+            build=NotionClient._create_tenant,
+            evict=MagicMock(),
+        )
+        self.redis.register_script = MagicMock()
+        tenant = pool.acquire(self.acme)
+        redis = fakeredis.FakeAsyncRedis()
+        names = ["_rate_limiter", "_idempotent_creates"]
+        original = {name: NotionClient.__dict__[name] for name in names}
+        try:
+            with patch.object(NotionClient, "_tenants", pool):
+                NotionClient.configure(redis=redis)
+
+            assert tenant.scheduler.limiter._script.registered_client is redis
+            assert tenant.scheduler.limiter.key == "tenant:acme:notion:rate_limit"
+        finally:
+            for name, value in original.items():
+                setattr(NotionClient, name, value)
@@ -0,0 +1,82 @@
+from uuid import UUID
+
+from notion.types import NotionUserResponse
+from notion.user_index import UserIndex, fold
+
+
+def _users(*names: str) -> list[NotionUserResponse]:
+    return [
+        NotionUserResponse(id=UUID(int=position), name=name)
+        for position, name in enumerate(names)
+    ]
+
+
+class TestUserIndex:
+    """Test suite for the UserIndex class."""
+
+    def test_fold(self) -> None:
+        """Test that folding ignores case and accents."""
+        assert fold("José ÅSTRÖM") == "jose astrom"
+
+    def test_no_query_returns_first_users(self) -> None:
+        """Test that an empty query returns users in directory order."""
+        index = UserIndex(_users("Ann", "Bob", "Cid"))
+
+        assert [user.name for user in index.search(None, limit=2)] == ["Ann", "Bob"]
+        assert [user.name for user in index.search("", limit=2)] == ["Ann", "Bob"]
+
+    def test_short_query(self) -> None:
+        """Test queries answered directly from a single posting list."""
+        index = UserIndex(_users("John Doe", "Jane Smith", "Joan Jett"))
+
+        assert [user.name for user in index.search("jo")] == ["John Doe", "Joan Jett"]
+        assert [user.name for user in index.search("x")] == []
+
+    def test_long_query_requires_contiguous_match(self) -> None:
+        """Test that long queries only match names containing them verbatim."""
+        # "Nnex Ann" holds every trigram of "annex" without containing it
+        index = UserIndex(_users("Nnex Ann", "Ann Annex", "Bob"))
+
+        assert [user.name for user in index.search("annex")] == ["Ann Annex"]
+
+    def test_accent_insensitive(self) -> None:
+        """Test that accents in either the name or the query are ignored."""
+        index = UserIndex(_users("José Álvarez", "Renée Dubois"))
+
+        assert [user.name for user in index.search("jose")] == ["José Álvarez"]
+        assert [user.name for user in index.search("RENÉE")] == ["Renée Dubois"]
+
+    def test_prefix_matches_rank_first(self) -> None:
+        """Test ranking of name prefix, word prefix and substring matches."""
+        index = UserIndex(_users("Dan Smithers", "Jordan Lee", "Dana Scully", "Al Dan"))
+
+        assert [user.name for user in index.search("dan")] == [
+            "Dan Smithers",
+            "Dana Scully",
+            "Al Dan",
+            "Jordan Lee",
+        ]
+
+    def test_limit(self) -> None:
+        """Test that results are capped at the limit."""
+        index = UserIndex(_users(*(f"User {number}" for number in range(20))))
+
+        assert len(index.search("user", limit=5)) == 5
+
+    def test_limit_keeps_best_ranked(self) -> None:
+        """Test that the limit cuts the ranking, not the directory."""
+        names = [f"Jordan {number}" for number in range(10)] + [
+            "Dana Scully",
+            "Al Dan",
+            "Dan Smithers",
+        ]
+        index = UserIndex(_users(*names))
+
+        assert [user.name for user in index.search("dan", limit=3)] == [
+            "Dana Scully",
+            "Dan Smithers",
+            "Al Dan",
+        ]
+        assert [user.name for user in index.search("dan smi", limit=1)] == [
+            "Dan Smithers"
+        ]
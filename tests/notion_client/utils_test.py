@@ -0,0 +1,51 @@
+from unittest.mock import patch
+
+import pytest
+from pydantic import ValidationError
+
+from notion.types import NotionRetrievePageResponse
+from notion.utils import validate_notion_response
+from settings import settings
+
+
+class TestValidateNotionResponse:
+    """Test suite for validate_notion_response."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Set up test data."""
+        self.page = {
+            "object": "page",
+            "id": "12345678-1234-5678-1234-567812345678",
+            "url": "https://www.notion.so/Issue-123456781234567812345678",
+            "properties": {
+                "ID": {
+                    "id": "id",
+                    "type": "unique_id",
+                    "unique_id": {"number": 1, "prefix": "ISSUE"},
+                },
+            },
+        }
+
+    def test_validates_properties_by_default(self) -> None:
+        """Test that property values are validated and copied by default."""
+        page = validate_notion_response(NotionRetrievePageResponse, self.page)
+
+        assert page.properties == self.page["properties"]
+        assert page.properties is not self.page["properties"]
+
+    @patch.object(settings, "fast_serialization", True)
+    def test_trusts_properties_in_fast_mode(self) -> None:
+        """Test that fast mode keeps the raw property values as returned."""
+        page = validate_notion_response(NotionRetrievePageResponse, self.page)
+
+        assert page.properties is self.page["properties"]
+        assert str(page.id) == self.page["id"]
+
+    @patch.object(settings, "fast_serialization", True)
+    def test_fast_mode_still_validates_other_fields(self) -> None:
+        """Test that fast mode only skips the raw property values."""
+        with pytest.raises(ValidationError):
+            validate_notion_response(
+                NotionRetrievePageResponse, {**self.page, "id": "not-a-uuid"}
+            )